@@ -0,0 +1,342 @@
+import os, sys
+import argparse
+import contextlib
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from main import (
+    MARGIN_METHOD,
+    LEAGUE_NAME,
+    find_team_match,
+    fixture_inputs,
+    load_feature_store,
+    load_league_data,
+    load_predictor_params
+)
+from match_predictor import get_betting_suggestions_and_markets
+from portfolio_kelly import settle_on_score
+from devig import MARGIN_METHODS, devig_probabilities
+from calibration import Calibrator, probability_column
+from odds_store import OddsStore
+from value_scanner import best_odds_dict
+from elo_engine import pre_match_elo_diff
+
+RESULT_COLUMNS = ["date", "home", "away", "home_goals", "away_goals"]
+# Optional closing 1X2 prices in the results file
+ODDS_1X2_COLUMNS = ["odds_home", "odds_draw", "odds_away"]
+# Optional corner counts in the results file, used to settle corner markets for calibration
+CORNER_RESULT_COLUMNS = ["home_corners", "away_corners"]
+# How far before kick-off to look for prices in an odds store
+ODDS_LOOKBACK = pd.Timedelta(days=14)
+
+
+def season_of(dates):
+    """Season label (e.g. '2023-2024') for each date, with seasons starting in July"""
+    start = dates.dt.year - (dates.dt.month < 7).astype(int)
+    return start.astype(str) + "-" + (start + 1).astype(str)
+
+
+def read_results(filepath, league=None):
+    """Historical results with date, home, away, home_goals and away_goals columns.
+
+    Optional columns: league (defaults to the league argument or LEAGUE_NAME), season
+    (derived from the date when missing), closing odds_home/odds_draw/odds_away and
+    home_corners/away_corners.
+    """
+    results = pd.read_csv(filepath)
+    results.columns = [str(col).strip().lower() for col in results.columns]
+    missing = [col for col in RESULT_COLUMNS if col not in results.columns]
+    if missing:
+        raise ValueError(f"Results file is missing columns {missing}. Found: {list(results.columns)}")
+
+    results["date"] = pd.to_datetime(results["date"], utc=True)
+    if "league" not in results.columns:
+        results["league"] = league or LEAGUE_NAME
+    if "season" not in results.columns:
+        results["season"] = season_of(results["date"])
+    results = results.dropna(subset=["home_goals", "away_goals"])
+    results[["home_goals", "away_goals"]] = results[["home_goals", "away_goals"]].astype(int)
+    return results.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def find_snapshots(snapshot_root):
+    """Dated feature snapshots laid out as <root>/<league>/<YYYY-MM-DD>/.
+
+    Each snapshot folder holds the league's data files as they were on that date.
+    Returns {league: [(date, path), ...]} sorted by date.
+    """
+    snapshots = {}
+    for league in sorted(os.listdir(snapshot_root)):
+        league_dir = os.path.join(snapshot_root, league)
+        if not os.path.isdir(league_dir):
+            continue
+        dated = []
+        for name in os.listdir(league_dir):
+            try:
+                date = pd.Timestamp(name, tz="UTC")
+            except ValueError:
+                continue
+            dated.append((date, os.path.join(league_dir, name)))
+        snapshots[league] = sorted(dated)
+    return snapshots
+
+
+def assign_snapshots(results, snapshots):
+    """Attach the latest snapshot taken strictly before each fixture's day.
+
+    Snapshot folders are dated by day and may be end-of-day exports, so one dated
+    the fixture's own day is not used. Fixtures with no earlier snapshot get no
+    snapshot and are not priced, so no feature can come from after kick-off.
+    """
+    results = results.copy()
+    results["snapshot"] = None
+    for league, rows in results.groupby("league").groups.items():
+        dated = snapshots.get(league, [])
+        if not dated:
+            continue
+        snapshot_dates = pd.DatetimeIndex([date for date, _ in dated])
+        paths = np.array([path for _, path in dated], dtype=object)
+        position = snapshot_dates.searchsorted(pd.DatetimeIndex(results.loc[rows, "date"]).normalize(), side="left") - 1
+        results.loc[rows, "snapshot"] = np.where(position >= 0, paths[np.maximum(position, 0)], None)
+    return results
+
+
+@lru_cache(maxsize=4)
+def _load_snapshot(snapshot_dir):
+    team_df, player_df, corner_data, form_data = load_league_data(snapshot_dir)
+    # Team features are materialized once per snapshot and shared by every fixture
+    league = os.path.basename(os.path.dirname(os.path.normpath(snapshot_dir)))
+    feature_store = load_feature_store(team_df, player_df, form_data, data_dir=snapshot_dir, league=league)
+    return team_df, player_df, corner_data, form_data, feature_store, set(player_df["Team"].dropna().unique())
+
+
+def _fixture_odds(fixture, store, margin_method):
+    """(odds_dict, fair_dict) of prices known before kick-off: the best store prices,
+    each de-vigged within its own bookmaker's book, else the results file's single book"""
+    if store is not None:
+        book = store.latest(as_of=fixture["date"], since=fixture["date"] - ODDS_LOOKBACK,
+                            fixtures=[(fixture["home"], fixture["away"])])
+        return best_odds_dict(book, fixture["home"], fixture["away"], margin_method)
+    prices = [fixture.get(col) for col in ODDS_1X2_COLUMNS]
+    if all(price is not None and pd.notna(price) and price > 1 for price in prices):
+        return {"1X2": dict(zip(["Home Win", "Draw", "Away Win"], map(float, prices)))}, None
+    return {}, None
+
+
+def _backtest_fixtures(task):
+    """Price fixtures that share one snapshot (runs in a worker process)"""
+    snapshot_dir, fixtures, odds_store_path, margin_method, params, calibrator = task
+    records = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        team_df, player_df, corner_data, form_data, feature_store, player_teams = _load_snapshot(snapshot_dir)
+        store = OddsStore(odds_store_path) if odds_store_path else None
+
+        for fixture in fixtures:
+            record = {key: fixture[key] for key in ["league", "season", "date", "home", "away", "home_goals", "away_goals"]}
+            record.update({key: fixture[key] for key in CORNER_RESULT_COLUMNS if key in fixture})
+            record["snapshot"] = os.path.basename(snapshot_dir)
+            records.append(record)
+
+            home_team = find_team_match(fixture["home"], player_teams)
+            away_team = find_team_match(fixture["away"], player_teams)
+            inputs = fixture_inputs(home_team, away_team, team_df, player_df, feature_store) if home_team and away_team else None
+            if inputs is None:
+                record["status"] = "unmatched"
+                continue
+
+            odds_dict, fair_dict = _fixture_odds(fixture, store, margin_method)
+            elo_diff = fixture.get("elo_diff")
+            try:
+                _, _, _, value_bets, details = get_betting_suggestions_and_markets(
+                    **inputs,
+                    corner_data=corner_data,
+                    form_data=form_data,
+                    return_details=True,
+                    odds_dict=odds_dict,
+                    fair_dict=fair_dict,
+                    margin_method=margin_method,
+                    params=params,
+                    calibrator=calibrator,
+                    elo_diff=None if elo_diff is None or pd.isna(elo_diff) else float(elo_diff)
+                )
+            except Exception as e:
+                record["status"] = f"error: {e}"
+                continue
+
+            result_probs = details["probabilities"]["1X2"]
+            record.update({
+                "status": "ok",
+                "p_home": result_probs["Home Win"],
+                "p_draw": result_probs["Draw"],
+                "p_away": result_probs["Away Win"],
+                "lambda_home": details["features"]["lambda_home"],
+                "lambda_away": details["features"]["lambda_away"],
+                "elo_diff": details["features"]["elo_diff"],
+            })
+            # Every market's probabilities, for fitting calibration maps
+            for market, outcomes in details["probabilities"].items():
+                for outcome, probability in outcomes.items():
+                    record[probability_column(market, outcome)] = float(probability)
+
+            # Level one-unit stakes on every value bet the final score settles
+            profits = [settle_on_score(bet, fixture["home_goals"], fixture["away_goals"]) for bet in value_bets]
+            profits = [profit for profit in profits if profit is not None]
+            record["bets"] = len(profits)
+            record["profit"] = float(sum(profits))
+    return records
+
+
+def run_backtest(results, snapshot_root, odds_store=None, workers=None, chunk_size=50, margin_method=MARGIN_METHOD,
+                 params=None, calibrator=None, elo=False):
+    """Replay historical fixtures through the predictor using point-in-time snapshots.
+
+    Fixtures are grouped by snapshot and split into chunks that run across a process
+    pool; each worker loads a snapshot once. With elo, each fixture also gets the
+    Elo gap rated from the earlier results in the file. Returns one row per fixture.
+    """
+    if elo:
+        results = results.assign(elo_diff=pre_match_elo_diff(results))
+    results = assign_snapshots(results, find_snapshots(snapshot_root))
+    no_snapshot = results["snapshot"].isna()
+    if no_snapshot.any():
+        print(f"⚠️ {int(no_snapshot.sum())} fixtures have no earlier snapshot and are skipped")
+
+    tasks = []
+    for snapshot_dir, fixtures in results[~no_snapshot].groupby("snapshot", sort=True):
+        rows = fixtures.to_dict("records")
+        for start in range(0, len(rows), chunk_size):
+            tasks.append((snapshot_dir, rows[start:start + chunk_size], odds_store, margin_method, params, calibrator))
+
+    workers = workers or os.cpu_count() or 1
+    print(f"🔁 Backtesting {int((~no_snapshot).sum())} fixtures in {len(tasks)} tasks on {workers} worker(s)")
+    records = []
+    if workers == 1:
+        for task in tasks:
+            records.extend(_backtest_fixtures(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_backtest_fixtures, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                records.extend(future.result())
+                if done % 20 == 0 or done == len(futures):
+                    print(f"   {done}/{len(futures)} tasks done")
+
+    predictions = pd.DataFrame(records)
+    if predictions.empty:
+        return predictions
+    odds_columns = [col for col in ODDS_1X2_COLUMNS if col in results.columns]
+    if odds_columns:
+        predictions = predictions.merge(
+            results[["league", "date", "home", "away"] + odds_columns], on=["league", "date", "home", "away"], how="left"
+        )
+    return predictions.sort_values(["league", "date", "home", "away"], kind="stable").reset_index(drop=True)
+
+
+def _probability_scores(P, outcome):
+    """Per-fixture log-loss, Brier score and ranked probability score for 1X2 probabilities"""
+    P = P / P.sum(axis=1, keepdims=True)
+    observed = np.eye(3)[outcome]
+    log_loss = -np.log(np.clip(P[np.arange(len(P)), outcome], 1e-15, 1.0))
+    brier = ((P - observed) ** 2).sum(axis=1)
+    # Outcomes are ordered home, draw, away, so the cumulative distributions compare
+    rps = ((np.cumsum(P, axis=1) - np.cumsum(observed, axis=1))[:, :2] ** 2).sum(axis=1) / 2
+    return log_loss, brier, rps
+
+
+def score_predictions(predictions, by=("league", "season"), margin_method=MARGIN_METHOD):
+    """Log-loss, Brier score, RPS, accuracy and value-bet ROI per group plus an overall row.
+
+    When closing 1X2 odds are present the same scores are given for the
+    margin-free market probabilities as a benchmark.
+    """
+    scored = predictions[predictions["status"] == "ok"].copy()
+    if scored.empty:
+        return pd.DataFrame()
+    outcome = np.select([scored["home_goals"] > scored["away_goals"], scored["home_goals"] == scored["away_goals"]], [0, 1], 2)
+    P = scored[["p_home", "p_draw", "p_away"]].to_numpy(dtype=float)
+    scored["log_loss"], scored["brier"], scored["rps"] = _probability_scores(P, outcome)
+    scored["hit"] = P.argmax(axis=1) == outcome
+
+    columns = {
+        "fixtures": ("log_loss", "size"),
+        "log_loss": ("log_loss", "mean"),
+        "brier": ("brier", "mean"),
+        "rps": ("rps", "mean"),
+        "accuracy": ("hit", "mean"),
+        "bets": ("bets", "sum"),
+        "profit": ("profit", "sum"),
+    }
+
+    if all(col in scored.columns for col in ODDS_1X2_COLUMNS):
+        odds = scored[ODDS_1X2_COLUMNS].to_numpy(dtype=float)
+        priced = np.isfinite(odds).all(axis=1) & (odds > 1).all(axis=1)
+        market = np.full(odds.shape, np.nan)
+        if priced.any():
+            group = np.repeat(np.arange(priced.sum()), 3)
+            market[priced] = devig_probabilities(odds[priced].ravel(), group, method=margin_method or "proportional").reshape(-1, 3)
+            scores = _probability_scores(market[priced], outcome[priced])
+            for name, values in zip(["market_log_loss", "market_brier", "market_rps"], scores):
+                scored[name] = np.nan
+                scored.loc[priced, name] = values
+                columns[name] = (name, "mean")
+
+    summary = scored.groupby(list(by)).agg(**columns).reset_index()
+    overall_row = {key: scored[source].agg(how) for key, (source, how) in columns.items()}
+    overall_row.update({col: "ALL" for col in by})
+    summary = pd.concat([summary, pd.DataFrame([overall_row])], ignore_index=True)
+    summary["roi"] = summary["profit"] / summary["bets"].where(summary["bets"] > 0)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Point-in-time backtest of the football predictor")
+    parser.add_argument("--results", required=True, help="CSV of historical results (date, home, away, home_goals, away_goals)")
+    parser.add_argument("--snapshots", required=True, help="Folder of dated data snapshots: <league>/<YYYY-MM-DD>/")
+    parser.add_argument("--league", help="League name for a results file without a league column")
+    parser.add_argument("--odds-store", help="Odds store to price value bets with (latest quotes before kick-off)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--margin-method", default=MARGIN_METHOD, choices=list(MARGIN_METHODS) + ["raw"],
+                        help="Margin removal for value bets and the market benchmark ('raw' keeps 1 / odds for value bets)")
+    parser.add_argument("--params", help="JSON of predictor parameters to test (from param_search.py; default: DEFAULT_PARAMS)")
+    parser.add_argument("--calibration", help="Calibration tables to apply (from calibration.py)")
+    parser.add_argument("--elo", action="store_true",
+                        help="Feed the predictor Elo gaps rated from the earlier results in the file")
+    parser.add_argument("--out", help="Write per-fixture predictions to this CSV")
+    parser.add_argument("--summary", help="Write the per-league/season scores to this CSV")
+    args = parser.parse_args(argv)
+    margin_method = None if args.margin_method == "raw" else args.margin_method
+
+    try:
+        results = read_results(args.results, league=args.league)
+        params = load_predictor_params(args.params) if args.params else None
+        calibrator = Calibrator.load(args.calibration) if args.calibration else None
+        predictions = run_backtest(results, args.snapshots, odds_store=args.odds_store,
+                                   workers=args.workers, margin_method=margin_method, params=params,
+                                   calibrator=calibrator, elo=args.elo)
+    except Exception as e:
+        print("❌ Backtest failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    if predictions.empty:
+        print("⚠️ No fixtures could be backtested")
+        return
+    status = predictions["status"].value_counts()
+    print(f"✅ Priced {int(status.get('ok', 0))} of {len(predictions)} fixtures")
+    for reason, count in status.drop("ok", errors="ignore").items():
+        print(f"   ⚠️ {count} fixtures: {reason}")
+
+    summary = score_predictions(predictions, margin_method=margin_method)
+    print("\n--- 📏 BACKTEST SCORES ---")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.out:
+        predictions.to_csv(args.out, index=False)
+        print(f"✅ Predictions written to {args.out}")
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+        print(f"✅ Summary written to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from portfolio_kelly import bet_probability
+
+# kelly: fractional Kelly of the current bankroll (as calculate_kelly_criterion)
+# proportional: fixed fraction of the current bankroll
+# flat: fixed amount, as a fraction of the starting bankroll
+STAKE_RULES = ("kelly", "proportional", "flat")
+
+
+def stake_fractions(probabilities, odds, rule="kelly", bankroll_fraction=0.25):
+    """Stake size per bet for a staking rule.
+
+    For kelly this is the fractional Kelly stake of calculate_kelly_criterion (zero
+    without an edge); for proportional and flat it is bankroll_fraction itself.
+    bankroll_fraction may be an array, giving one row of stakes per setting.
+    """
+    if rule not in STAKE_RULES:
+        raise ValueError(f"Unknown stake rule '{rule}'. Use one of {STAKE_RULES}")
+    p = np.asarray(probabilities, dtype=float)
+    o = np.asarray(odds, dtype=float)
+    fraction = np.asarray(bankroll_fraction, dtype=float)
+
+    if rule == "kelly":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            full_kelly = np.where(o > 1, (p * o - 1) / (o - 1), 0.0)
+        return np.clip(full_kelly * fraction, 0.0, 1.0)
+    return np.broadcast_to(fraction, np.broadcast_shapes(fraction.shape, p.shape)).astype(float)
+
+
+def simulate_bankroll_paths(probabilities, odds, rule="kelly", bankroll_fraction=0.25, n_paths=100_000,
+                            true_probabilities=None, ruin_level=0.1, seed=0, max_block=4_000_000):
+    """Simulate bankroll paths over a sequence of bets, all paths at once.
+
+    Bets are settled in order with outcomes drawn from true_probabilities (the model
+    probabilities by default, i.e. assuming the model is right). Pass several
+    bankroll_fraction values to simulate them side by side on the same outcomes.
+    A path whose bankroll falls to ruin_level (fraction of the start) stops betting;
+    flat stakes are not cut when the bankroll runs low, so it is floored at zero.
+
+    Returns a dict of arrays with shape (settings, paths): final_bankroll,
+    max_drawdown and ruined.
+    """
+    p = np.asarray(probabilities, dtype=float).ravel()
+    o = np.asarray(odds, dtype=float).ravel()
+    p_true = p if true_probabilities is None else np.asarray(true_probabilities, dtype=float).ravel()
+    fractions = np.atleast_1d(np.asarray(bankroll_fraction, dtype=float))
+    stakes = stake_fractions(p[None, :], o[None, :], rule, fractions[:, None])
+    compounding = rule != "flat"
+
+    # Compounding rules multiply the bankroll, so paths are tracked in log space and
+    # a block of bets becomes a cumulative sum; flat stakes add up directly
+    with np.errstate(divide="ignore"):
+        if compounding:
+            win_step = np.log1p(stakes * (o - 1.0))
+            lose_step = np.log1p(-stakes)
+            ruin_value = np.log(ruin_level) if ruin_level > 0 else -np.inf
+        else:
+            win_step = stakes * (o - 1.0)
+            lose_step = -stakes
+            ruin_value = ruin_level
+
+    n_settings = len(fractions)
+    rng = np.random.default_rng(seed)
+    level = np.full((n_settings, n_paths), 0.0 if compounding else 1.0)
+    peak = level.copy()
+    max_drawdown = np.zeros((n_settings, n_paths))
+    ruined = np.zeros((n_settings, n_paths), dtype=bool)
+
+    # Blocks are laid out (bet, setting, path) so each running sum is a contiguous row
+    block = max(1, max_block // (n_settings * n_paths))
+    for start in range(0, len(p), block):
+        end = min(start + block, len(p))
+        # One draw per bet and path, shared by every staking setting
+        wins = rng.random((end - start, 1, n_paths)) < p_true[start:end, None, None]
+        steps = np.where(wins, win_step.T[start:end, :, None], lose_step.T[start:end, :, None])
+        if ruined.any():
+            steps[:, ruined] = 0.0
+        path = np.cumsum(steps, axis=0)
+        path += level
+
+        # Freeze paths at the bet where they first reach the ruin level (only the
+        # few paths that get there need the extra work)
+        hit_setting, hit_path = np.nonzero(path.min(axis=0) <= ruin_value)
+        if len(hit_path):
+            sub = path[:, hit_setting, hit_path]
+            hit = sub <= ruin_value
+            sub = np.where(np.logical_or.accumulate(hit, axis=0), sub[np.argmax(hit, axis=0), np.arange(len(hit_path))], sub)
+            path[:, hit_setting, hit_path] = np.maximum(sub, 0.0) if not compounding else sub
+            ruined[hit_setting, hit_path] = True
+
+        running_peak = np.maximum.accumulate(path, axis=0)
+        np.maximum(running_peak, peak, out=running_peak)
+        if compounding:
+            # Drawdown in log space; converted to a fraction of the peak at the end
+            running_peak -= path
+            np.maximum(max_drawdown, running_peak.max(axis=0), out=max_drawdown)
+            peak = path[-1] + running_peak[-1]
+        else:
+            np.maximum(max_drawdown, (1.0 - path / running_peak).max(axis=0), out=max_drawdown)
+            peak = running_peak[-1]
+        level = path[-1]
+
+    if compounding:
+        max_drawdown = -np.expm1(-max_drawdown)
+    final_bankroll = np.exp(level) if compounding else level
+    return {"final_bankroll": final_bankroll, "max_drawdown": max_drawdown, "ruined": ruined}
+
+
+def summarize_paths(final_bankroll, max_drawdown, ruined, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """Distribution summary of one set of simulated paths"""
+    summary = {
+        "mean_final": float(final_bankroll.mean()),
+        "p_profit": float((final_bankroll > 1.0).mean()),
+        "risk_of_ruin": float(ruined.mean()),
+        "median_max_drawdown": float(np.median(max_drawdown)),
+        "p95_max_drawdown": float(np.quantile(max_drawdown, 0.95)),
+    }
+    for q, value in zip(quantiles, np.quantile(final_bankroll, quantiles)):
+        summary[f"final_p{int(round(q * 100))}"] = float(value)
+    return summary
+
+
+def compare_bankroll_fractions(probabilities, odds, fractions=(0.1, 0.25, 0.5, 1.0), rule="kelly", **kwargs):
+    """Summary table (one row per bankroll_fraction) from a single simulation pass"""
+    fractions = list(fractions)
+    paths = simulate_bankroll_paths(probabilities, odds, rule=rule, bankroll_fraction=fractions, **kwargs)
+    rows = []
+    for k, fraction in enumerate(fractions):
+        row = {"rule": rule, "bankroll_fraction": fraction}
+        row.update(summarize_paths(paths["final_bankroll"][k], paths["max_drawdown"][k], paths["ruined"][k]))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def simulate_value_bets(value_bets, fractions=(0.1, 0.25, 0.5, 1.0), rule="kelly", **kwargs):
+    """compare_bankroll_fractions for a list of value bet dicts from the predictor"""
+    probabilities = [bet_probability(bet) for bet in value_bets]
+    odds = [float(bet["odds"]) for bet in value_bets]
+    return compare_bankroll_fractions(probabilities, odds, fractions=fractions, rule=rule, **kwargs)
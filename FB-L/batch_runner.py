@@ -0,0 +1,279 @@
+import os, sys
+import csv
+import argparse
+import contextlib
+from itertools import permutations
+import pandas as pd
+from main import (
+    LEAGUE_NAME,
+    CACHE_FILE,
+    MARGIN_METHOD,
+    PARAMS_FILE,
+    CALIBRATION_FILE,
+    ELO_FILE,
+    PROFILE_DIR,
+    default_odds_sources,
+    elo_difference,
+    find_team_match,
+    fixture_inputs,
+    fixture_odds,
+    league_fingerprint_files,
+    load_feature_store,
+    load_league_data,
+    load_odds_book,
+    load_predictor_params,
+    load_calibrator,
+    load_elo_ratings,
+    odds_cache_sources
+)
+from match_predictor import get_betting_suggestions_and_markets
+from prediction_cache import PredictionCache
+import stage_timer
+from stage_timer import stage
+from profiling import start_profiling
+from prediction_stream import PredictionStreamWriter
+from portfolio_kelly import slate_portfolio_kelly
+from bankroll_simulator import simulate_value_bets
+from devig import MARGIN_METHODS
+from player_props import player_shares, price_player_props, player_probability_table
+from value_scanner import model_probability_table, scan_value_bets, calculate_overround, find_arbitrage
+
+
+def read_fixtures(filepath):
+    """Read (home, away) pairs from a CSV with 'home'/'away' columns (or the first two columns)"""
+    fixtures = []
+    with open(filepath, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        if header is None:
+            return fixtures
+
+        lowered = [h.strip().lower() for h in header]
+        if "home" in lowered and "away" in lowered:
+            home_idx, away_idx = lowered.index("home"), lowered.index("away")
+        else:
+            # No header row - treat the first line as a fixture
+            home_idx, away_idx = 0, 1
+            if len(header) >= 2:
+                fixtures.append((header[0].strip(), header[1].strip()))
+
+        for row in reader:
+            if len(row) > max(home_idx, away_idx) and row[home_idx].strip():
+                fixtures.append((row[home_idx].strip(), row[away_idx].strip()))
+    return fixtures
+
+
+def price_fixture(home_team, away_team, team_df, player_df, corner_data, form_data, cache=None, odds_book=None,
+                  margin_method=MARGIN_METHOD, params=None, calibrator=None, feature_store=None, elo=None):
+    """Price one fixture, returning (suggestions, markets, confidence, value_bets, details) or None"""
+    inputs = fixture_inputs(home_team, away_team, team_df, player_df, feature_store)
+    if inputs is None:
+        return None
+
+    def compute():
+        odds_dict, fair_dict = fixture_odds(odds_book, home_team, away_team, margin_method)
+        return get_betting_suggestions_and_markets(
+            **inputs,
+            corner_data=corner_data,
+            form_data=form_data,
+            return_details=True,
+            odds_dict=odds_dict,
+            fair_dict=fair_dict,
+            margin_method=margin_method,
+            params=params,
+            calibrator=calibrator,
+            elo_diff=elo_difference(elo, home_team, away_team)
+        )
+
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(home_team, away_team, compute, params={"margin_method": margin_method, "params": params})
+
+
+def run_batch(fixtures, jsonl_path=None, use_cache=True, out=None, odds_files=None, value_scan_path=None, arbitrage_path=None, slate_kelly=False,
+              bankroll_sim=False, margin_method=MARGIN_METHOD, params_file=PARAMS_FILE,
+              calibration_file=CALIBRATION_FILE, player_props_path=None, elo_file=ELO_FILE):
+    """Price every fixture, streaming JSON lines as each one completes"""
+    out = out or sys.stdout
+    team_df, player_df, corner_data, form_data = load_league_data()
+    feature_store = load_feature_store(team_df, player_df, form_data)
+    params = load_predictor_params(params_file)
+    calibrator = load_calibrator(calibration_file)
+    elo = load_elo_ratings(elo_file)
+    odds_book = load_odds_book(odds_files)
+    if odds_files is None:
+        odds_files = default_odds_sources() if odds_book is not None else []
+    player_teams = set(player_df["Team"].dropna().unique())
+
+    if fixtures is None:
+        fixtures = list(permutations(sorted(player_teams), 2))
+
+    cache = None
+    if use_cache:
+        cache_sources = league_fingerprint_files() + [calibration_file, elo_file] + odds_cache_sources(odds_files)
+        cache = PredictionCache(LEAGUE_NAME, source_files=cache_sources, path=CACHE_FILE)
+    writer = None
+    if jsonl_path:
+        writer = PredictionStreamWriter(out if jsonl_path == "-" else jsonl_path)
+    priced = 0
+    skipped = []
+    model_probabilities = []
+    lambdas = []
+    slate = []
+
+    try:
+        for home_input, away_input in fixtures:
+            home_team = find_team_match(home_input, player_teams)
+            away_team = find_team_match(away_input, player_teams)
+            if not home_team or not away_team:
+                skipped.append((home_input, away_input))
+                continue
+
+            prediction = price_fixture(home_team, away_team, team_df, player_df, corner_data, form_data, cache, odds_book,
+                                       margin_method, params, calibrator, feature_store, elo)
+            if prediction is None:
+                skipped.append((home_input, away_input))
+                continue
+
+            priced += 1
+            model_probabilities.append((home_team, away_team, prediction[4]["probabilities"]))
+            features = prediction[4]["features"]
+            lambdas.append((home_team, away_team, features["lambda_home"], features["lambda_away"]))
+            slate.append((home_team, away_team, prediction[3][:3], prediction[4]["score_matrix"]))
+            if writer is not None:
+                writer.write_fixture(LEAGUE_NAME, home_team, away_team, prediction)
+            else:
+                markets = prediction[1]
+                print(f"{home_team} vs {away_team}: "
+                      f"H {markets['Home Win Probability']} | D {markets['Draw Probability']} | "
+                      f"A {markets['Away Win Probability']} | Goals {markets['Expected Total Goals']}",
+                      file=out, flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+        if cache is not None:
+            stats = cache.stats()
+            print(f"♻️ Prediction cache: {stats['hit_rate']:.0%} hit rate, "
+                  f"{stats['memory_entries']} in memory, {stats['disk_entries']} on disk")
+            cache.close()
+
+    print(f"✅ Priced {priced} fixtures, skipped {len(skipped)}")
+    for home_input, away_input in skipped:
+        print(f"   ⚠️ Could not price {home_input} vs {away_input}")
+
+    # Size every fixture's top value bets together as one simultaneous portfolio
+    if slate_kelly and any(bets for _, _, bets, _ in slate):
+        with stage("slate_kelly"):
+            stakes = slate_portfolio_kelly([(bets, score_matrix) for _, _, bets, score_matrix in slate])
+            print("\n--- 💼 SLATE KELLY STAKES (fraction of bankroll) ---")
+            for (home_team, away_team, bets, _), fixture_stakes in zip(slate, stakes):
+                for bet, stake in zip(bets, fixture_stakes):
+                    print(f"{home_team} vs {away_team}: {bet['outcome']} in {bet['market']} @ {bet['odds']} -> {stake:.2%}")
+            print(f"Total exposure: {sum(sum(fixture_stakes) for fixture_stakes in stakes):.2%}")
+
+    # Bankroll risk of staking every value bet of the slate in sequence
+    all_value_bets = [bet for _, _, bets, _ in slate for bet in bets]
+    if bankroll_sim and all_value_bets:
+        with stage("bankroll_simulation"):
+            simulation = simulate_value_bets(all_value_bets)
+            print(f"\n--- 🎲 BANKROLL SIMULATION ({len(all_value_bets)} bets, 100,000 paths) ---")
+            print(simulation.drop(columns="rule").to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    # Goalscorer and assist probabilities for every player of every priced fixture in one pass
+    player_table = None
+    if lambdas and (player_props_path or odds_book is not None):
+        with stage("player_props_table"):
+            fixture_lambdas = pd.DataFrame(lambdas, columns=["home", "away", "lambda_home", "lambda_away"])
+            player_table = price_player_props(player_shares(player_df), fixture_lambdas)
+            if player_props_path:
+                player_table.to_csv(player_props_path, index=False)
+                print(f"✅ Player props for {len(player_table)} player-fixtures written to {player_props_path}")
+
+    # Scan all priced fixtures against every bookmaker in one pass
+    if odds_book is not None and model_probabilities:
+        with stage("value_scan"):
+            # Fixture markets come calibrated from the predictor; the player rows are priced here
+            player_rows = player_probability_table(player_table)
+            if calibrator is not None:
+                player_rows = calibrator.calibrate_table(player_rows)
+            model_table = pd.concat([model_probability_table(model_probabilities), player_rows], ignore_index=True)
+            value_table = scan_value_bets(model_table, odds_book, margin_method=margin_method)
+            print(f"\n--- 🎯 VALUE BETS ACROSS {len(model_probabilities)} FIXTURES (Top 10 of {len(value_table)}) ---")
+            if not value_table.empty:
+                print(value_table.head(10).to_string(index=False))
+            if value_scan_path:
+                value_table.to_csv(value_scan_path, index=False)
+                print(f"✅ Value bet table written to {value_scan_path}")
+
+    # Bookmaker margins and cross-book surebets over the whole snapshot
+    if odds_book is not None and len(odds_book):
+        with stage("overround_and_arbitrage"):
+            overround = calculate_overround(odds_book)
+            if not overround.empty:
+                print("\n--- 📊 AVERAGE OVERROUND BY BOOKMAKER ---")
+                print(overround[overround["exhaustive"]].groupby("bookmaker", observed=True)["overround"].mean()
+                      .sort_values().map(lambda v: f"{v:.2%}").to_string())
+            arbitrage = find_arbitrage(odds_book)
+            markets_affected = arbitrage.groupby(["fixture", "market"]).ngroups if not arbitrage.empty else 0
+            print(f"\n--- 💰 ARBITRAGE: {markets_affected} market(s) with total implied probability under 1 ---")
+            if not arbitrage.empty:
+                print(arbitrage.head(15).to_string(index=False))
+            if arbitrage_path:
+                arbitrage.to_csv(arbitrage_path, index=False)
+                print(f"✅ Arbitrage legs written to {arbitrage_path}")
+    return priced, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Batch pricing for {LEAGUE_NAME} fixtures")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fixtures", help="CSV file of fixtures with home/away columns")
+    source.add_argument("--all-pairs", action="store_true", help="Price every home/away pairing in the player data")
+    parser.add_argument("--jsonl", help="Stream one JSON line per fixture to this file ('-' for stdout)")
+    parser.add_argument("--odds", nargs="+", help="Odds snapshot file(s) with per-fixture prices, or an odds store directory")
+    parser.add_argument("--value-scan", help="Write the value bets of every priced fixture (best price per book) to this CSV")
+    parser.add_argument("--arbitrage", help="Write cross-book arbitrage legs found in the odds snapshot to this CSV")
+    parser.add_argument("--player-props", help="Write goalscorer and assist probabilities of every player in every fixture to this CSV")
+    parser.add_argument("--slate-kelly", action="store_true", help="Size the top value bets of all fixtures jointly")
+    parser.add_argument("--bankroll-sim", action="store_true", help="Simulate bankroll paths over the slate's value bets for several Kelly fractions")
+    parser.add_argument("--margin-method", default=MARGIN_METHOD, choices=list(MARGIN_METHODS) + ["raw"],
+                        help="How to remove the bookmaker margin before measuring value ('raw' keeps 1/odds)")
+    parser.add_argument("--params", default=PARAMS_FILE, help="JSON of tuned predictor parameters (from param_search.py)")
+    parser.add_argument("--calibration", default=CALIBRATION_FILE, help="Probability calibration tables (from calibration.py)")
+    parser.add_argument("--elo", default=ELO_FILE, help="Elo ratings file (from elo_engine.py)")
+    parser.add_argument("--no-cache", action="store_true", help="Always recompute predictions")
+    parser.add_argument("--timings", nargs="?", const="-", metavar="PATH",
+                        help="Time each pipeline stage; print the table at exit or write it to PATH (.json or .csv)")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, metavar="DIR",
+                        help="Profile each pipeline stage (cProfile and tracemalloc) into a timestamped directory under DIR")
+    parser.add_argument("--quiet", action="store_true", help="Silence the loaders' and predictor's progress output")
+    args = parser.parse_args(argv)
+
+    fixtures = read_fixtures(args.fixtures) if args.fixtures else None
+    if args.timings:
+        stage_timer.enable(None if args.timings == "-" else args.timings)
+    if args.profile:
+        start_profiling(args.profile, "batch")
+
+    # Keep stdout clean for results; engine progress goes to stderr (or nowhere)
+    results_stream = sys.stdout
+    log_stream = open(os.devnull, "w") if args.quiet else sys.stderr
+    try:
+        with contextlib.redirect_stdout(log_stream):
+            run_batch(fixtures, jsonl_path=args.jsonl, use_cache=not args.no_cache, out=results_stream,
+                      odds_files=args.odds, value_scan_path=args.value_scan,
+                      arbitrage_path=args.arbitrage, slate_kelly=args.slate_kelly,
+                      bankroll_sim=args.bankroll_sim,
+                      margin_method=None if args.margin_method == "raw" else args.margin_method,
+                      params_file=args.params, calibration_file=args.calibration,
+                      player_props_path=args.player_props, elo_file=args.elo)
+    except Exception as e:
+        print("❌ Batch run failed:", e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.quiet:
+            log_stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import os, sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from time import perf_counter
+from itertools import permutations
+import numpy as np
+import pandas as pd
+from main import (
+    BASE_DIR,
+    LEAGUE_NAME,
+    RULES_FILE,
+    league_source_files,
+    get_fixture_inputs,
+)
+from team_data_collector import load_team_data
+from player_data_collector import load_player_data, classify_player_role, calculate_role_based_score
+from league_rules import load_league_rules
+from sheet_io import read_sheet, write_sheet
+from match_predictor import get_betting_suggestions_and_markets, load_corner_data, load_form_data
+from odds_ingestion import load_odds_snapshots
+from value_scanner import model_probability_table, scan_value_bets
+
+# Stored results that later runs are compared against (written with --save-baseline)
+BASELINE_FILE = os.path.join(BASE_DIR, "benchmark_baseline.json")
+# Data scales: each league sheet is tiled this many times (copies get suffixed team names)
+SCALES = (1, 4)
+# A median this much slower than the baseline counts as a regression
+REGRESSION_THRESHOLD = 0.10
+# Fixtures priced by the all-pairs scenario per unit of scale (a full 20-team season)
+FIXTURES_PER_SCALE = 380
+BOOKMAKERS = ("Book A", "Book B", "Book C", "Book D", "Book E")
+BOOK_MARGIN = 0.05
+
+
+def _team_column(df):
+    return next(column for column in df.columns if any(key in str(column).lower() for key in ("squad", "team", "club")))
+
+
+def scale_sheet(df, scale):
+    """Sheet tiled scale times; the copies' team names get a " 2", " 3", ... suffix"""
+    if scale == 1:
+        return df
+    team_column = _team_column(df)
+    copies = []
+    for copy in range(scale):
+        part = df.copy()
+        if copy:
+            part[team_column] = part[team_column].astype(str).str.strip() + f" {copy + 1}"
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def write_scaled_league(data_dir, scale, out_dir):
+    """Team, player, corner and form files of the league scaled up, written to out_dir"""
+    paths = []
+    for source in league_source_files(data_dir):
+        target = os.path.join(out_dir, os.path.basename(source))
+        if scale == 1:
+            shutil.copyfile(source, target)
+        else:
+            write_sheet(scale_sheet(read_sheet(source, 0), scale), target)
+        paths.append(target)
+    return paths
+
+
+def synthetic_odds(predictions, filepath, seed=0):
+    """Odds snapshot of every priced selection at several books: margin-loaded fair prices with noise"""
+    rng = np.random.default_rng(seed)
+    table = model_probability_table(predictions)
+    table = table[table["probability"] > 0.01]
+    fixtures = table["fixture"].str.split(" vs ", n=1, expand=True)
+    rows = []
+    for bookmaker in BOOKMAKERS:
+        noise = np.exp(rng.normal(0, 0.04, len(table)))
+        rows.append(pd.DataFrame({
+            "home": fixtures[0].to_numpy(),
+            "away": fixtures[1].to_numpy(),
+            "bookmaker": bookmaker,
+            "market": table["market"].to_numpy(),
+            "outcome": table["outcome"].to_numpy(),
+            "timestamp": "2025-01-01T12:00:00Z",
+            "price": np.maximum(noise / (table["probability"].to_numpy() * (1 + BOOK_MARGIN)), 1.01).round(2),
+        }))
+    pd.concat(rows, ignore_index=True).to_csv(filepath, index=False)
+    return filepath
+
+
+class BenchmarkContext:
+    """Data of one scale, loaded once and shared by the scenarios"""
+
+    def __init__(self, data_dir, scale, work_dir):
+        self.scale = scale
+        self.work_dir = work_dir
+        self.team_file, self.player_file, self.corner_file, self.form_file = write_scaled_league(data_dir, scale, work_dir)
+        self.rules = load_league_rules(RULES_FILE)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            self.team_df = load_team_data(self.team_file, LEAGUE_NAME, self.rules)
+            self.player_df = load_player_data(self.player_file)
+            self.corner_data = load_corner_data(self.corner_file)
+            self.form_data = load_form_data(self.form_file)
+
+        teams = sorted(self.player_df["Team"].dropna().unique())
+        pairings = list(permutations(teams, 2))
+        count = min(len(pairings), FIXTURES_PER_SCALE * scale)
+        self.fixtures = [pairings[i] for i in np.linspace(0, len(pairings) - 1, count).astype(int)]
+        self.inputs = {}
+        self.predictions = None
+        self._odds_book = None
+
+    def fixture_inputs(self, home_team, away_team):
+        key = (home_team, away_team)
+        if key not in self.inputs:
+            self.inputs[key] = get_fixture_inputs(home_team, away_team, self.team_df, self.player_df)
+        return self.inputs[key]
+
+    def predict(self, home_team, away_team):
+        inputs = self.fixture_inputs(home_team, away_team)
+        if inputs is None:
+            return None
+        return get_betting_suggestions_and_markets(**inputs, corner_data=self.corner_data, form_data=self.form_data,
+                                                   return_details=True)
+
+    def price_all(self):
+        predictions = []
+        for home_team, away_team in self.fixtures:
+            prediction = self.predict(home_team, away_team)
+            if prediction is not None:
+                predictions.append((home_team, away_team, prediction[4]["probabilities"]))
+        self.predictions = predictions
+        return predictions
+
+    def odds_book(self):
+        if self._odds_book is None:
+            if self.predictions is None:
+                self.price_all()
+            path = synthetic_odds(self.predictions, os.path.join(self.work_dir, "odds_snapshot.csv"), seed=self.scale)
+            self._odds_book = load_odds_snapshots(path)
+        return self._odds_book
+
+
+# Each scenario runs once per repeat and returns the number of items it processed
+def bench_load_players(ctx):
+    return len(load_player_data(ctx.player_file))
+
+
+def bench_load_teams(ctx):
+    return len(load_team_data(ctx.team_file, LEAGUE_NAME, ctx.rules))
+
+
+def bench_role_scoring(ctx):
+    roles = ctx.player_df["Role"].apply(classify_player_role)
+    ctx.player_df.assign(Role_Category=roles).apply(lambda row: calculate_role_based_score(row, row["Role_Category"]), axis=1)
+    return len(ctx.player_df)
+
+
+def bench_predict_fixture(ctx):
+    ctx.predict(*ctx.fixtures[0])
+    return 1
+
+
+def bench_all_pairs(ctx):
+    return len(ctx.price_all())
+
+
+def bench_value_scan(ctx):
+    if ctx.predictions is None:
+        ctx.price_all()
+    model_table = model_probability_table(ctx.predictions)
+    scan_value_bets(model_table, ctx.odds_book())
+    return len(model_table)
+
+
+# name: (function, default repeats)
+SCENARIOS = {
+    "load_players": (bench_load_players, 5),
+    "load_teams": (bench_load_teams, 5),
+    "role_scoring": (bench_role_scoring, 5),
+    "predict_fixture": (bench_predict_fixture, 30),
+    "all_pairs": (bench_all_pairs, 3),
+    "value_scan": (bench_value_scan, 5),
+}
+
+
+def time_scenario(func, ctx, repeats, warmup=1):
+    """Seconds per repeat (after warmup runs) and the items of the last run"""
+    items = 0
+    times = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            items = func(ctx)
+        for _ in range(repeats):
+            start = perf_counter()
+            items = func(ctx)
+            times.append(perf_counter() - start)
+    return np.array(times), items
+
+
+def machine_info():
+    info = {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                                        text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        info["commit"] = None
+    return info
+
+
+def run_benchmarks(data_dir=None, scales=SCALES, scenarios=None, repeats=None):
+    """Run the scenarios at every scale; returns the results document (machine info and one row per run)"""
+    scenarios = scenarios or list(SCENARIOS)
+    rows = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix="fbl_bench_") as work_dir:
+            print(f"📂 Preparing scale {scale} data...")
+            ctx = BenchmarkContext(data_dir, scale, work_dir)
+            for name in scenarios:
+                func, default_repeats = SCENARIOS[name]
+                times, items = time_scenario(func, ctx, repeats or default_repeats)
+                row = {
+                    "scenario": name,
+                    "scale": scale,
+                    "items": items,
+                    "repeats": len(times),
+                    "min_s": times.min(),
+                    "median_s": float(np.median(times)),
+                    "mean_s": times.mean(),
+                    "stdev_s": times.std(ddof=1) if len(times) > 1 else 0.0,
+                }
+                row["items_per_s"] = items / row["median_s"] if row["median_s"] > 0 else None
+                rows.append(row)
+                print(f"⏱️ {name} @ x{scale}: median {row['median_s'] * 1000:.1f} ms over {len(times)} runs ({items} items)")
+    return {"created": pd.Timestamp.now(tz="UTC").isoformat(), "machine": machine_info(), "results": rows}
+
+
+def compare_to_baseline(document, baseline, threshold=REGRESSION_THRESHOLD):
+    """Median time of each (scenario, scale) against the baseline's, with a status per row"""
+    current = pd.DataFrame(document["results"])[["scenario", "scale", "median_s"]]
+    previous = pd.DataFrame(baseline["results"])[["scenario", "scale", "median_s"]]
+    table = current.merge(previous, on=["scenario", "scale"], how="left", suffixes=("", "_baseline"))
+    table["change"] = table["median_s"] / table["median_s_baseline"] - 1
+    table["status"] = np.select(
+        [table["median_s_baseline"].isna(), table["change"] > threshold, table["change"] < -threshold],
+        ["new", "REGRESSION", "faster"],
+        "ok",
+    )
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the loaders, predictor and value-bet scanner at several data scales")
+    parser.add_argument("--data-dir", help="Folder with the league's team, player, corner and form files (default: live data)")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES), help="Data scales to run")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--repeats", type=int, help="Timed runs per scenario (default: per scenario)")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown of the median counted as a regression")
+    args = parser.parse_args(argv)
+
+    try:
+        document = run_benchmarks(args.data_dir, args.scales, args.scenarios, args.repeats)
+    except Exception as e:
+        print("❌ Benchmark failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    results = pd.DataFrame(document["results"])
+    print("\n--- ⏱️ BENCHMARK RESULTS ---")
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=1)
+        print(f"✅ Results written to {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=1)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline}; run with --save-baseline to store one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparison = compare_to_baseline(document, baseline, args.threshold)
+    if baseline.get("machine", {}).get("platform") != document["machine"]["platform"]:
+        print(f"⚠️ Baseline was recorded on {baseline.get('machine', {}).get('platform')}; timings may not be comparable")
+    print(f"\n--- 📊 AGAINST BASELINE ({baseline['machine'].get('commit') or baseline.get('created')}) ---")
+    print(comparison.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    regressions = comparison[comparison["status"] == "REGRESSION"]
+    if not regressions.empty:
+        print(f"❌ {len(regressions)} scenario(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
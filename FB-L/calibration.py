@@ -0,0 +1,270 @@
+import os, sys
+import re
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from portfolio_kelly import settle_outcomes
+
+CALIBRATION_METHODS = ("isotonic", "platt", "beta")
+# Backtest columns holding the model probability of one selection: "p:<market>|<outcome>"
+PROBABILITY_PREFIX = "p:"
+# Markets whose outcomes partition the result, renormalised after calibration
+EXCLUSIVE_MARKETS = ("1X2", "Over/Under 2.5", "Both Teams to Score", "Draw No Bet")
+# Points of the lookup table for the parametric (Platt, beta) maps
+TABLE_POINTS = 201
+# Calibrated probabilities stay this far from 0 and 1 (isotonic end blocks are often pure)
+PROBABILITY_FLOOR = 0.01
+
+_CORNER_OUTCOME = re.compile(r"^(?:(Home|Away) )?(Over|Under) (\d+(?:\.\d+)?)$")
+
+
+def probability_column(market, outcome):
+    return f"{PROBABILITY_PREFIX}{market}|{outcome}"
+
+
+def _settle_corners(market, outcome, home_corners, away_corners):
+    """Win (1), push (0) or loss (-1) of a corner selection, or None for other markets"""
+    if market not in ("Total Corners", "Team Corners"):
+        return None
+    match = _CORNER_OUTCOME.match(outcome)
+    if not match:
+        return None
+    side, direction, line = match.group(1), match.group(2), float(match.group(3))
+    count = home_corners if side == "Home" else away_corners if side == "Away" else home_corners + away_corners
+    over = np.where(count > line, 1, np.where(count == line, 0, -1))
+    return over if direction == "Over" else -over
+
+
+def calibration_samples(predictions):
+    """(market, outcome, probability, won) rows from backtest predictions.
+
+    Selections settle on the final score; corner selections also need home_corners
+    and away_corners columns. Pushes and unsettled selections are left out.
+    """
+    scored = predictions[predictions["status"] == "ok"] if "status" in predictions.columns else predictions
+    has_corners = {"home_corners", "away_corners"} <= set(scored.columns)
+    frames = []
+    for column in scored.columns:
+        if not column.startswith(PROBABILITY_PREFIX):
+            continue
+        market, outcome = column[len(PROBABILITY_PREFIX):].split("|", 1)
+        result = settle_outcomes(market, outcome, scored["home_goals"].to_numpy(), scored["away_goals"].to_numpy())
+        if result is None and has_corners:
+            corners = scored[["home_corners", "away_corners"]].to_numpy(dtype=float)
+            with np.errstate(invalid="ignore"):
+                result = _settle_corners(market, outcome, corners[:, 0], corners[:, 1])
+            if result is not None:
+                result = np.where(np.isnan(corners).any(axis=1), 0, result)
+        if result is None:
+            continue
+        probability = scored[column].to_numpy(dtype=float)
+        keep = (result != 0) & np.isfinite(probability)
+        frames.append(pd.DataFrame({
+            "market": market,
+            "outcome": outcome,
+            "probability": probability[keep],
+            "won": (result[keep] > 0).astype(int),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["market", "outcome", "probability", "won"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def fit_isotonic(probability, won):
+    """Pool-adjacent-violators fit; returns the (x, y) knots of the increasing map"""
+    # Tied probabilities form one starting block, so the knots are strictly increasing
+    x, inverse, tie_counts = np.unique(np.asarray(probability, dtype=float), return_inverse=True, return_counts=True)
+    tie_sums = np.bincount(inverse, weights=np.asarray(won, dtype=float), minlength=len(x))
+
+    # Blocks as (sum of y, count, sum of x); merge backwards while they decrease
+    sums, counts, xs = [], [], []
+    for xi, si, ci in zip(x, tie_sums, tie_counts):
+        sums.append(si)
+        counts.append(float(ci))
+        xs.append(xi * ci)
+        while len(sums) > 1 and sums[-2] / counts[-2] >= sums[-1] / counts[-1]:
+            s, c, sx = sums.pop(), counts.pop(), xs.pop()
+            sums[-1] += s
+            counts[-1] += c
+            xs[-1] += sx
+    counts = np.array(counts)
+    return np.array(xs) / counts, np.array(sums) / counts
+
+
+def fit_logistic(probability, won, method="platt", iterations=50):
+    """Platt (logit p) or beta (log p, log(1 - p)) logistic fit, tabulated on a fixed grid"""
+    p = np.clip(np.asarray(probability, dtype=float), 1e-6, 1 - 1e-6)
+    y = np.asarray(won, dtype=float)
+
+    def design(q):
+        if method == "platt":
+            return np.column_stack([np.log(q / (1 - q)), np.ones_like(q)])
+        return np.column_stack([np.log(q), -np.log(1 - q), np.ones_like(q)])
+
+    X = design(p)
+    coef = np.zeros(X.shape[1])
+    coef[:-1] = 1.0
+    for _ in range(iterations):
+        fitted = 1 / (1 + np.exp(-X @ coef))
+        gradient = X.T @ (y - fitted)
+        hessian = (X * (fitted * (1 - fitted))[:, None]).T @ X + 1e-9 * np.eye(len(coef))
+        step = np.linalg.solve(hessian, gradient)
+        coef += step
+        if np.max(np.abs(step)) < 1e-10:
+            break
+
+    grid = np.linspace(1e-6, 1 - 1e-6, TABLE_POINTS)
+    return grid, 1 / (1 + np.exp(-design(grid) @ coef))
+
+
+class Calibrator:
+    """Probability maps per market family, stored as (x, y) lookup tables.
+
+    Applying a map is a single np.interp over all probabilities of a market, so
+    calibrating a fixture or a whole batch table costs next to nothing.
+    """
+
+    def __init__(self, tables=None, method=None):
+        self.tables = {market: (np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+                       for market, (x, y) in (tables or {}).items()}
+        self.method = method
+
+    def __contains__(self, market):
+        return market in self.tables
+
+    def apply(self, market, probabilities):
+        """Calibrated probabilities for one market (unchanged if it has no map)"""
+        probabilities = np.asarray(probabilities, dtype=float)
+        if market not in self.tables:
+            return probabilities
+        x, y = self.tables[market]
+        return np.interp(probabilities, x, y)
+
+    def calibrate_probabilities(self, probabilities):
+        """Calibrated copy of the predictor's nested {market: {outcome: p}} dict"""
+        calibrated = {}
+        for market, outcomes in probabilities.items():
+            if market not in self.tables:
+                calibrated[market] = dict(outcomes)
+                continue
+            values = self.apply(market, list(outcomes.values()))
+            if market in EXCLUSIVE_MARKETS and values.sum() > 0:
+                values = values / values.sum()
+            calibrated[market] = dict(zip(outcomes.keys(), values.tolist()))
+        return calibrated
+
+    def calibrate_table(self, model_table):
+        """Calibrated copy of a long (fixture, market, outcome, probability) table"""
+        table = model_table.copy()
+        probability = table["probability"].to_numpy(dtype=float).copy()
+        for market, rows in table.groupby("market", sort=False).indices.items():
+            if market in self.tables:
+                probability[rows] = self.apply(market, probability[rows])
+        table["probability"] = probability
+
+        exclusive = table["market"].isin([market for market in EXCLUSIVE_MARKETS if market in self.tables]).to_numpy()
+        if exclusive.any():
+            totals = table[exclusive].groupby(["fixture", "market"])["probability"].transform("sum").to_numpy()
+            probability[exclusive] = np.where(totals > 0, probability[exclusive] / totals, probability[exclusive])
+            table["probability"] = probability
+        return table
+
+    def save(self, filepath):
+        payload = {
+            "method": self.method,
+            "tables": {market: {"x": x.tolist(), "y": y.tolist()} for market, (x, y) in self.tables.items()},
+        }
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath) as f:
+            payload = json.load(f)
+        tables = {market: (table["x"], table["y"]) for market, table in payload["tables"].items()}
+        return cls(tables, method=payload.get("method"))
+
+
+def fit_calibrator(samples, method="isotonic", min_samples=100):
+    """One map per market family from calibration_samples output.
+
+    Markets with fewer than min_samples settled selections keep their raw probabilities.
+    """
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"Unknown calibration method '{method}'. Use one of {CALIBRATION_METHODS}")
+    tables = {}
+    for market, rows in samples.groupby("market", sort=True):
+        if len(rows) < min_samples:
+            continue
+        probability, won = rows["probability"].to_numpy(dtype=float), rows["won"].to_numpy(dtype=float)
+        if method == "isotonic":
+            x, y = fit_isotonic(probability, won)
+        else:
+            x, y = fit_logistic(probability, won, method)
+        tables[market] = (x, np.clip(y, PROBABILITY_FLOOR, 1 - PROBABILITY_FLOOR))
+    return Calibrator(tables, method=method)
+
+
+def calibration_report(samples, calibrator):
+    """Brier score and log-loss per market before and after calibration"""
+    calibrated = samples["probability"].to_numpy(dtype=float).copy()
+    for market, rows in samples.groupby("market", sort=False).indices.items():
+        calibrated[rows] = calibrator.apply(market, calibrated[rows])
+    frame = samples.assign(calibrated=calibrated)
+
+    def scores(p, won):
+        p = np.clip(p, 1e-15, 1 - 1e-15)
+        return np.mean((p - won) ** 2), -np.mean(won * np.log(p) + (1 - won) * np.log(1 - p))
+
+    rows = []
+    for market, group in frame.groupby("market", sort=True):
+        won = group["won"].to_numpy(dtype=float)
+        brier, log_loss = scores(group["probability"].to_numpy(), won)
+        cal_brier, cal_log_loss = scores(group["calibrated"].to_numpy(), won)
+        rows.append({
+            "market": market,
+            "samples": len(group),
+            "calibrated": market in calibrator,
+            "brier": brier,
+            "calibrated_brier": cal_brier,
+            "log_loss": log_loss,
+            "calibrated_log_loss": cal_log_loss,
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit probability calibration maps from backtest predictions")
+    parser.add_argument("--predictions", required=True, help="Per-fixture predictions CSV written by backtester.py --out")
+    parser.add_argument("--method", default="isotonic", choices=CALIBRATION_METHODS)
+    parser.add_argument("--min-samples", type=int, default=100, help="Settled selections needed to fit a market")
+    parser.add_argument("--holdout", type=float, default=0.0,
+                        help="Fraction of the latest fixtures kept out of the fit and used for the report")
+    parser.add_argument("--out", help="Write the calibration tables to this JSON file (e.g. calibration.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        predictions = pd.read_csv(args.predictions)
+        predictions = predictions.sort_values("date", kind="stable").reset_index(drop=True)
+        split = int(round(len(predictions) * (1 - args.holdout)))
+        fit_samples = calibration_samples(predictions.iloc[:split])
+        test_samples = calibration_samples(predictions.iloc[split:]) if args.holdout > 0 else fit_samples
+        calibrator = fit_calibrator(fit_samples, method=args.method, min_samples=args.min_samples)
+    except Exception as e:
+        print("❌ Calibration failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    label = "held-out" if args.holdout > 0 else "in-sample"
+    print(f"\n--- 🎚️ CALIBRATION ({args.method}, {len(calibrator.tables)} markets, {label} scores) ---")
+    print(calibration_report(test_samples, calibrator).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.out:
+        calibrator.save(args.out)
+        print(f"✅ Calibration tables written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
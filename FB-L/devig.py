@@ -0,0 +1,118 @@
+import numpy as np
+
+# Ways to turn bookmaker prices into margin-free (fair) probabilities
+MARGIN_METHODS = ("proportional", "power", "shin", "odds_ratio")
+
+
+def _group_sum(values, group, n_groups):
+    return np.bincount(group, weights=values, minlength=n_groups)
+
+
+def _solve_groups(probability, parameter, lower, upper, group, units, iterations=60, tol=1e-12):
+    """Find one parameter per group so that the group's probabilities sum to units.
+
+    probability(x) returns the per-row probabilities and their derivative for the
+    per-row parameter x; each group's sum must be decreasing in its parameter. All
+    groups take a Newton step together, falling back to bisection inside the
+    group's bracket whenever a step would leave it.
+    """
+    n_groups = len(units)
+    x = parameter.copy()
+    lo = lower.copy()
+    hi = upper.copy()
+    for _ in range(iterations):
+        p, dp = probability(x[group])
+        excess = _group_sum(p, group, n_groups) - units
+        if np.max(np.abs(excess)) < tol:
+            break
+        slope = _group_sum(dp, group, n_groups)
+
+        # Sum is decreasing: too much probability means the root lies above x
+        lo = np.where(excess > 0, x, lo)
+        hi = np.where(excess < 0, x, hi)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = x - excess / slope
+        inside = np.isfinite(step) & (step > lo) & (step < hi)
+        x = np.where(inside, step, 0.5 * (lo + hi))
+    return x
+
+
+def devig_probabilities(odds, group=None, method="shin", units=None):
+    """Margin-free probabilities for many books at once.
+
+    odds is a flat array of decimal prices and group gives each price's book (for
+    example one (fixture, market, bookmaker) combination); units is the number of
+    winning outcomes per book (1 unless given). The power, Shin and odds-ratio
+    parameters are solved for every book simultaneously. Books without a margin
+    (implied probabilities summing to at most units) are normalised proportionally.
+    """
+    if method not in MARGIN_METHODS:
+        raise ValueError(f"Unknown margin method '{method}'. Use one of {MARGIN_METHODS}")
+    implied = 1.0 / np.asarray(odds, dtype=float)
+    if group is None:
+        group = np.zeros(len(implied), dtype=np.int64)
+    group = np.asarray(group, dtype=np.int64)
+    n_groups = int(group.max()) + 1 if len(group) else 0
+    units = np.ones(n_groups) if units is None else np.asarray(units, dtype=float)
+
+    book_sum = _group_sum(implied, group, n_groups)
+    proportional = implied * (units / book_sum)[group]
+    if method == "proportional" or len(implied) == 0:
+        return proportional
+
+    has_margin = book_sum > units
+    # A price of 1.0 or less leaves nothing to solve for
+    has_margin &= _group_sum((implied >= 1.0).astype(float), group, n_groups) == 0
+    # Shin's model assumes a single winner; other books use the proportional split
+    if method == "shin":
+        has_margin &= units == 1
+    rows = has_margin[group]
+    if not rows.any():
+        return proportional
+
+    # Solve only the books that carry a margin, on compact group ids
+    margin_groups = np.flatnonzero(has_margin)
+    compact = np.full(n_groups, -1, dtype=np.int64)
+    compact[margin_groups] = np.arange(len(margin_groups))
+    g = compact[group[rows]]
+    q = implied[rows]
+    target = units[margin_groups]
+    n = len(margin_groups)
+
+    if method == "power":
+        # p_i = q_i ** k with k > 1
+        log_q = np.log(q)
+
+        def probability(k):
+            p = np.exp(k * log_q)
+            return p, p * log_q
+
+        k = _solve_groups(probability, np.ones(n), np.ones(n), np.full(n, 100.0), g, target)
+        fair = np.exp(k[g] * log_q)
+
+    elif method == "odds_ratio":
+        # Fair odds ratio p / (1 - p) is the quoted one divided by c > 1
+        def probability(c):
+            denominator = q + c * (1.0 - q)
+            return q / denominator, -q * (1.0 - q) / denominator ** 2
+
+        c = _solve_groups(probability, np.ones(n), np.ones(n), np.full(n, 1e4), g, target)
+        fair = q / (q + c[g] * (1.0 - q))
+
+    else:
+        # Shin: z is the share of insider money, p_i solves the bookmaker's quote
+        share = q ** 2 / _group_sum(q, g, n)[g]
+
+        def probability(z):
+            root = np.sqrt(z ** 2 + 4.0 * (1.0 - z) * share)
+            p = (root - z) / (2.0 * (1.0 - z))
+            d_root = (z - 2.0 * share) / root
+            dp = ((d_root - 1.0) * (1.0 - z) + (root - z)) / (2.0 * (1.0 - z) ** 2)
+            return p, dp
+
+        z = _solve_groups(probability, np.zeros(n), np.zeros(n), np.full(n, 0.99), g, target)
+        fair, _ = probability(z[g])
+
+    result = proportional.copy()
+    result[rows] = fair
+    return result
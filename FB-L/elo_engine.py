@@ -0,0 +1,220 @@
+import os, sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+# Rating points added to the home side when computing the expected result
+HOME_ADVANTAGE = 65.0
+# Share of a rating's distance from INITIAL_RATING kept into a new season
+SEASON_CARRYOVER = 0.8
+
+
+def margin_multiplier(goal_difference):
+    """Goal-difference index of the World Football Elo ratings: 1, 1.5, then (11 + margin) / 8"""
+    margin = np.abs(np.asarray(goal_difference, dtype=float))
+    return np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11 + margin) / 8))
+
+
+def expected_result(rating_diff):
+    """Expected score (win 1, draw 0.5) of the side rated rating_diff points higher"""
+    return 1 / (1 + 10 ** (-np.asarray(rating_diff, dtype=float) / 400))
+
+
+def match_rounds(home_codes, away_codes, n_teams):
+    """Round of each match such that no team plays twice in a round and each team's
+    matches keep their order; matches of one round can be rated simultaneously"""
+    last = np.full(n_teams, -1, dtype=np.int64)
+    rounds = np.empty(len(home_codes), dtype=np.int64)
+    for i, (h, a) in enumerate(zip(home_codes, away_codes)):
+        rounds[i] = max(last[h], last[a]) + 1
+        last[h] = last[a] = rounds[i]
+    return rounds
+
+
+class EloRatings:
+    """Club Elo ratings with home advantage, margin of victory and season regression.
+
+    update rates one result; backfill rates a whole results history round by round,
+    each round as one array operation, and returns every match's pre-match ratings.
+    """
+
+    def __init__(self, ratings=None, games=None, seasons=None, k_factor=K_FACTOR, home_advantage=HOME_ADVANTAGE,
+                 carryover=SEASON_CARRYOVER):
+        self.ratings = dict(ratings or {})
+        self.games = dict(games or {})
+        self.seasons = dict(seasons or {})
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        self.carryover = carryover
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def __contains__(self, team):
+        return team in self.ratings
+
+    def rating(self, team):
+        return self.ratings.get(team, INITIAL_RATING)
+
+    def diff(self, home_team, away_team):
+        """Home rating minus away rating (no home advantage)"""
+        return self.rating(home_team) - self.rating(away_team)
+
+    def _regress(self, rating, season_changed):
+        return np.where(season_changed, INITIAL_RATING + self.carryover * (rating - INITIAL_RATING), rating)
+
+    def update(self, home_team, away_team, home_goals, away_goals, season=None):
+        """Rate one result; returns the rating points the home side gained (the away side lost as many)"""
+        ratings = []
+        for team in (home_team, away_team):
+            rating = self.rating(team)
+            if season is not None and self.seasons.get(team, season) != season:
+                rating = float(self._regress(rating, True))
+            if season is not None:
+                self.seasons[team] = season
+            ratings.append(rating)
+        home, away = ratings
+
+        score = 1.0 if home_goals > away_goals else 0.5 if home_goals == away_goals else 0.0
+        expected = expected_result(home + self.home_advantage - away)
+        delta = float(self.k_factor * margin_multiplier(home_goals - away_goals) * (score - expected))
+        self.ratings[home_team] = home + delta
+        self.ratings[away_team] = away - delta
+        for team in (home_team, away_team):
+            self.games[team] = self.games.get(team, 0) + 1
+        return delta
+
+    def backfill(self, results):
+        """Rate a results history (home, away, home_goals, away_goals, optional season, in date order).
+
+        Ratings continue from the current state. Returns home_elo, away_elo and
+        elo_diff before each match, aligned with results, so they can be used as
+        point-in-time model inputs.
+        """
+        home_names = results["home"].to_numpy()
+        away_names = results["away"].to_numpy()
+        teams = pd.Index(pd.unique(np.concatenate([home_names, away_names])))
+        home, away = teams.get_indexer(home_names), teams.get_indexer(away_names)
+        ratings = np.array([self.rating(team) for team in teams])
+        games = np.array([self.games.get(team, 0) for team in teams], dtype=np.int64)
+
+        has_season = "season" in results.columns
+        if has_season:
+            season_labels = pd.Index(pd.unique(results["season"].astype(str)))
+            season = season_labels.get_indexer(results["season"].astype(str))
+            known = [season_labels.get_indexer([self.seasons[team]])[0] if team in self.seasons else -1 for team in teams]
+            last_season = np.array(known, dtype=np.int64)
+            # A stored season that is not in these results still counts as a different season
+            last_season[[team in self.seasons and code < 0 for team, code in zip(teams, known)]] = -2
+
+        goal_diff = results["home_goals"].to_numpy() - results["away_goals"].to_numpy()
+        margin = margin_multiplier(goal_diff)
+        score = np.where(goal_diff > 0, 1.0, np.where(goal_diff == 0, 0.5, 0.0))
+
+        home_before = np.empty(len(results))
+        away_before = np.empty(len(results))
+        rounds = match_rounds(home, away, len(teams))
+        order = np.argsort(rounds, kind="stable")
+        bounds = np.flatnonzero(np.diff(rounds[order])) + 1
+        for matches in np.split(order, bounds):
+            h, a = home[matches], away[matches]
+            if has_season:
+                s = season[matches]
+                ratings[h] = self._regress(ratings[h], (last_season[h] != s) & (last_season[h] != -1))
+                ratings[a] = self._regress(ratings[a], (last_season[a] != s) & (last_season[a] != -1))
+                last_season[h] = s
+                last_season[a] = s
+            home_before[matches] = ratings[h]
+            away_before[matches] = ratings[a]
+            delta = self.k_factor * margin[matches] * (score[matches] - expected_result(ratings[h] + self.home_advantage - ratings[a]))
+            ratings[h] += delta
+            ratings[a] -= delta
+            games[h] += 1
+            games[a] += 1
+
+        self.ratings.update(zip(teams, ratings.tolist()))
+        self.games.update(zip(teams, games.tolist()))
+        if has_season:
+            self.seasons.update((team, season_labels[code]) for team, code in zip(teams, last_season) if code >= 0)
+        return pd.DataFrame({"home_elo": home_before, "away_elo": away_before, "elo_diff": home_before - away_before},
+                            index=results.index)
+
+    def to_frame(self):
+        """Ratings table, strongest first"""
+        frame = pd.DataFrame({
+            "team": list(self.ratings),
+            "rating": list(self.ratings.values()),
+            "games": [self.games.get(team, 0) for team in self.ratings],
+        })
+        return frame.sort_values("rating", ascending=False, kind="stable").reset_index(drop=True)
+
+    def save(self, filepath):
+        payload = {
+            "k_factor": self.k_factor,
+            "home_advantage": self.home_advantage,
+            "carryover": self.carryover,
+            "ratings": self.ratings,
+            "games": self.games,
+            "seasons": self.seasons,
+        }
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=1)
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath) as f:
+            payload = json.load(f)
+        return cls(payload["ratings"], payload.get("games"), payload.get("seasons"),
+                   k_factor=payload.get("k_factor", K_FACTOR),
+                   home_advantage=payload.get("home_advantage", HOME_ADVANTAGE),
+                   carryover=payload.get("carryover", SEASON_CARRYOVER))
+
+
+def pre_match_elo_diff(results):
+    """Elo gap before each result, rated from the earlier results of the same league
+    (leagues are rated separately, so clubs with the same name in two leagues stay apart)"""
+    if "league" not in results.columns:
+        return EloRatings().backfill(results)["elo_diff"]
+    return pd.concat([EloRatings().backfill(rows)["elo_diff"]
+                      for _, rows in results.groupby("league", sort=False)]).reindex(results.index)
+
+
+def main(argv=None):
+    from main import ELO_FILE
+    from backtester import read_results
+
+    parser = argparse.ArgumentParser(description="Build or update club Elo ratings from match results")
+    parser.add_argument("--results", nargs="+", required=True,
+                        help="Results CSV files (date, home, away, home_goals, away_goals; optional season)")
+    parser.add_argument("--ratings", default=ELO_FILE, help="Ratings file to update (created if missing)")
+    parser.add_argument("--rebuild", action="store_true", help="Start from scratch instead of the saved ratings")
+    parser.add_argument("--k-factor", type=float, default=K_FACTOR)
+    parser.add_argument("--home-advantage", type=float, default=HOME_ADVANTAGE)
+    parser.add_argument("--carryover", type=float, default=SEASON_CARRYOVER)
+    parser.add_argument("--top", type=int, default=20, help="Ratings to print")
+    args = parser.parse_args(argv)
+
+    try:
+        results = pd.concat([read_results(path) for path in args.results], ignore_index=True)
+        results = results.sort_values("date", kind="stable").reset_index(drop=True)
+        if os.path.exists(args.ratings) and not args.rebuild:
+            elo = EloRatings.load(args.ratings)
+        else:
+            elo = EloRatings(k_factor=args.k_factor, home_advantage=args.home_advantage, carryover=args.carryover)
+        elo.backfill(results)
+        elo.save(args.ratings)
+    except Exception as e:
+        print("❌ Elo update failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✅ Rated {len(results)} results for {len(elo)} teams -> {args.ratings}")
+    print(elo.to_frame().head(args.top).to_string(index=False, float_format=lambda v: f"{v:.0f}"))
+
+
+if __name__ == "__main__":
+    main()
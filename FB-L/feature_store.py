@@ -0,0 +1,267 @@
+import os, sys
+import re
+import json
+import shutil
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from match_predictor import team_features
+from prediction_cache import data_fingerprint
+
+MANIFEST_FILE = "manifest.json"
+# Bump when the column layout changes so stores are rebuilt
+FEATURE_SCHEMA_VERSION = 1
+# Modules whose code derives the stored features, sentiment and pressure; editing any
+# of them changes the store version, so features are never served from older code
+FEATURE_CODE_MODULES = ("match_predictor.py", "player_data_collector.py", "team_data_collector.py",
+                        "league_rules.py", "standings_engine.py", "feature_store.py")
+# Groups that may be missing for a team; a has:<group> column records presence
+OPTIONAL_GROUPS = ("form", "sentiment", "pressure")
+
+
+def _flatten(value, prefix, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{prefix}.{key}" if prefix else str(key), out)
+    else:
+        out[prefix] = value
+    return out
+
+
+def _team_row(features, sentiment, pressure):
+    """One flat {column: value} row from a team's features, sentiment and pressure row"""
+    row = _flatten(features, "", {})
+    row.update({f"has:{group}": value is not None for group, value in
+                (("form", features.get("form")), ("sentiment", sentiment), ("pressure", pressure))})
+    row["sentiment"] = sentiment
+    if pressure is not None:
+        _flatten(pressure, "pressure", row)
+    return row
+
+
+def _column_array(values):
+    """Typed array for one column plus its string vocabulary (None for numeric columns)"""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, (bool, np.bool_)) for value in present):
+        return np.array([bool(value) for value in values]), None
+    if present and all(isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)) for value in present):
+        return np.array([int(value) if value is not None else 0 for value in values], dtype=np.int64), None
+    # Numbers, or flags with gaps (True/False/NaN), are stored as floats
+    if all(isinstance(value, (bool, int, float, np.bool_, np.integer, np.floating)) for value in present):
+        return np.array([float(value) if value is not None else np.nan for value in values], dtype=np.float64), None
+
+    # Strings (and anything else) become categorical codes; -1 marks a missing value
+    labels = sorted({str(value) for value in present if not (isinstance(value, float) and np.isnan(value))})
+    index = {label: code for code, label in enumerate(labels)}
+    codes = [index[str(value)] if value is not None and not (isinstance(value, float) and np.isnan(value)) else -1
+             for value in values]
+    return np.array(codes, dtype=np.int32), labels
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower() or "league"
+
+
+def _column_file(column):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", column) + ".npy"
+
+
+@lru_cache(maxsize=1)
+def feature_code_fingerprint():
+    """Content hash of FEATURE_CODE_MODULES"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    return data_fingerprint([os.path.join(here, module) for module in FEATURE_CODE_MODULES], content=True)
+
+
+def feature_version(source_files):
+    """Data version of a set of source files (size and modification time), the feature
+    schema and the code that derives the features"""
+    return f"v{FEATURE_SCHEMA_VERSION}-{data_fingerprint(source_files)[:16]}-{feature_code_fingerprint()[:8]}"
+
+
+class FeatureStore:
+    """Per-team features of one league and data version as memory-mapped columns.
+
+    The table has one row per team and one typed column per feature (floats, ints,
+    bools, or categorical codes with the labels in the manifest). Loading maps the
+    .npy files without reading them, so opening a store is instant and workers
+    share the pages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+        self.teams = self.manifest["teams"]
+        self._row = {team: i for i, team in enumerate(self.teams)}
+        self.columns = {column: np.load(os.path.join(path, spec["file"]), mmap_mode="r")
+                        for column, spec in self.manifest["columns"].items()}
+        self.labels = {column: spec["labels"] for column, spec in self.manifest["columns"].items() if spec["labels"] is not None}
+        self._player_groups = None
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.teams)
+
+    def __contains__(self, team):
+        return team in self._row
+
+    @classmethod
+    def build(cls, path, version, team_df, player_df, form_data=None):
+        """Compute every team's features once and write them as a store at path"""
+        from main import team_inputs
+
+        teams = sorted(player_df["Team"].dropna().unique())
+        rows = []
+        for team in teams:
+            players, sentiment, pressure = team_inputs(team, team_df, player_df)
+            rows.append(_team_row(team_features(players, form_data), sentiment, pressure))
+
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        specs = {}
+        for column in columns:
+            array, labels = _column_array([row.get(column) for row in rows])
+            filename = _column_file(column)
+            np.save(os.path.join(tmp_path, filename), array)
+            specs[column] = {"file": filename, "dtype": str(array.dtype), "labels": labels}
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+            json.dump({"version": version, "teams": teams, "columns": specs}, f, indent=1)
+
+        # Another process may have built the same version meanwhile; keep the first
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return cls(path)
+
+    def _value(self, column, row):
+        value = self.columns[column][row]
+        if column in self.labels:
+            return self.labels[column][value] if value >= 0 else np.nan
+        return value.item()
+
+    def team(self, team):
+        """(features, sentiment, pressure) of one team, as team_features and team_inputs return them"""
+        if team in self._cache:
+            return self._cache[team]
+        row = self._row[team]
+        present = {group: bool(self.columns[f"has:{group}"][row]) for group in OPTIONAL_GROUPS}
+        features, pressure = {}, {}
+        for column in self.columns:
+            if column.startswith("has:") or column == "sentiment":
+                continue
+            group, _, key = column.partition(".")
+            if group == "pressure":
+                if present["pressure"]:
+                    pressure[key] = self._value(column, row)
+                continue
+            if group == "form" and not present["form"]:
+                continue
+            value = self._value(column, row)
+            if group == "roles" and key.startswith("role_distribution.") and isinstance(value, float) and np.isnan(value):
+                continue
+            target = features
+            parts = column.split(".")
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+
+        features.setdefault("roles", {}).setdefault("role_distribution", {})
+        if not present["form"]:
+            features["form"] = None
+        sentiment = self._value("sentiment", row) if present["sentiment"] else None
+        result = (features, sentiment, pressure if present["pressure"] else None)
+        self._cache[team] = result
+        return result
+
+    def fixture_inputs(self, home_team, away_team, player_df):
+        """get_fixture_inputs from the store (plus both teams' features), or None if a squad is missing"""
+        if home_team not in self or away_team not in self:
+            return None
+        if self._player_groups is None:
+            self._player_groups = dict(tuple(player_df.groupby("Team", sort=False)))
+        team1_features, team1_sentiment, team1_pressure = self.team(home_team)
+        team2_features, team2_sentiment, team2_pressure = self.team(away_team)
+        return {
+            "team1_df": self._player_groups[home_team],
+            "team2_df": self._player_groups[away_team],
+            "team1_sentiment": team1_sentiment,
+            "team2_sentiment": team2_sentiment,
+            "home_team": home_team,
+            "team1_pressure_data": team1_pressure,
+            "team2_pressure_data": team2_pressure,
+            "team1_features": team1_features,
+            "team2_features": team2_features,
+        }
+
+    def to_frame(self):
+        """The whole table as a DataFrame (categorical columns decoded)"""
+        data = {}
+        for column, values in self.columns.items():
+            if column in self.labels:
+                labels = np.array(self.labels[column] + [None], dtype=object)
+                data[column] = labels[np.asarray(values)]
+            else:
+                data[column] = np.asarray(values)
+        return pd.DataFrame(data, index=pd.Index(self.teams, name="team"))
+
+
+def open_feature_store(root, league, source_files, team_df, player_df, form_data=None, keep_versions=2):
+    """The feature store of the current data version, built on first use.
+
+    Stores live in <root>/<league>/<version>/; the version follows the source files
+    and the feature code, so a data refresh builds a new store. Older versions beyond
+    keep_versions are removed (never, when keep_versions is None, e.g. for backtest
+    snapshots).
+    """
+    version = feature_version(source_files)
+    league_dir = os.path.join(root, _slug(league))
+    path = os.path.join(league_dir, version)
+    if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return FeatureStore(path)
+
+    os.makedirs(league_dir, exist_ok=True)
+    print(f"🧮 Materializing team features for {league} ({version})")
+    store = FeatureStore.build(path, version, team_df, player_df, form_data)
+
+    if keep_versions is None:
+        return store
+    versions = sorted((entry for entry in os.scandir(league_dir) if entry.is_dir() and ".tmp-" not in entry.name),
+                      key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[keep_versions:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+    return store
+
+
+def main(argv=None):
+    from main import FEATURE_STORE, LEAGUE_NAME, league_fingerprint_files, load_league_data
+
+    parser = argparse.ArgumentParser(description="Materialize the per-team feature table")
+    parser.add_argument("--data-dir", help="Folder with the league's data files (default: the files next to main.py)")
+    parser.add_argument("--league", default=LEAGUE_NAME)
+    parser.add_argument("--root", default=FEATURE_STORE, help="Feature store folder")
+    parser.add_argument("--show", action="store_true", help="Print the feature table")
+    args = parser.parse_args(argv)
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            team_df, player_df, corner_data, form_data = load_league_data(args.data_dir)
+        store = open_feature_store(args.root, args.league, league_fingerprint_files(args.data_dir),
+                                    team_df, player_df, form_data)
+    except Exception as e:
+        print("❌ Feature store build failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✅ {len(store)} teams x {len(store.columns)} features at {store.path}")
+    if args.show:
+        print(store.to_frame().T.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import numpy as np
+
+# 15-minute bands; stoppage time counts towards the band that ends the half
+TIME_BANDS = ("1-15", "16-30", "31-45", "46-60", "61-75", "76-90")
+# Share of a half's goals in each of its bands (goal rates rise as a half goes on)
+FIRST_HALF_BAND_SHARES = (0.29, 0.33, 0.38)
+SECOND_HALF_BAND_SHARES = (0.30, 0.32, 0.38)
+# Share of the match's goals scored in each half
+FIRST_HALF_RATIO = 0.43
+SECOND_HALF_RATIO = 0.57
+
+
+def half_ratios(team1_style, team2_style):
+    """(first half, second half) goal ratios adjusted for the two teams' styles"""
+    first_half_ratio = FIRST_HALF_RATIO
+    if team1_style["style"] == "Attacking":
+        first_half_ratio += 0.05  # Attacking teams start strong
+    if team2_style["style"] == "Defensive":
+        first_half_ratio -= 0.03  # Defensive teams may hold out early
+    return first_half_ratio, SECOND_HALF_RATIO
+
+
+def band_rates(lambda_home, lambda_away, first_half_ratio=FIRST_HALF_RATIO, second_half_ratio=SECOND_HALF_RATIO):
+    """Expected home and away goals per band, shape (fixtures, bands).
+
+    The half ratios are normalised so the bands of a fixture add up to its lambdas.
+    """
+    lambda_home = np.atleast_1d(np.asarray(lambda_home, dtype=float))
+    lambda_away = np.atleast_1d(np.asarray(lambda_away, dtype=float))
+    first = np.broadcast_to(np.asarray(first_half_ratio, dtype=float), lambda_home.shape)
+    second = np.broadcast_to(np.asarray(second_half_ratio, dtype=float), lambda_home.shape)
+    total = first + second
+
+    shares = np.concatenate([
+        (first / total)[:, None] * np.array(FIRST_HALF_BAND_SHARES),
+        (second / total)[:, None] * np.array(SECOND_HALF_BAND_SHARES),
+    ], axis=1)
+    return lambda_home[:, None] * shares, lambda_away[:, None] * shares
+
+
+def goal_timing_probabilities(lambda_home, lambda_away, first_half_ratio=FIRST_HALF_RATIO,
+                              second_half_ratio=SECOND_HALF_RATIO):
+    """First goal and time-band probabilities for arrays of fixtures, in closed form.
+
+    Each team scores as a Poisson process whose rate is constant within a band, so the
+    first goal falls in band k with probability exp(-goals before k) * (1 - exp(-goals in k))
+    and belongs to the home side with probability home rate / total rate of that band.
+    Every value is an array over fixtures (bands on the last axis).
+    """
+    home, away = band_rates(lambda_home, lambda_away, first_half_ratio, second_half_ratio)
+    total = home + away
+    before = np.exp(-(np.cumsum(total, axis=1) - total))
+    first_in_band = before * -np.expm1(-total)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        home_share = np.where(total > 0, home / total, 0.5)
+    no_goal = np.exp(-total.sum(axis=1))
+
+    return {
+        "home_band_goals": home,
+        "away_band_goals": away,
+        "first_goal_home": (first_in_band * home_share).sum(axis=1),
+        "first_goal_away": (first_in_band * (1 - home_share)).sum(axis=1),
+        "no_goal": no_goal,
+        "first_goal_band": first_in_band,
+        "goal_in_band": -np.expm1(-total),
+        "home_goal_in_band": -np.expm1(-home),
+        "away_goal_in_band": -np.expm1(-away),
+    }
+
+
+def timing_markets(timing, index=0):
+    """Market probabilities of one fixture of goal_timing_probabilities, in the predictor's nested layout"""
+    markets = {
+        "First Goal": {
+            "Home": float(timing["first_goal_home"][index]),
+            "Away": float(timing["first_goal_away"][index]),
+            "None": float(timing["no_goal"][index]),
+        },
+        "Time of First Goal": {
+            **{band: float(p) for band, p in zip(TIME_BANDS, timing["first_goal_band"][index])},
+            "No Goal": float(timing["no_goal"][index]),
+        },
+    }
+    for band, p in zip(TIME_BANDS, timing["goal_in_band"][index]):
+        markets[f"Goal {band} Minutes"] = {"Yes": float(p), "No": float(1 - p)}
+    return markets
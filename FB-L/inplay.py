@@ -0,0 +1,306 @@
+import os, sys
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+from goal_timing import FIRST_HALF_RATIO, SECOND_HALF_RATIO, band_rates
+
+MATCH_MINUTES = 90
+HALF_MINUTES = 45
+# Typical added time of each half; a live state further into stoppage time is priced
+# as if its half's last added minute were still to play
+FIRST_HALF_STOPPAGE = 3
+SECOND_HALF_STOPPAGE = 6
+# Minutes played on a clock that runs through both halves' added time
+TIMELINE_MINUTES = MATCH_MINUTES + FIRST_HALF_STOPPAGE + SECOND_HALF_STOPPAGE
+# Timeline minutes at which remaining-goal distributions are precomputed
+MINUTE_GRID = np.arange(TIMELINE_MINUTES + 1)
+# Remaining goals per side covered by the precomputed distributions
+MAX_REMAINING_GOALS = 10
+# Red cards per side with their own precomputed state (more are treated as this many)
+MAX_RED_CARDS = 2
+# Scoring rate of a side per red card it has, and of its opponent
+RED_CARD_OWN_FACTOR = 0.67
+RED_CARD_OPPONENT_FACTOR = 1.25
+TOTAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+# Highest goals per side listed in the Correct Score market
+CORRECT_SCORE_MAX = 6
+LIVE_FIELDS = ("home", "away", "minute", "home_goals", "away_goals")
+
+
+def timeline_minutes(minutes):
+    """Timeline minutes of live match clocks: numbers or strings such as "45+2" and "90+3".
+
+    Up to 45 is the first half and "45+x" its added time; later minutes are the second
+    half, which starts after FIRST_HALF_STOPPAGE added minutes, and "90+x" (or 93) its
+    added time. Added time is capped one minute short of the half's typical stoppage.
+    Unreadable clocks are NaN.
+    """
+    clocks = pd.Series(np.atleast_1d(np.asarray(minutes, dtype=object))).astype(str)
+    parts = clocks.str.extract(r"^\s*(\d+(?:\.\d*)?)\s*(?:\+\s*(\d+(?:\.\d*)?))?\s*'?\s*$")
+    base = parts[0].astype(float).to_numpy()
+    added = parts[1].astype(float).fillna(0).to_numpy()
+    first_half = np.minimum(base + added, HALF_MINUTES + FIRST_HALF_STOPPAGE - 1)
+    second_half = FIRST_HALF_STOPPAGE + np.minimum(base + added, MATCH_MINUTES + SECOND_HALF_STOPPAGE - 1)
+    return np.where(base <= HALF_MINUTES, first_half, second_half)
+
+
+def remaining_fractions(first_half_ratio=FIRST_HALF_RATIO, second_half_ratio=SECOND_HALF_RATIO, minutes=MINUTE_GRID):
+    """Share of a fixture's expected goals still to come after each timeline minute, shape (fixtures, minutes).
+
+    Goals follow the 15-minute band profile of goal_timing.py, at a constant rate within
+    each band; a half's added time lengthens the band that ends it.
+    """
+    shares = band_rates(np.ones(np.size(first_half_ratio)), 0.0, first_half_ratio, second_half_ratio)[0]
+    lengths = np.full(shares.shape[1], MATCH_MINUTES / shares.shape[1])
+    lengths[shares.shape[1] // 2 - 1] += FIRST_HALF_STOPPAGE
+    lengths[-1] += SECOND_HALF_STOPPAGE
+    starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+    minutes = np.clip(np.asarray(minutes, dtype=float), 0, TIMELINE_MINUTES)
+    band = np.clip(np.searchsorted(starts, minutes, side="right") - 1, 0, shares.shape[1] - 1)
+    before = np.concatenate([np.zeros((len(shares), 1)), np.cumsum(shares, axis=1)], axis=1)[:, band]
+    played = before + shares[:, band] * (minutes - starts[band]) / lengths[band]
+    return np.clip(1 - played, 0.0, 1.0)
+
+
+def poisson_pmfs(rates, max_goals=MAX_REMAINING_GOALS):
+    """Poisson probabilities of 0..max_goals for an array of rates (on a new last axis)"""
+    rates = np.asarray(rates, dtype=float)
+    ratios = rates[..., None] / np.arange(1, max_goals + 1)
+    return np.exp(-rates)[..., None] * np.concatenate([np.ones(rates.shape + (1,)), np.cumprod(ratios, axis=-1)], axis=-1)
+
+
+def red_card_factors(max_red_cards=MAX_RED_CARDS):
+    """Multipliers of the home and away scoring rates, indexed [home_reds, away_reds]"""
+    own = RED_CARD_OWN_FACTOR ** np.arange(max_red_cards + 1)
+    opponent = RED_CARD_OPPONENT_FACTOR ** np.arange(max_red_cards + 1)
+    return own[:, None] * opponent[None, :], opponent[:, None] * own[None, :]
+
+
+class InPlayGrid:
+    """Remaining-goal distributions of a set of fixtures for live repricing.
+
+    For every fixture, red-card state and timeline minute of MINUTE_GRID, each side's
+    remaining goals are Poisson with the pre-match lambda scaled by the share of
+    goals still to come and the red-card factors; their pmfs are computed once here.
+    A live state's remaining-score matrix is then the outer product of two looked-up
+    pmfs, and shifting it by the current score gives the final-score distribution,
+    so repricing many live matches is a gather and a few array operations.
+    """
+
+    def __init__(self, lambda_home, lambda_away, first_half_ratio=FIRST_HALF_RATIO, second_half_ratio=SECOND_HALF_RATIO,
+                 max_goals=MAX_REMAINING_GOALS):
+        lambda_home = np.atleast_1d(np.asarray(lambda_home, dtype=float))
+        lambda_away = np.atleast_1d(np.asarray(lambda_away, dtype=float))
+        first = np.broadcast_to(np.asarray(first_half_ratio, dtype=float), lambda_home.shape)
+        second = np.broadcast_to(np.asarray(second_half_ratio, dtype=float), lambda_home.shape)
+
+        fractions = remaining_fractions(first, second)
+        home_factor, away_factor = red_card_factors()
+        # (fixtures, home reds, away reds, minutes)
+        home_rates = lambda_home[:, None, None, None] * home_factor[None, :, :, None] * fractions[:, None, None, :]
+        away_rates = lambda_away[:, None, None, None] * away_factor[None, :, :, None] * fractions[:, None, None, :]
+        self.home_pmf = poisson_pmfs(home_rates, max_goals)
+        self.away_pmf = poisson_pmfs(away_rates, max_goals)
+        self.max_goals = max_goals
+
+        goals = np.arange(max_goals + 1)
+        self._difference = goals[:, None] - goals[None, :]
+        self._total = goals[:, None] + goals[None, :]
+
+    def __len__(self):
+        return len(self.home_pmf)
+
+    def remaining_matrices(self, fixtures, minutes, home_reds=0, away_reds=0):
+        """Remaining-score matrices of live states, shape (states, goals, goals); minutes are
+        match clocks as timeline_minutes reads them"""
+        fixtures, minutes, home_reds, away_reds = np.broadcast_arrays(
+            np.atleast_1d(fixtures), timeline_minutes(minutes), np.atleast_1d(home_reds), np.atleast_1d(away_reds))
+        minute = np.clip(np.floor(np.nan_to_num(minutes)), 0, TIMELINE_MINUTES).astype(int)
+        home_reds = np.clip(home_reds.astype(int), 0, MAX_RED_CARDS)
+        away_reds = np.clip(away_reds.astype(int), 0, MAX_RED_CARDS)
+        home = self.home_pmf[fixtures, home_reds, away_reds, minute]
+        away = self.away_pmf[fixtures, home_reds, away_reds, minute]
+        return home[:, :, None] * away[:, None, :]
+
+    def price(self, fixtures, minutes, home_goals, away_goals, home_reds=0, away_reds=0):
+        """1X2, totals and both-teams-to-score probabilities of many live states at once.
+
+        Arguments are arrays (or scalars) over live states; fixtures are row indices of
+        this grid. Returns a DataFrame with one row per state.
+        """
+        matrices = self.remaining_matrices(fixtures, minutes, home_reds, away_reds)
+        home_goals, away_goals = np.broadcast_arrays(np.atleast_1d(home_goals), np.atleast_1d(away_goals))
+        home_goals = np.broadcast_to(home_goals, len(matrices))
+        away_goals = np.broadcast_to(away_goals, len(matrices))
+
+        final_difference = self._difference[None] + (home_goals - away_goals)[:, None, None]
+        table = {
+            "home_win": (matrices * (final_difference > 0)).sum(axis=(1, 2)),
+            "draw": (matrices * (final_difference == 0)).sum(axis=(1, 2)),
+            "away_win": (matrices * (final_difference < 0)).sum(axis=(1, 2)),
+        }
+        final_total = self._total[None] + (home_goals + away_goals)[:, None, None]
+        for line in TOTAL_LINES:
+            table[f"over_{line}"] = (matrices * (final_total > line)).sum(axis=(1, 2))
+        home_scores = np.where(home_goals > 0, 1.0, 1 - matrices[:, 0, :].sum(axis=1))
+        away_scores = np.where(away_goals > 0, 1.0, 1 - matrices[:, :, 0].sum(axis=1))
+        table["btts_yes"] = home_scores * away_scores
+        goals = np.arange(self.max_goals + 1)
+        table["exp_home_goals"] = home_goals + (matrices.sum(axis=2) * goals).sum(axis=1)
+        table["exp_away_goals"] = away_goals + (matrices.sum(axis=1) * goals).sum(axis=1)
+        return pd.DataFrame(table)
+
+    def correct_score(self, fixture, minute, home_goals, away_goals, home_reds=0, away_reds=0):
+        """Final-score probabilities {"h-a": p} of one live state, up to CORRECT_SCORE_MAX goals a side"""
+        remaining = self.remaining_matrices(fixture, minute, home_reds, away_reds)[0]
+        size = CORRECT_SCORE_MAX + 1
+        final = np.zeros((size, size))
+        rows = max(0, min(size - home_goals, remaining.shape[0]))
+        cols = max(0, min(size - away_goals, remaining.shape[1]))
+        final[home_goals:home_goals + rows, away_goals:away_goals + cols] = remaining[:rows, :cols]
+        return {f"{i}-{j}": float(final[i, j]) for i in range(home_goals, size) for j in range(away_goals, size)}
+
+    def markets(self, fixture, minute, home_goals, away_goals, home_reds=0, away_reds=0):
+        """Live probabilities of one state in the predictor's {market: {outcome: p}} layout"""
+        row = self.price(fixture, minute, home_goals, away_goals, home_reds, away_reds).iloc[0]
+        markets = {"1X2": {"Home Win": float(row["home_win"]), "Draw": float(row["draw"]), "Away Win": float(row["away_win"])}}
+        for line in TOTAL_LINES:
+            markets[f"Over/Under {line}"] = {"Over": float(row[f"over_{line}"]), "Under": float(1 - row[f"over_{line}"])}
+        markets["Both Teams to Score"] = {"Yes": float(row["btts_yes"]), "No": float(1 - row["btts_yes"])}
+        markets["Correct Score"] = self.correct_score(fixture, minute, home_goals, away_goals, home_reds, away_reds)
+        return markets
+
+
+def grid_from_predictions(predictions):
+    """InPlayGrid of pre-match predictions (get_betting_suggestions_and_markets details), in order"""
+    features = [details["features"] for details in predictions]
+    return InPlayGrid(
+        [f["lambda_home"] for f in features],
+        [f["lambda_away"] for f in features],
+        [f.get("first_half_ratio", FIRST_HALF_RATIO) for f in features],
+        [f.get("second_half_ratio", SECOND_HALF_RATIO) for f in features],
+    )
+
+
+def read_live_states(filepath):
+    """Live states (home, away, minute, home_goals, away_goals, optional home_reds/away_reds) from CSV or JSON lines.
+
+    Minutes may carry added time ("45+2", "90+3"); states with an unreadable minute are dropped.
+    """
+    if filepath.lower().endswith((".jsonl", ".json")):
+        states = pd.read_json(filepath, lines=True)
+    else:
+        states = pd.read_csv(filepath)
+    states.columns = [str(column).strip().lower() for column in states.columns]
+    missing = [field for field in LIVE_FIELDS if field not in states.columns]
+    if missing:
+        raise ValueError(f"Live states file is missing columns {missing}. Found: {list(states.columns)}")
+    for column in ("home_reds", "away_reds"):
+        if column not in states.columns:
+            states[column] = 0
+    states[["home_reds", "away_reds"]] = states[["home_reds", "away_reds"]].fillna(0).astype(int)
+    states = states.dropna(subset=list(LIVE_FIELDS))
+    return states[~np.isnan(timeline_minutes(states["minute"]))].reset_index(drop=True)
+
+
+class LiveRepricer:
+    """Prices each new fixture pre-match once, then reprices live states from its grid"""
+
+    def __init__(self, team_df, player_df, corner_data, form_data, params=None, elo=None):
+        self.team_df = team_df
+        self.player_df = player_df
+        self.corner_data = corner_data
+        self.form_data = form_data
+        self.params = params
+        self.elo = elo
+        self.player_teams = set(player_df["Team"].dropna().unique())
+        self.fixtures = {}
+        self.predictions = []
+        self.grid = None
+
+    def _add_fixtures(self, pairs):
+        from main import find_team_match, get_fixture_inputs, elo_difference
+        from match_predictor import get_betting_suggestions_and_markets
+
+        added = False
+        for home_input, away_input in pairs:
+            if (home_input, away_input) in self.fixtures:
+                continue
+            home_team = find_team_match(home_input, self.player_teams)
+            away_team = find_team_match(away_input, self.player_teams)
+            inputs = get_fixture_inputs(home_team, away_team, self.team_df, self.player_df) if home_team and away_team else None
+            if inputs is None:
+                print(f"⚠️ Could not price {home_input} vs {away_input}", file=sys.stderr)
+                self.fixtures[(home_input, away_input)] = None
+                continue
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                details = get_betting_suggestions_and_markets(
+                    **inputs, corner_data=self.corner_data, form_data=self.form_data, return_details=True,
+                    params=self.params, elo_diff=elo_difference(self.elo, home_team, away_team))[4]
+            self.fixtures[(home_input, away_input)] = len(self.predictions)
+            self.predictions.append(details)
+            added = True
+        if added:
+            self.grid = grid_from_predictions(self.predictions)
+
+    def reprice(self, states):
+        """Live probabilities of every state whose fixture could be priced"""
+        self._add_fixtures(zip(states["home"], states["away"]))
+        index = np.array([self.fixtures.get((home, away)) for home, away in zip(states["home"], states["away"])], dtype=object)
+        priced = np.array([i is not None for i in index], dtype=bool)
+        if not priced.any():
+            return pd.DataFrame()
+        states = states[priced].reset_index(drop=True)
+        prices = self.grid.price(index[priced].astype(int), states["minute"].to_numpy(),
+                                 states["home_goals"].to_numpy(dtype=int), states["away_goals"].to_numpy(dtype=int),
+                                 states["home_reds"].to_numpy(dtype=int), states["away_reds"].to_numpy(dtype=int))
+        return pd.concat([states[list(LIVE_FIELDS) + ["home_reds", "away_reds"]], prices], axis=1)
+
+
+def main(argv=None):
+    from main import PARAMS_FILE, ELO_FILE, load_league_data, load_predictor_params, load_elo_ratings
+
+    parser = argparse.ArgumentParser(description="Reprice live matches from minute, score and red cards")
+    parser.add_argument("--live", required=True,
+                        help="Live states: CSV or JSON lines with home, away, minute (e.g. 67 or 90+3), "
+                             "home_goals, away_goals (optional home_reds, away_reds)")
+    parser.add_argument("--params", default=PARAMS_FILE, help="JSON of tuned predictor parameters")
+    parser.add_argument("--elo", default=ELO_FILE, help="Elo ratings file (from elo_engine.py)")
+    parser.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="Keep repricing, re-reading the live states file every SECONDS")
+    parser.add_argument("--out", help="Write the live probabilities to this CSV file (rewritten on every update)")
+    args = parser.parse_args(argv)
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            team_df, player_df, corner_data, form_data = load_league_data()
+            repricer = LiveRepricer(team_df, player_df, corner_data, form_data,
+                                    params=load_predictor_params(args.params), elo=load_elo_ratings(args.elo))
+    except Exception as e:
+        print("❌ Failed to load data:", e, file=sys.stderr)
+        sys.exit(1)
+
+    while True:
+        try:
+            start = time.perf_counter()
+            prices = repricer.reprice(read_live_states(args.live))
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            print("❌ Live repricing failed:", e, file=sys.stderr)
+            if not args.follow:
+                sys.exit(1)
+        else:
+            print(f"\n--- ⚡ LIVE PRICES ({len(prices)} matches, {elapsed * 1000:.1f} ms) ---")
+            if not prices.empty:
+                print(prices.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+            if args.out:
+                prices.to_csv(args.out, index=False)
+        if not args.follow:
+            break
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    main()
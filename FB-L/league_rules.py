@@ -0,0 +1,202 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Standings rules of a league; leagues without an entry in the rules file use these
+DEFAULT_RULES = {
+    "games_in_season": 38,
+    "champions_league_places": 4,  # Positions 1-4
+    "europa_league_places": 3,     # The next 3 positions (5th-7th)
+    "relegation_places": 3,        # Automatically relegated from the bottom
+    "relegation_playoff_places": 0,  # Play-off places just above the automatic drop
+    "relegation_threat_places": 6,   # Bottom positions counted as the danger zone
+    "near_european_places": 3,     # Positions just outside Europe still chasing it
+}
+# Cut-off points used when the position is missing from the table
+DEFAULT_CUTOFF_POINTS = {"champions_league": 60, "europa_league": 50, "safety": 30}
+
+
+def load_league_rules(filepath):
+    """{league: rules} from a JSON file of per-league overrides of DEFAULT_RULES.
+
+    The file maps league names to partial rule dicts, e.g.
+    {"Bundesliga": {"games_in_season": 34, "relegation_places": 2, "relegation_playoff_places": 1}}.
+    Returns {} if the file does not exist.
+    """
+    if not filepath or not os.path.exists(filepath):
+        return {}
+    with open(filepath) as f:
+        overrides = json.load(f)
+    rules = {}
+    for league, values in overrides.items():
+        unknown = set(values) - set(DEFAULT_RULES)
+        if unknown:
+            raise ValueError(f"Unknown league rules for {league}: {sorted(unknown)}")
+        rules[league] = {**DEFAULT_RULES, **values}
+    return rules
+
+
+def league_rules(league, rules_by_league=None):
+    """Rules of one league (DEFAULT_RULES when it has no entry)"""
+    return (rules_by_league or {}).get(league, DEFAULT_RULES)
+
+
+def _cutoff_points(points_at, codes, positions, default):
+    """Points of the team at positions[i] in league codes[i], with a default for missing places"""
+    valid = (positions >= 1) & (positions < points_at.shape[1])
+    values = points_at[codes, np.where(valid, positions, 0)]
+    return np.where(valid & ~np.isnan(values), values, default)
+
+
+def zone_bounds(total_teams, rules):
+    """Zone boundaries (positions) from the number of teams and a league's rules.
+
+    Values may be scalars or per-row arrays, so one call covers stacked leagues.
+    """
+    cl_end = rules["champions_league_places"]
+    europe_end = cl_end + rules["europa_league_places"]
+    drop_start = total_teams - rules["relegation_places"] + 1
+    safe_position = drop_start - rules["relegation_playoff_places"] - 1
+    return {
+        "cl_end": cl_end,
+        "europe_end": europe_end,
+        "near_end": europe_end + rules["near_european_places"],
+        "drop_start": drop_start,
+        "safe_position": safe_position,
+        "threat_start": np.minimum(total_teams - rules["relegation_threat_places"] + 1, safe_position + 1),
+        "games_in_season": rules["games_in_season"],
+    }
+
+
+def team_pressure(position, points, played, win_rate, loss_rate, goal_diff_per_match, bounds, cutoffs):
+    """Zone flags, points gaps and pressure of a set of teams, plus their unnormalised sentiment.
+
+    bounds comes from zone_bounds and cutoffs holds the champions_league, europa_league
+    and safety cut-off points; both may be scalars or arrays aligned with the teams.
+    Returns ({column: array}, adjusted_sentiment).
+    """
+    position = np.asarray(position, dtype=float)
+    points = np.asarray(points, dtype=float)
+    played = np.asarray(played, dtype=float)
+    win_rate = np.asarray(win_rate, dtype=float)
+    loss_rate = np.asarray(loss_rate, dtype=float)
+    cl_end, europe_end, near_end = bounds["cl_end"], bounds["europe_end"], bounds["near_end"]
+
+    columns = {
+        "Champions_League_Zone": position <= cl_end,
+        "Europa_League_Zone": (position > cl_end) & (position <= europe_end),
+        "European_Qualification": position <= europe_end,
+        "Mid_Table_Safety": (position > europe_end) & (position < bounds["threat_start"]),
+        "Relegation_Threat": position >= bounds["threat_start"],
+        "Relegation_Zone": position >= bounds["drop_start"],
+    }
+
+    performance_score = (win_rate * 50) + (np.asarray(goal_diff_per_match, dtype=float) * 10) + (points / played)
+
+    european_pressure = np.select(
+        [columns["Champions_League_Zone"], columns["Europa_League_Zone"], (position > europe_end) & (position <= near_end)],
+        [25, 15, 5],  # Champions League, Europa League, close to European spots
+        0,
+    )
+    relegation_pressure = np.select([columns["Relegation_Zone"], columns["Relegation_Threat"]], [-30, -15], 0)
+
+    # Teams with strong form late in season get European push boost (and the reverse at the bottom)
+    season_progress = np.minimum(played, bounds["games_in_season"]) / bounds["games_in_season"]
+    late = season_progress > 0.6
+    form_pressure = np.select(
+        [(win_rate > 0.6) & late & columns["European_Qualification"], (loss_rate > 0.6) & late & columns["Relegation_Threat"]],
+        [20, -20],
+        0,
+    )
+
+    columns["Points_From_UCL"] = cutoffs["champions_league"] - points
+    columns["Points_From_UEFA"] = cutoffs["europa_league"] - points
+    columns["Points_From_Safety"] = cutoffs["safety"] - points
+
+    european_points_pressure = np.select(
+        [(position > cl_end) & (position <= europe_end + 1) & (columns["Points_From_UCL"] <= 6),
+         (position > europe_end) & (position <= near_end) & (columns["Points_From_UEFA"] <= 4)],
+        [15, 10],  # Close to Champions League, close to Europa League
+        0,
+    )
+    points_pressure = np.select(
+        [columns["Relegation_Threat"] & (columns["Points_From_Safety"] > 6),
+         columns["Relegation_Threat"] & (columns["Points_From_Safety"] <= 3)],
+        [-25, -5],  # Far from safety, close to safety
+        0,
+    )
+
+    total_pressure = european_pressure + relegation_pressure + form_pressure + european_points_pressure + points_pressure
+    columns["European_Pressure"] = european_pressure
+    columns["Relegation_Pressure"] = relegation_pressure
+    columns["Total_Pressure"] = total_pressure
+    columns["Pressure_Level"] = np.select(
+        [total_pressure < -20, total_pressure < -10, total_pressure > 20, total_pressure > 10, total_pressure < 0],
+        ["CRITICAL_RELEGATION", "HIGH_RELEGATION", "HIGH_EUROPEAN", "MODERATE_EUROPEAN", "LOW_RELEGATION"],
+        "NEUTRAL",
+    )
+    return columns, performance_score + total_pressure
+
+
+def normalize_sentiment(adjusted_sentiment, min_score, max_score):
+    """Sentiment on the 0-100 scale of its league (50 when the league's scores are all equal)"""
+    spread = np.where(max_score > min_score, max_score - min_score, 1.0)
+    return np.where(max_score > min_score, 100 * (adjusted_sentiment - min_score) / spread, 50.0)
+
+
+def compute_pressure(standings, rules_by_league=None):
+    """European and relegation pressure for stacked standings of any number of leagues.
+
+    standings has one row per team with League, Position, Played, Points, Win_Rate,
+    Loss_Rate and Goal_Diff_per_Match columns. Cut-off points (4th, 7th, first safe
+    place, ...) are read from a (league, position) points array, so every league is
+    scored in one vectorized pass. Returns the zone, pressure and sentiment columns,
+    indexed like standings.
+    """
+    leagues = pd.Index(pd.unique(standings["League"]))
+    codes = leagues.get_indexer(standings["League"])
+    position = standings["Position"].to_numpy(dtype=float)
+    points = standings["Points"].to_numpy(dtype=float)
+
+    # Per-league rules and sizes, gathered onto the rows
+    rules = [league_rules(league, rules_by_league) for league in leagues]
+    row_rules = {name: np.array([league[name] for league in rules], dtype=float)[codes] for name in DEFAULT_RULES}
+    bounds = zone_bounds(np.bincount(codes, minlength=len(leagues))[codes], row_rules)
+
+    # Points of every (league, position); NaN where a league has no such place
+    points_at = np.full((len(leagues), max(int(np.nanmax(position)) if len(position) else 0, 1) + 1), np.nan)
+    points_at[codes, position.astype(int)] = points
+    cutoffs = {
+        "champions_league": _cutoff_points(points_at, codes, bounds["cl_end"].astype(int), DEFAULT_CUTOFF_POINTS["champions_league"]),
+        "europa_league": _cutoff_points(points_at, codes, bounds["europe_end"].astype(int), DEFAULT_CUTOFF_POINTS["europa_league"]),
+        "safety": _cutoff_points(points_at, codes, bounds["safe_position"].astype(int), DEFAULT_CUTOFF_POINTS["safety"]),
+    }
+
+    columns, adjusted_sentiment = team_pressure(
+        position, points, standings["Played"], standings["Win_Rate"], standings["Loss_Rate"],
+        standings["Goal_Diff_per_Match"], bounds, cutoffs,
+    )
+    zones = pd.DataFrame(columns, index=standings.index)
+    for column in ("Points_From_UCL", "Points_From_UEFA", "Points_From_Safety"):
+        zones[column] = zones[column].astype(standings["Points"].dtype)
+
+    # Normalize to 0-100 within each league
+    by_league = pd.Series(adjusted_sentiment, index=standings.index).groupby(codes)
+    sentiment = normalize_sentiment(adjusted_sentiment, by_league.transform("min").to_numpy(), by_league.transform("max").to_numpy())
+    zones.insert(zones.columns.get_loc("European_Pressure"), "Sentiment_Score", sentiment)
+    return zones
+
+
+def refresh_leagues(tables, rules_by_league=None):
+    """Recompute pressure for many leagues at once.
+
+    tables maps league names to standings tables (as load_team_data returns them);
+    they are stacked, scored with a single compute_pressure call and split back.
+    """
+    stacked = pd.concat([table.assign(League=league) for league, table in tables.items()], ignore_index=True)
+    pressure = compute_pressure(stacked, rules_by_league)
+    stacked = stacked.drop(columns=[column for column in pressure.columns if column in stacked.columns])
+    stacked = pd.concat([stacked, pressure], axis=1)
+    return {league: rows.drop(columns="League").reset_index(drop=True)
+            for league, rows in stacked.groupby("League", sort=False)}
@@ -0,0 +1,338 @@
+import sys
+import time
+import argparse
+import contextlib
+import math
+import numpy as np
+import pandas as pd
+from match_predictor import (
+    analyze_team_form, analyze_team_corner_profile, analyze_team_style, analyze_team_xg_profile,
+    analyze_team_role_composition, compute_match_lambdas,
+)
+
+# Role groups of analyze_team_style
+ATTACKING_ROLES = ["FW", "LW", "RW", "AM", "WM", "LM", "RM"]
+DEFENSIVE_ROLES = ["DF", "FB", "LB", "RB", "CB", "DM", "GK"]
+MIDFIELD_ROLES = ["MF", "CM"]
+# Role categories whose Role_Based_Score makes up analyze_team_role_composition's strengths
+STRENGTH_CATEGORIES = {"attacker_strength": "Attackers", "midfielder_strength": "Midfielders",
+                       "defender_strength": "Defenders"}
+# Goals per side of the score matrix, as in get_betting_suggestions_and_markets
+MAX_GOALS = 6
+# compute_match_lambdas inputs besides the two teams' features
+MATCH_INPUTS = ("team1_sentiment", "team2_sentiment", "home_team", "team1_pressure_data", "team2_pressure_data", "elo_diff")
+
+
+def _numeric(df, column):
+    return pd.to_numeric(df[column], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+
+def _split_names(text):
+    return [name.strip() for name in text.split(";") if name.strip()] if text else []
+
+
+def poisson_markets(lambda_home, lambda_away, home_attack, away_attack, max_goals=MAX_GOALS):
+    """Match markets for arrays of lambdas, with the definitions get_betting_suggestions_and_markets uses
+    (1X2 from the truncated Poisson score matrix, Over 2.5 from its expected goals, BTTS from attack strengths)"""
+    goals = np.arange(max_goals + 1)
+    factorials = np.array([math.factorial(k) for k in goals], dtype=float)
+    lambda_home = np.asarray(lambda_home, dtype=float)[:, None]
+    lambda_away = np.asarray(lambda_away, dtype=float)[:, None]
+    home_pmf = lambda_home ** goals * np.exp(-lambda_home) / factorials
+    away_pmf = lambda_away ** goals * np.exp(-lambda_away) / factorials
+    matrix = home_pmf[:, :, None] * away_pmf[:, None, :]
+
+    difference = goals[:, None] - goals[None, :]
+    exp_goals = (matrix * (goals[:, None] + goals[None, :])).sum(axis=(1, 2))
+    btts = (np.asarray(home_attack, dtype=float) + np.asarray(away_attack, dtype=float)) * 0.8
+    return pd.DataFrame({
+        "home_win": (matrix * (difference > 0)).sum(axis=(1, 2)),
+        "draw": (matrix * (difference == 0)).sum(axis=(1, 2)),
+        "away_win": (matrix * (difference < 0)).sum(axis=(1, 2)),
+        "exp_goals": exp_goals,
+        "over_2_5": np.where(exp_goals > 2.5, 0.65, 0.35),
+        "btts_yes": np.minimum(btts, 0.9),
+    })
+
+
+class LineupEngine:
+    """Team features from per-player contributions, for pricing lineup and absentee scenarios.
+
+    Every player-derived input of the goal model (goal and xG totals, role counts,
+    role-based scores) is a sum over the squad, so each player's contribution is
+    stored as one row of a per-team array. Leaving players out subtracts their rows
+    from the squad totals, and a named lineup sums only its own rows, so a scenario
+    costs O(players changed) rather than a re-filter of the player sheet.
+    """
+
+    def __init__(self, player_df, form_data=None, params=None):
+        self.params = params
+        columns = player_df.columns
+        self.has_roles = "Role" in columns
+        self.has_npxg = "npxG" in columns
+        self.has_role_scores = "Role_Category" in columns and "Role_Based_Score" in columns
+        self.categories = sorted(player_df["Role_Category"].dropna().unique()) if "Role_Category" in columns else []
+        creative = "Creative_Threat" if "Creative_Threat" in columns else "xA"
+
+        self.components = ["goals", "xg", "npxg", "creative", "players", "attack_roles", "defense_roles",
+                           "midfield_roles", "attacker_strength", "midfielder_strength", "defender_strength"]
+        self.components += [f"category:{category}" for category in self.categories]
+        self.index = {name: i for i, name in enumerate(self.components)}
+
+        self.contributions = {}
+        self.totals = {}
+        self.players = {}
+        self.base = {}
+        for team, team_df in player_df.groupby("Team", sort=False):
+            values = np.zeros((len(team_df), len(self.components)))
+            column = lambda name: values[:, self.index[name]]
+            column("goals")[:] = _numeric(team_df, "Goals")
+            column("xg")[:] = _numeric(team_df, "xG")
+            if self.has_npxg:
+                column("npxg")[:] = _numeric(team_df, "npxG")
+            column("creative")[:] = _numeric(team_df, creative)
+            column("players")[:] = 1.0
+            if self.has_roles:
+                column("attack_roles")[:] = team_df["Role"].isin(ATTACKING_ROLES)
+                column("defense_roles")[:] = team_df["Role"].isin(DEFENSIVE_ROLES)
+                column("midfield_roles")[:] = team_df["Role"].isin(MIDFIELD_ROLES)
+            if self.has_role_scores:
+                scores = _numeric(team_df, "Role_Based_Score")
+                for strength, category in STRENGTH_CATEGORIES.items():
+                    column(strength)[:] = np.where(team_df["Role_Category"] == category, scores, 0.0)
+            else:
+                column("attacker_strength")[:] = column("goals") + _numeric(team_df, "Assists")
+                column("midfielder_strength")[:] = _numeric(team_df, "xA")
+                if "Progressive_Passes" in columns:
+                    column("midfielder_strength")[:] += _numeric(team_df, "Progressive_Passes") * 0.1
+                if "Defense_Index" in columns:
+                    column("defender_strength")[:] = _numeric(team_df, "Defense_Index")
+            for category in self.categories:
+                column(f"category:{category}")[:] = team_df["Role_Category"] == category
+
+            self.contributions[team] = values
+            self.totals[team] = values.sum(axis=0)
+            self.players[team] = {}
+            for row, player in enumerate(team_df["Player"].astype(str)):
+                self.players[team].setdefault(player, []).append(row)
+            # Form and the corner profile are not rebuilt per lineup (the corner profile only
+            # feeds the estimated corner fallback, never the lambdas)
+            self.base[team] = {
+                "name": team,
+                "form": analyze_team_form(team, form_data) if form_data else None,
+                "corner_profile": analyze_team_corner_profile(team_df),
+            }
+        self._full = {}
+
+    def __contains__(self, team):
+        return team in self.contributions
+
+    def squad(self, team):
+        """Player names of a team, in sheet order"""
+        return list(self.players[team])
+
+    def rows(self, team, names):
+        """Row positions of the named players of a team (exact names, else case-insensitive), each once"""
+        players = self.players[team]
+        rows = []
+        for name in names:
+            if name not in players:
+                matches = [player for player in players if player.casefold() == str(name).casefold()]
+                if not matches:
+                    raise ValueError(f"{name} is not in the {team} squad")
+                name = matches[0]
+            rows.extend(players[name])
+        return list(dict.fromkeys(rows))
+
+    def totals_for(self, team, absent=(), lineup=None):
+        """Aggregate contributions of a lineup, or of the squad less its absentees"""
+        if lineup is not None:
+            return self.contributions[team][self.rows(team, lineup)].sum(axis=0)
+        if not absent:
+            return self.totals[team]
+        return self.totals[team] - self.contributions[team][self.rows(team, absent)].sum(axis=0)
+
+    def features_from_totals(self, team, totals):
+        """team_features of the players whose contributions add up to totals"""
+        total = dict(zip(self.components, totals.tolist()))
+        players = round(total["players"])
+        base = self.base[team]
+        if players <= 0:
+            empty = pd.DataFrame()
+            return {"name": team, "goals": 0.0, "xg": 0.0, "style": analyze_team_style(empty),
+                    "xg_profile": analyze_team_xg_profile(empty), "roles": analyze_team_role_composition(empty),
+                    "form": base["form"], "corner_profile": base["corner_profile"]}
+
+        goals, xg = total["goals"], total["xg"]
+        if self.has_roles:
+            attack_ratio = total["attack_roles"] / players
+            defense_ratio = total["defense_roles"] / players
+            midfield_ratio = total["midfield_roles"] / players
+            if attack_ratio > 0.4:
+                style = "Attacking"
+            elif defense_ratio > 0.4:
+                style = "Defensive"
+            elif midfield_ratio > 0.4:
+                style = "Possession-based"
+            else:
+                style = "Balanced"
+        else:
+            style, attack_ratio, defense_ratio = "Balanced", 0.33, 0.33
+
+        xg_efficiency = goals / xg if xg > 0 else 0.5
+        penalty_reliance = (xg - total["npxg"]) / max(xg, 1) if self.has_npxg else 0.0
+
+        if self.categories:
+            counts = {category: total[f"category:{category}"] for category in self.categories}
+            role_distribution = {category: count / players
+                                 for category, count in sorted(counts.items(), key=lambda item: -item[1]) if count > 0}
+        else:
+            role_distribution = {"Attackers": 0.33, "Midfielders": 0.33, "Defenders": 0.33}
+        strengths = {
+            "Attacking": total["attacker_strength"],
+            "Midfield Control": total["midfielder_strength"],
+            "Defensive Solidarity": total["defender_strength"],
+        }
+        any_strength = any(strengths.values())
+        if role_distribution.get("Attackers", 0) > 0.35:
+            playing_style = "Attacking"
+        elif role_distribution.get("Defenders", 0) > 0.35:
+            playing_style = "Defensive"
+        elif role_distribution.get("Midfielders", 0) > 0.35:
+            playing_style = "Possession-based"
+        else:
+            playing_style = "Balanced"
+
+        return {
+            "name": team,
+            "goals": goals,
+            "xg": xg,
+            "style": {"style": style, "attack_strength": attack_ratio, "defense_strength": defense_ratio},
+            "xg_profile": {
+                "xg_efficiency": min(xg_efficiency, 2.0),
+                "penalty_reliance": min(max(penalty_reliance, 0), 1),
+                "creative_threat": total["creative"] / players / 10,
+            },
+            "roles": {
+                "role_distribution": role_distribution,
+                "primary_strength": max(strengths, key=strengths.get) if any_strength else "Unknown",
+                "weakness": min(strengths, key=strengths.get) if any_strength else "Unknown",
+                "playing_style": playing_style,
+                "attacker_strength": strengths["Attacking"],
+                "midfielder_strength": strengths["Midfield Control"],
+                "defender_strength": strengths["Defensive Solidarity"],
+            },
+            "form": base["form"],
+            "corner_profile": base["corner_profile"],
+        }
+
+    def team_features(self, team, absent=(), lineup=None):
+        """team_features for a lineup, or for the squad without the absent players"""
+        if lineup is None and not absent:
+            if team not in self._full:
+                self._full[team] = self.features_from_totals(team, self.totals[team])
+            return self._full[team]
+        return self.features_from_totals(team, self.totals_for(team, absent, lineup))
+
+    def lambdas(self, home, away, home_absent=(), away_absent=(), home_lineup=None, away_lineup=None, **match_inputs):
+        """(lambda_home, lambda_away, home_features, away_features) of one lineup scenario;
+        match_inputs are the other compute_match_lambdas arguments (see MATCH_INPUTS)"""
+        home_features = self.team_features(home, home_absent, home_lineup)
+        away_features = self.team_features(away, away_absent, away_lineup)
+        lambda_home, lambda_away = compute_match_lambdas(home_features, away_features, params=self.params,
+                                                         verbose=False, **match_inputs)
+        return lambda_home, lambda_away, home_features, away_features
+
+    def price_scenarios(self, home, away, scenarios, **match_inputs):
+        """Lambdas and markets of each scenario, a dict of home_absent, away_absent, home_lineup
+        and away_lineup (all optional) plus an optional 'scenario' label"""
+        rows = []
+        for i, scenario in enumerate(scenarios):
+            lambda_home, lambda_away, home_features, away_features = self.lambdas(
+                home, away, scenario.get("home_absent", ()), scenario.get("away_absent", ()),
+                scenario.get("home_lineup"), scenario.get("away_lineup"), **match_inputs)
+            rows.append((scenario.get("scenario", i), lambda_home, lambda_away,
+                         home_features["style"]["attack_strength"], away_features["style"]["attack_strength"]))
+        table = pd.DataFrame(rows, columns=["scenario", "lambda_home", "lambda_away", "home_attack", "away_attack"])
+        markets = poisson_markets(table["lambda_home"], table["lambda_away"], table["home_attack"], table["away_attack"])
+        return pd.concat([table.drop(columns=["home_attack", "away_attack"]), markets], axis=1)
+
+    def absence_impacts(self, home, away, home_absent=(), away_absent=(), **match_inputs):
+        """Each player's effect on the fixture when they miss it (on top of any known absentees),
+        sorted by the change in the home win probability"""
+        scenarios = [{"scenario": "as named", "home_absent": list(home_absent), "away_absent": list(away_absent)}]
+        for side, team, absent in (("home", home, home_absent), ("away", away, away_absent)):
+            missing = set(self.rows(team, absent))
+            for player in self.squad(team):
+                if missing.issuperset(self.players[team][player]):
+                    continue
+                scenario = dict(scenarios[0], scenario=f"{team}: {player}")
+                scenario[f"{side}_absent"] = list(absent) + [player]
+                scenarios.append(scenario)
+        table = self.price_scenarios(home, away, scenarios, **match_inputs)
+        base = table.iloc[0]
+        for column in ("lambda_home", "lambda_away", "home_win", "draw", "away_win"):
+            table[f"d_{column}"] = table[column] - base[column]
+        impacts = table.iloc[1:].sort_values("d_home_win", key=abs, ascending=False, kind="stable")
+        return pd.concat([table.iloc[:1], impacts]).reset_index(drop=True)
+
+
+def main(argv=None):
+    from main import (PARAMS_FILE, ELO_FILE, load_league_data, load_predictor_params, load_elo_ratings,
+                      find_team_match, get_fixture_inputs, elo_difference)
+
+    parser = argparse.ArgumentParser(description="Reprice a fixture for lineup and absentee scenarios")
+    parser.add_argument("--home", required=True, help="Home team")
+    parser.add_argument("--away", required=True, help="Away team")
+    parser.add_argument("--home-out", default="", help="Home players missing the match, separated by ';'")
+    parser.add_argument("--away-out", default="", help="Away players missing the match, separated by ';'")
+    parser.add_argument("--impacts", action="store_true",
+                        help="Also price each further single-player absence and rank the players by impact")
+    parser.add_argument("--top", type=int, default=15, help="Players listed with --impacts")
+    parser.add_argument("--params", default=PARAMS_FILE, help="JSON of tuned predictor parameters")
+    parser.add_argument("--elo", default=ELO_FILE, help="Elo ratings file (from elo_engine.py)")
+    parser.add_argument("--out", help="Write the priced scenarios to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            team_df, player_df, corner_data, form_data = load_league_data()
+            engine = LineupEngine(player_df, form_data, params=load_predictor_params(args.params))
+            elo = load_elo_ratings(args.elo)
+    except Exception as e:
+        print("❌ Failed to load data:", e, file=sys.stderr)
+        sys.exit(1)
+
+    teams = list(engine.contributions)
+    home, away = find_team_match(args.home, teams), find_team_match(args.away, teams)
+    inputs = get_fixture_inputs(home, away, team_df, player_df) if home and away else None
+    if inputs is None:
+        print(f"❌ Could not find squads for {args.home} vs {args.away}", file=sys.stderr)
+        sys.exit(1)
+    match_inputs = {name: inputs[name] for name in MATCH_INPUTS if name in inputs}
+    match_inputs["elo_diff"] = elo_difference(elo, home, away)
+    home_absent, away_absent = _split_names(args.home_out), _split_names(args.away_out)
+
+    try:
+        start = time.perf_counter()
+        scenarios = [{"scenario": "full squads"},
+                     {"scenario": "as named", "home_absent": home_absent, "away_absent": away_absent}]
+        table = engine.price_scenarios(home, away, scenarios, **match_inputs)
+        if args.impacts:
+            impacts = engine.absence_impacts(home, away, home_absent, away_absent, **match_inputs)
+            table = pd.concat([table.iloc[:1], impacts], ignore_index=True)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        print("❌", e, file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n--- 👥 LINEUP SCENARIOS: {home} vs {away} ({len(table)} scenarios, {elapsed * 1000:.1f} ms) ---")
+    shown = table.head(2 + args.top) if args.impacts else table
+    print(shown.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"💾 Scenarios saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
 import os, sys
+import json
+import argparse
 import pandas as pd
 from team_data_collector import load_team_data
+from league_rules import load_league_rules
+from standings_engine import live_standings
+from elo_engine import EloRatings
+from stage_timer import timed
+from sheet_io import find_sheet
+from profiling import start_profiling
 from player_data_collector import load_player_data
 from match_predictor import (
     analyze_team_strength, 
@@ -9,8 +17,44 @@ from match_predictor import (
     load_corner_data,  # ADD THIS LINE
     load_form_data     # ADD THIS LINE
 )
+from prediction_cache import PredictionCache
+from calibration import Calibrator
+from feature_store import open_feature_store
+from odds_ingestion import load_odds_snapshots
+from odds_store import OddsStore, MANIFEST_FILE, is_odds_store
+from value_scanner import best_odds_dict
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEAGUE_NAME = "Seria A"
+CACHE_FILE = os.path.join(BASE_DIR, "prediction_cache.sqlite")
+
+TEAM_FILE = os.path.join(BASE_DIR, "ItalySeria Sentiment table.xlsx")
+PLAYER_FILE = os.path.join(BASE_DIR, "FutBall.xlsx")
+CORNER_FILE = os.path.join(BASE_DIR, "Italy Corner.xlsx")
+FORM_FILE = os.path.join(BASE_DIR, "Italy Form.xlsx")
+SOURCE_FILES = [TEAM_FILE, PLAYER_FILE, CORNER_FILE, FORM_FILE]
+# Optional per-fixture odds; without it value bets use BETTING_ODDS
+ODDS_FILE = os.path.join(BASE_DIR, "odds_snapshot.csv")
+# Odds history collected with odds_store.py; preferred over ODDS_FILE when present
+ODDS_STORE = os.path.join(BASE_DIR, "odds_store")
+# How the bookmaker margin is removed before measuring value (see devig.py)
+MARGIN_METHOD = "shin"
+# Tuned model constants written by param_search.py; DEFAULT_PARAMS are used without it
+PARAMS_FILE = os.path.join(BASE_DIR, "predictor_params.json")
+# Probability calibration tables written by calibration.py; raw probabilities without it
+CALIBRATION_FILE = os.path.join(BASE_DIR, "calibration.json")
+# Per-league season length, European and relegation places (see league_rules.py)
+RULES_FILE = os.path.join(BASE_DIR, "league_rules.json")
+# Results played since the team sheet was exported, applied on load (see standings_engine.py)
+RESULTS_STREAM = os.path.join(BASE_DIR, "results_stream.jsonl")
+# Club Elo ratings maintained with elo_engine.py; ratings play no part without it
+ELO_FILE = os.path.join(BASE_DIR, "elo_ratings.json")
+# Squad names already reported as having no Elo rating (warned once each)
+_ELO_MISSES = set()
+# Materialized per-team features, one version per data refresh (see feature_store.py)
+FEATURE_STORE = os.path.join(BASE_DIR, "feature_store")
+# Timestamped cProfile/tracemalloc report directories of --profile runs (see profiling.py)
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
 
 def normalize_team_name(team_name):
     """Normalize team name for comparison - handle case, spaces, punctuation"""
@@ -52,27 +96,213 @@ def find_team_match(user_input, available_teams):
     
     return None
 
+def league_source_files(data_dir=None):
+    """The team, player, corner and form files, inside data_dir when given.
+
+    A sheet missing as .xlsx is looked up as .parquet or .csv (see sheet_io.py).
+    """
+    if not data_dir:
+        return [find_sheet(filepath) for filepath in SOURCE_FILES]
+    return [find_sheet(os.path.join(data_dir, os.path.basename(filepath))) for filepath in SOURCE_FILES]
+
+def league_fingerprint_files(data_dir=None):
+    """Every file the league's team data depends on: the source files, league rules and (live data only) results stream"""
+    return league_source_files(data_dir) + [RULES_FILE] + ([] if data_dir else [RESULTS_STREAM])
+
+@timed("load_league_data")
+def load_league_data(data_dir=None):
+    """Load team, player, corner and form data for the league.
+
+    data_dir points at another folder holding the same four files (e.g. a dated
+    snapshot used for backtesting); by default the files next to this script are used.
+    """
+    team_file, player_file, corner_file, form_file = league_source_files(data_dir)
+    rules = load_league_rules(RULES_FILE)
+    team_df = load_team_data(team_file, LEAGUE_NAME, rules)
+    # Snapshots are taken as they were; only the live table follows the results stream
+    if not data_dir and os.path.exists(RESULTS_STREAM):
+        team_df = live_standings(team_df, RESULTS_STREAM, LEAGUE_NAME, rules)
+    player_df = load_player_data(player_file)
+    corner_data = load_corner_data(corner_file)
+    form_data = load_form_data(form_file)
+    return team_df, player_df, corner_data, form_data
+
+def load_predictor_params(filepath=PARAMS_FILE):
+    """Parameter overrides for the predictor, or None if the default file does not exist;
+    any other missing file was asked for explicitly and is an error"""
+    if not os.path.exists(filepath):
+        if os.path.abspath(filepath) == os.path.abspath(PARAMS_FILE):
+            return None
+        raise FileNotFoundError(f"Predictor parameters file not found: {filepath}")
+    with open(filepath) as f:
+        params = json.load(f)
+    print(f"🎛️ Using tuned predictor parameters from {os.path.basename(filepath)}")
+    return params
+
+def load_calibrator(filepath=CALIBRATION_FILE):
+    """Calibration tables for the predictor, or None if the file does not exist"""
+    if not os.path.exists(filepath):
+        return None
+    calibrator = Calibrator.load(filepath)
+    print(f"🎚️ Calibrating {len(calibrator.tables)} markets with {os.path.basename(filepath)}")
+    return calibrator
+
+def load_elo_ratings(filepath=ELO_FILE):
+    """Saved Elo ratings, or None if the file does not exist"""
+    if not os.path.exists(filepath):
+        return None
+    elo = EloRatings.load(filepath)
+    print(f"📈 Using Elo ratings of {len(elo)} teams from {os.path.basename(filepath)}")
+    return elo
+
+def elo_team(elo, team_name):
+    """The rated team a squad name refers to (names may differ from the results file), or None"""
+    if team_name in elo:
+        return team_name
+    rated = find_team_match(team_name, elo.ratings)
+    if rated is None and team_name not in _ELO_MISSES:
+        _ELO_MISSES.add(team_name)
+        print(f"⚠️ No Elo rating for {team_name}, predicting its fixtures without Elo")
+    return rated
+
+def elo_difference(elo, home_team, away_team):
+    """Home minus away rating, or None without ratings for both teams"""
+    if elo is None:
+        return None
+    home_rated, away_rated = elo_team(elo, home_team), elo_team(elo, away_team)
+    if home_rated is None or away_rated is None:
+        return None
+    return elo.diff(home_rated, away_rated)
+
+def default_odds_sources():
+    """The odds store if one exists, otherwise the snapshot file if it exists"""
+    if is_odds_store(ODDS_STORE):
+        return [ODDS_STORE]
+    return [ODDS_FILE] if os.path.exists(ODDS_FILE) else []
+
+def odds_cache_sources(odds_files):
+    """Files whose changes must invalidate cached predictions (a store's manifest)"""
+    return [os.path.join(path, MANIFEST_FILE) if is_odds_store(path) else path for path in odds_files]
+
+def load_odds_book(odds_files=None):
+    """Load the latest odds from snapshot files or an odds store, or return None if there are none"""
+    if odds_files is None:
+        odds_files = default_odds_sources()
+    if not odds_files:
+        return None
+    stores = [path for path in odds_files if is_odds_store(path)]
+    if stores:
+        if len(odds_files) > 1:
+            raise ValueError("An odds store must be the only odds source")
+        print(f"📂 Loading latest odds from store: {stores[0]}")
+        book = OddsStore(stores[0]).latest()
+        print(f"✅ {len(book)} latest prices for {len(book.fixtures())} fixtures")
+        return book
+    return load_odds_snapshots(odds_files)
+
+def fixture_odds(odds_book, home_team, away_team, margin_method=MARGIN_METHOD):
+    """(odds_dict, fair_dict) of a fixture's best prices, each de-vigged within its own
+    bookmaker's book, or (None, None) without an odds book"""
+    if odds_book is None:
+        return None, None
+    return best_odds_dict(odds_book, home_team, away_team, margin_method)
+
+def team_inputs(team, team_df, player_df):
+    """Squad, sentiment score and pressure row (None when missing) of one matched team"""
+    players = player_df[player_df["Team"] == team]
+
+    # Get sentiment data using flexible matching
+    sent = team_df[team_df["Team"].apply(lambda x: find_team_match(x, [team]) == team)]
+    sentiment = float(sent["Sentiment_Score"].iloc[0]) if not sent.empty else None
+
+    # FIXED: Get pressure data for the team
+    pressure = team_df[team_df['Team'] == team].iloc[0].to_dict() if not team_df[team_df['Team'] == team].empty else None
+    return players, sentiment, pressure
+
+def get_fixture_inputs(t1_matched, t2_matched, team_df, player_df):
+    """Collect the per-team inputs for get_betting_suggestions_and_markets, or None if a squad is missing"""
+    t1_players, team1_sentiment, team1_pressure = team_inputs(t1_matched, team_df, player_df)
+    t2_players, team2_sentiment, team2_pressure = team_inputs(t2_matched, team_df, player_df)
+
+    if t1_players.empty or t2_players.empty:
+        return None
+
+    return {
+        "team1_df": t1_players,
+        "team2_df": t2_players,
+        "team1_sentiment": team1_sentiment,
+        "team2_sentiment": team2_sentiment,
+        "home_team": t1_matched,
+        "team1_pressure_data": team1_pressure,
+        "team2_pressure_data": team2_pressure,
+    }
+
+def fixture_inputs(t1_matched, t2_matched, team_df, player_df, feature_store=None):
+    """get_fixture_inputs, read from the feature store when one is open"""
+    if feature_store is not None:
+        return feature_store.fixture_inputs(t1_matched, t2_matched, player_df)
+    return get_fixture_inputs(t1_matched, t2_matched, team_df, player_df)
+
+@timed("load_feature_store")
+def load_feature_store(team_df, player_df, form_data, data_dir=None, league=LEAGUE_NAME, root=FEATURE_STORE):
+    """The materialized team features for the current data, or None if the store cannot be built"""
+    try:
+        # Dated snapshots share a league folder, so only the live data prunes old versions
+        return open_feature_store(root, league, league_fingerprint_files(data_dir), team_df, player_df, form_data,
+                                  keep_versions=None if data_dir else 2)
+    except Exception as e:
+        print("⚠️ Feature store unavailable, computing team features per fixture:", e)
+        return None
+
 # In your main function, update the data loading section:
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Interactive {LEAGUE_NAME} predictions")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, metavar="DIR",
+                        help="Profile each pipeline stage (cProfile and tracemalloc) into a timestamped directory under DIR")
+    args = parser.parse_args(argv)
+    if args.profile:
+        start_profiling(args.profile, "league")
+
     print("======================================")
-    print(" ⚽ Seria A Prediction System")
+    print(f" ⚽ {LEAGUE_NAME} Prediction System")
     print("======================================\n")
 
-    team_file = os.path.join(BASE_DIR, "ItalySeria Sentiment table.xlsx")
-    player_file = os.path.join(BASE_DIR, "FutBall.xlsx")
-    corner_file = os.path.join(BASE_DIR, "Italy Corner.xlsx")
-    form_file = os.path.join(BASE_DIR, "Italy Form.xlsx")  # ADD THIS LINE
-
     # load all data
     try:
-        team_df = load_team_data(team_file)
-        player_df = load_player_data(player_file)
-        corner_data = load_corner_data(corner_file)
-        form_data = load_form_data(form_file)  # ADD THIS LINE
+        team_df, player_df, corner_data, form_data = load_league_data()
     except Exception as e:
         print("❌ Failed to load data:", e)
         sys.exit(1)
 
+    feature_store = load_feature_store(team_df, player_df, form_data)
+
+    try:
+        odds_book = load_odds_book()
+    except Exception as e:
+        print("⚠️ Failed to load odds snapshot, using default odds:", e)
+        odds_book = None
+
+    try:
+        params = load_predictor_params()
+    except Exception as e:
+        print("⚠️ Failed to load tuned parameters, using defaults:", e)
+        params = None
+
+    try:
+        calibrator = load_calibrator()
+    except Exception as e:
+        print("⚠️ Failed to load calibration tables, using raw probabilities:", e)
+        calibrator = None
+
+    try:
+        elo = load_elo_ratings()
+    except Exception as e:
+        print("⚠️ Failed to load Elo ratings, predicting without them:", e)
+        elo = None
+
+    # Full predictions are cached per fixture and dropped when any input sheet changes
+    cache_sources = league_fingerprint_files() + [CALIBRATION_FILE, ELO_FILE] + (odds_cache_sources(default_odds_sources()) if odds_book is not None else [])
+    cache = PredictionCache(LEAGUE_NAME, source_files=cache_sources, path=CACHE_FILE)
 
     print("\n--- Team sentiment (top 10) ---")
     print(team_df.sort_values("Sentiment_Score", ascending=False)[["Team", "Sentiment_Score"]].head(10).to_string(index=False))
@@ -127,44 +357,40 @@ def main():
         print(f"🔍 Found: '{t1_input}' -> '{t1_matched}'")
         print(f"🔍 Found: '{t2_input}' -> '{t2_matched}'")
 
-        # Get player data using matched names
-        t1_players = player_df[player_df["Team"] == t1_matched]
-        t2_players = player_df[player_df["Team"] == t2_matched]
-
-        # Get sentiment data using flexible matching
-        t1_sent = team_df[team_df["Team"].apply(lambda x: find_team_match(x, [t1_matched]) == t1_matched)]
-        t2_sent = team_df[team_df["Team"].apply(lambda x: find_team_match(x, [t2_matched]) == t2_matched)]
-
-        if t1_players.empty or t2_players.empty:
+        inputs = fixture_inputs(t1_matched, t2_matched, team_df, player_df, feature_store)
+        if inputs is None:
             print("❌ Could not find player data for the matched teams.")
             continue
 
-        team1_sentiment = float(t1_sent["Sentiment_Score"].iloc[0]) if not t1_sent.empty else None
-        team2_sentiment = float(t2_sent["Sentiment_Score"].iloc[0]) if not t2_sent.empty else None
-
         print(f"\nComparing {t1_matched} vs {t2_matched}\n")
 
         # Show strength tables
-        s = analyze_team_strength(pd.concat([t1_players, t2_players]))
+        s = analyze_team_strength(pd.concat([inputs["team1_df"], inputs["team2_df"]]))
         print(s[s["Team"].isin([t1_matched, t2_matched])].to_string(index=False))
 
-        # FIXED: Get pressure data for both teams
-        team1_pressure = team_df[team_df['Team'] == t1_matched].iloc[0].to_dict() if not team_df[team_df['Team'] == t1_matched].empty else None
-        team2_pressure = team_df[team_df['Team'] == t2_matched].iloc[0].to_dict() if not team_df[team_df['Team'] == t2_matched].empty else None
-
         # Get predictions & betting suggestions with pressure data AND corner data
 
         # Update the function call:
-        suggestions, markets, confidence, value_bets = get_betting_suggestions_and_markets(
-            t1_players, t2_players,
-            team1_sentiment=team1_sentiment,
-            team2_sentiment=team2_sentiment,
-            home_team=t1_matched,
-            team1_pressure_data=team1_pressure,
-            team2_pressure_data=team2_pressure,
-            corner_data=corner_data,
-            form_data=form_data  # ADD THIS LINE
-        )
+        cache_params = {"margin_method": MARGIN_METHOD, "params": params}
+        cached = cache.get(t1_matched, t2_matched, cache_params)
+        if cached is not None:
+            print("♻️ Using cached prediction (input data unchanged)")
+        else:
+            odds_dict, fair_dict = fixture_odds(odds_book, t1_matched, t2_matched)
+            cached = get_betting_suggestions_and_markets(
+                **inputs,
+                corner_data=corner_data,
+                form_data=form_data,  # ADD THIS LINE
+                return_details=True,
+                odds_dict=odds_dict,
+                fair_dict=fair_dict,
+                margin_method=MARGIN_METHOD,
+                params=params,
+                calibrator=calibrator,
+                elo_diff=elo_difference(elo, t1_matched, t2_matched)
+            )
+            cache.put(t1_matched, t2_matched, cached, cache_params)
+        suggestions, markets, confidence, value_bets, details = cached
         
         print("\n=========================")
         print("📈 BETTING SUGGESTIONS")
@@ -193,6 +419,12 @@ def main():
                 print(f"   Our Probability: {bet['our_probability']} | Implied: {bet['implied_probability']}")
                 print(f"   Value: {bet['value']} | Expected Value: {bet['expected_value']:.3f}")
 
+    stats = cache.stats()
+    print(f"\n♻️ Prediction cache: {stats['hit_rate']:.0%} hit rate "
+          f"({stats['memory_hits']} memory / {stats['disk_hits']} disk / {stats['misses']} misses), "
+          f"{stats['memory_entries']} in memory, {stats['disk_entries']} on disk ({stats['disk_bytes'] / 1024:.0f} KB)")
+    cache.close()
+
     print("\nGoodbye.")
     sys.exit(0)
 
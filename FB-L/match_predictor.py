@@ -1,6 +1,12 @@
 import pandas as pd
 import math
 from collections import defaultdict
+from portfolio_kelly import fixture_portfolio_kelly
+from value_scanner import fair_odds_dict
+from player_props import fixture_player_props, player_market_probabilities
+from stage_timer import timed, laps
+from sheet_io import read_sheet
+from goal_timing import TIME_BANDS, half_ratios, goal_timing_probabilities, timing_markets
 
 # Actual betting odds data structure
 BETTING_ODDS = {
@@ -72,6 +78,43 @@ BETTING_ODDS = {
     }
 }
 
+# Tunable constants of the goal model (see compute_match_lambdas); param_search.py fits them
+DEFAULT_PARAMS = {
+    "base_lambda_home": 1.6,          # goals for the home side before adjustments
+    "base_lambda_away": 1.2,
+    "xg_weight": 0.8,                 # attack = goals + xg_weight * xG
+    "style_attack_weight": 0.2,
+    "form_weight": 0.3,               # ±30% based on form
+    "momentum_weight": 0.2,           # ±20% based on momentum
+    "role_attack_weight": 0.3,
+    "xg_efficiency_weight": 0.3,
+    "defense_weight": 0.3,
+    "role_defense_weight": 0.5,
+    "defense_form_weight": 0.4,       # ±40% based on defensive form
+    "champions_league_boost": 1.20,
+    "europa_league_boost": 1.15,
+    "relegation_boost": 1.15,
+    "home_advantage": 1.05,
+    "home_european_boost": 1.10,
+    "home_relegation_boost": 1.08,
+    "sentiment_slope": 0.004,
+    "relegation_sentiment_multiplier": 1.5,
+    "elo_weight": 0.0,                # lambdas scale by exp(±elo_weight * rating gap / 400); tuned by param_search --elo
+}
+
+EUROPEAN_LEVELS = ['HIGH_EUROPEAN', 'MODERATE_EUROPEAN']
+RELEGATION_LEVELS = ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']
+
+
+def resolve_params(params=None):
+    """DEFAULT_PARAMS with any overrides applied; unknown names are rejected"""
+    if not params:
+        return DEFAULT_PARAMS
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown predictor parameters: {sorted(unknown)}")
+    return {**DEFAULT_PARAMS, **params}
+
 def poisson(k, lam):
     """Calculate Poisson probability"""
     return lam**k * math.exp(-lam) / math.factorial(k)
@@ -103,9 +146,16 @@ def derive_match_probs_from_poisson(pm):
         "Top_scores": flat[:5],
     }
 
-def calculate_value_bets(our_probabilities, odds_dict, threshold=0.05):
-    """Calculate value bets based on our probabilities vs market odds"""
+def calculate_value_bets(our_probabilities, odds_dict, threshold=0.05, margin_method="shin", fair_dict=None):
+    """Calculate value bets based on our probabilities vs market odds.
+
+    The implied probability has the bookmaker margin removed with margin_method
+    (proportional, power, shin or odds_ratio); None keeps the raw 1 / odds. When the
+    odds are best prices across bookmakers, pass fair_dict with each price's own
+    book's margin-free probability (value_scanner.best_odds_dict).
+    """
     value_bets = []
+    fair = fair_dict if fair_dict is not None else fair_odds_dict(odds_dict, margin_method) if margin_method else None
     
     for market, probabilities in our_probabilities.items():
         if market in odds_dict:
@@ -113,7 +163,7 @@ def calculate_value_bets(our_probabilities, odds_dict, threshold=0.05):
                 if outcome in odds_dict[market]:
                     odds = odds_dict[market][outcome]
                     if odds > 0:  # Avoid division by zero
-                        implied_prob = 1 / odds
+                        implied_prob = fair.get(market, {}).get(outcome, 1 / odds) if fair else 1 / odds
                         value = our_prob - implied_prob
                         
                         if value > threshold:
@@ -124,7 +174,10 @@ def calculate_value_bets(our_probabilities, odds_dict, threshold=0.05):
                                 'implied_probability': f"{implied_prob:.1%}",
                                 'odds': odds,
                                 'value': f"+{value:.1%}",
-                                'expected_value': (odds - 1) * our_prob - (1 - our_prob)
+                                'expected_value': (odds - 1) * our_prob - (1 - our_prob),
+                                'probability': our_prob,
+                                'edge': value,
+                                'fair_probability': implied_prob
                             })
     
     return sorted(value_bets, key=lambda x: x['expected_value'], reverse=True)
@@ -290,10 +343,11 @@ def analyze_team_corner_profile(team_df):
         "corner_threat": set_piece_threat
     }
 
+@timed("load_corner_data")
 def load_corner_data(filepath="Italy Corner.xlsx"):
     """Load actual corner statistics from the provided Excel file"""
     try:
-        corner_df = pd.read_excel(filepath, sheet_name='Sheet1')
+        corner_df = read_sheet(filepath, 'Sheet1')
         
         # Clean column names and data
         corner_df.columns = [str(col).strip() for col in corner_df.columns]
@@ -330,10 +384,11 @@ def load_corner_data(filepath="Italy Corner.xlsx"):
         print(f"❌ Error loading corner data: {e}")
         return {}
 
+@timed("load_form_data")
 def load_form_data(filepath="Italy Form.xlsx"):
     """Load and process the form data from Italy Form.xlsx"""
     try:
-        form_df = pd.read_excel(filepath, sheet_name='Sheet1')
+        form_df = read_sheet(filepath, 'Sheet1')
         
         # Clean the data - skip metadata rows and find the actual table
         form_data = {}
@@ -518,15 +573,8 @@ def predict_corners(team1_corner_profile, team2_corner_profile, home_advantage=T
 def calculate_halftime_probabilities(lambda_home, lambda_away, team1_style, team2_style):
     """Calculate probabilities for scoring in each half"""
     # First half typically has 40-45% of total goals, second half 55-60%
-    first_half_ratio = 0.43
-    second_half_ratio = 0.57
-    
-    # Adjust based on team styles
-    if team1_style["style"] == "Attacking":
-        first_half_ratio += 0.05  # Attacking teams start strong
-    if team2_style["style"] == "Defensive":
-        first_half_ratio -= 0.03  # Defensive teams may hold out early
-    
+    first_half_ratio, second_half_ratio = half_ratios(team1_style, team2_style)
+
     # Calculate expected goals per half
     home_first_half = lambda_home * first_half_ratio
     home_second_half = lambda_home * second_half_ratio
@@ -692,16 +740,14 @@ def get_goal_expectation_analysis(eff1, eff2):
     return " | ".join(analyses)
 
 def estimate_player_goal_probs(team_df):
-    results = {}
+    """Season goal-threat score per player (xG + half the goals, scaled to the team's xG).
+
+    For match probabilities use player_props.fixture_player_props instead.
+    """
     total_xg = team_df["xG"].sum() or team_df["Goals"].sum() or 1
-    for _, r in team_df.iterrows():
-        score = r.get("xG", 0) + 0.5 * r.get("Goals", 0)
-        results[r["Player"]] = score
-    total = sum(results.values()) or 1
-    scale = total_xg / total
-    for k in results:
-        results[k] *= scale
-    return results
+    score = team_df.get("xG", 0) + 0.5 * team_df.get("Goals", 0)
+    total = score.sum() or 1
+    return dict(zip(team_df["Player"], score * (total_xg / total)))
 
 def analyze_team_role_composition(team_df):
     """Analyze team composition and role-based strengths"""
@@ -847,183 +893,218 @@ def compare_teams(team1_name, team2_name, team1_df=None, team2_df=None, player_d
     print(f"Predicted Stronger Team: {summary['Predicted_Stronger_Team']}")
     return summary
 
-def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None, team2_sentiment=None, home_team=None, team1_pressure_data=None, team2_pressure_data=None, corner_data=None, form_data=None):
-    if team1_df.empty or team2_df.empty:
-        raise ValueError("One of the team datasets is empty.")
+def team_features(team_df, form_data=None):
+    """Per-team inputs of the goal model; they depend only on the team's own data,
+    so batch consumers can compute them once per team and reuse them"""
+    team_name = team_df['Team'].iloc[0]
+    return {
+        "name": team_name,
+        "goals": float(team_df["Goals"].sum()),
+        "xg": float(team_df["xG"].sum()),
+        "style": analyze_team_style(team_df),
+        "xg_profile": analyze_team_xg_profile(team_df),
+        "roles": analyze_team_role_composition(team_df),
+        "form": analyze_team_form(team_name, form_data) if form_data else None,
+        "corner_profile": analyze_team_corner_profile(team_df),
+    }
 
-    # Get team names
-    team1_name = team1_df['Team'].iloc[0]
-    team2_name = team2_df['Team'].iloc[0]
+def compute_match_lambdas(team1_features, team2_features, team1_sentiment=None, team2_sentiment=None, home_team=None,
+                          team1_pressure_data=None, team2_pressure_data=None, params=None, verbose=True, elo_diff=None):
+    """Expected goals (lambda_home, lambda_away) from two teams' features and the model parameters.
 
-    # ENHANCED: Analyze team styles and xG profiles
-    team1_style = analyze_team_style(team1_df)
-    team2_style = analyze_team_style(team2_df)
-    team1_xg = analyze_team_xg_profile(team1_df)
-    team2_xg = analyze_team_xg_profile(team2_df)
-    
-    # NEW: Role-based team analysis
-    team1_roles = analyze_team_role_composition(team1_df)
-    team2_roles = analyze_team_role_composition(team2_df)
-    
-    # NEW: Form analysis
-    team1_form = analyze_team_form(team1_name, form_data) if form_data else None
-    team2_form = analyze_team_form(team2_name, form_data) if form_data else None
-    
-    # Print form analysis if available
-    if team1_form and team2_form:
-        print(f"📈 FORM ANALYSIS:")
-        print(f"   {team1_name}: {team1_form['form_rating']:.1%} form, {team1_form['strength_of_schedule']:.1%} SOS, Momentum: {team1_form['momentum']:.2f}")
-        print(f"   {team2_name}: {team2_form['form_rating']:.1%} form, {team2_form['strength_of_schedule']:.1%} SOS, Momentum: {team2_form['momentum']:.2f}")
-    
-    # Use REAL corner data instead of estimates
-    if corner_data is not None:
-        corner_prediction = predict_corners_with_real_data(team1_name, team2_name, corner_data, home_advantage=True)
-        print(f"📊 USING REAL CORNER DATA:")
-        print(f"   {team1_name}: {corner_prediction['expected_home_corners']:.1f} corners expected")
-        print(f"   {team2_name}: {corner_prediction['expected_away_corners']:.1f} corners expected")
-        print(f"   Total: {corner_prediction['expected_total_corners']:.1f} corners expected")
-        print(f"   Data Quality: {corner_prediction['data_quality']}")
-    else:
-        # Fallback to estimated corner data
-        team1_corners = analyze_team_corner_profile(team1_df)
-        team2_corners = analyze_team_corner_profile(team2_df)
-        corner_prediction = predict_corners(team1_corners, team2_corners, home_advantage=True)
-        print(f"⚠️ Using ESTIMATED corner data (fallback)")
-    
-    print(f"🎯 Team Styles: {team1_df['Team'].iloc[0]} = {team1_style['style']}, {team2_df['Team'].iloc[0]} = {team2_style['style']}")
-    print(f"📊 xG Analysis: {team1_df['Team'].iloc[0]} (Eff: {team1_xg['xg_efficiency']:.2f}, Pen: {team1_xg['penalty_reliance']:.2f})")
-    print(f"📊 xG Analysis: {team2_df['Team'].iloc[0]} (Eff: {team2_xg['xg_efficiency']:.2f}, Pen: {team2_xg['penalty_reliance']:.2f})")
-    
-    # NEW: Print role-based analysis
-    print(f"👥 {team1_df['Team'].iloc[0]} Role Analysis: {team1_roles['playing_style']} style, Primary: {team1_roles['primary_strength']}")
-    print(f"👥 {team2_df['Team'].iloc[0]} Role Analysis: {team2_roles['playing_style']} style, Primary: {team2_roles['primary_strength']}")
+    elo_diff is the home minus away rating from elo_engine; without it ratings play no part.
+    """
+    p = resolve_params(params)
+    team1_name, team2_name = team1_features["name"], team2_features["name"]
+    team1_style, team2_style = team1_features["style"], team2_features["style"]
+    team1_xg, team2_xg = team1_features["xg_profile"], team2_features["xg_profile"]
+    team1_roles, team2_roles = team1_features["roles"], team2_features["roles"]
+    team1_form, team2_form = team1_features["form"], team2_features["form"]
 
     # Enhanced strength calculation with role-based consideration AND FORM DATA
-    a1 = (team1_df["Goals"].sum() + 0.8 * team1_df["xG"].sum()) * (1 + team1_style["attack_strength"] * 0.2)
-    a2 = (team2_df["Goals"].sum() + 0.8 * team2_df["xG"].sum()) * (1 + team2_style["attack_strength"] * 0.2)
+    a1 = (team1_features["goals"] + p["xg_weight"] * team1_features["xg"]) * (1 + team1_style["attack_strength"] * p["style_attack_weight"])
+    a2 = (team2_features["goals"] + p["xg_weight"] * team2_features["xg"]) * (1 + team2_style["attack_strength"] * p["style_attack_weight"])
     
     # Apply form adjustments if available
     if team1_form:
-        a1 *= (1 + (team1_form["form_rating"] - 0.5) * 0.3)  # ±30% based on form
-        a1 *= (1 + (team1_form["momentum"] - 1.0) * 0.2)     # ±20% based on momentum
+        a1 *= (1 + (team1_form["form_rating"] - 0.5) * p["form_weight"])
+        a1 *= (1 + (team1_form["momentum"] - 1.0) * p["momentum_weight"])
     if team2_form:
-        a2 *= (1 + (team2_form["form_rating"] - 0.5) * 0.3)
-        a2 *= (1 + (team2_form["momentum"] - 1.0) * 0.2)
+        a2 *= (1 + (team2_form["form_rating"] - 0.5) * p["form_weight"])
+        a2 *= (1 + (team2_form["momentum"] - 1.0) * p["momentum_weight"])
     
     # Apply role-based adjustments
     total_strength_1 = max(team1_roles["attacker_strength"] + team1_roles["midfielder_strength"] + team1_roles["defender_strength"], 1)
     total_strength_2 = max(team2_roles["attacker_strength"] + team2_roles["midfielder_strength"] + team2_roles["defender_strength"], 1)
     
-    role_factor_1 = 1 + (team1_roles["attacker_strength"] / total_strength_1) * 0.3
-    role_factor_2 = 1 + (team2_roles["attacker_strength"] / total_strength_2) * 0.3
+    role_factor_1 = 1 + (team1_roles["attacker_strength"] / total_strength_1) * p["role_attack_weight"]
+    role_factor_2 = 1 + (team2_roles["attacker_strength"] / total_strength_2) * p["role_attack_weight"]
     
     a1 *= role_factor_1
     a2 *= role_factor_2
     
     # Apply xG efficiency adjustments
-    a1 *= (1 + (team1_xg["xg_efficiency"] - 1) * 0.3)
-    a2 *= (1 + (team2_xg["xg_efficiency"] - 1) * 0.3)
+    a1 *= (1 + (team1_xg["xg_efficiency"] - 1) * p["xg_efficiency_weight"])
+    a2 *= (1 + (team2_xg["xg_efficiency"] - 1) * p["xg_efficiency_weight"])
     
     # Defensive adjustments with role-based consideration AND FORM DATA
-    d1 = team1_style["defense_strength"] * 0.3 * (1 + team1_roles["defender_strength"] / total_strength_1 * 0.5)
-    d2 = team2_style["defense_strength"] * 0.3 * (1 + team2_roles["defender_strength"] / total_strength_2 * 0.5)
+    d1 = team1_style["defense_strength"] * p["defense_weight"] * (1 + team1_roles["defender_strength"] / total_strength_1 * p["role_defense_weight"])
+    d2 = team2_style["defense_strength"] * p["defense_weight"] * (1 + team2_roles["defender_strength"] / total_strength_2 * p["role_defense_weight"])
     
     # Apply defensive form adjustments
     if team1_form:
-        d1 *= (1 + (team1_form["defense_form"] - 0.5) * 0.4)  # ±40% based on defensive form
+        d1 *= (1 + (team1_form["defense_form"] - 0.5) * p["defense_form_weight"])
     if team2_form:
-        d2 *= (1 + (team2_form["defense_form"] - 0.5) * 0.4)
+        d2 *= (1 + (team2_form["defense_form"] - 0.5) * p["defense_form_weight"])
     
     total = max(a1 + a2, 1e-6)
     
     # Enhanced lambda calculation with style, xG, role, and form factors
-    lambda_home = 1.6 * (a1 / total) * (1 - d2)
-    lambda_away = 1.2 * (a2 / total) * (1 - d1)
+    lambda_home = p["base_lambda_home"] * (a1 / total) * (1 - d2)
+    lambda_away = p["base_lambda_away"] * (a2 / total) * (1 - d1)
 
-    # ENHANCED: Apply European qualification and relegation pressure adjustments
+    # ENHANCED: Apply European qualification and relegation pressure adjustments.
+    # One boost value is shared by both sides, so the away team's zone decides it
+    # when both chase Europe
     european_boost = 1.0
     relegation_boost = 1.0
     
-    if team1_pressure_data is not None:
-        pressure_level = team1_pressure_data.get('Pressure_Level', 'NEUTRAL')
-        total_pressure = team1_pressure_data.get('Total_Pressure', 0)
-        champions_league = team1_pressure_data.get('Champions_League_Zone', False)
-        europa_league = team1_pressure_data.get('Europa_League_Zone', False)
+    for team_name, pressure_data in ((team1_name, team1_pressure_data), (team2_name, team2_pressure_data)):
+        if pressure_data is None:
+            continue
+        pressure_level = pressure_data.get('Pressure_Level', 'NEUTRAL')
+        total_pressure = pressure_data.get('Total_Pressure', 0)
+        champions_league = pressure_data.get('Champions_League_Zone', False)
+        europa_league = pressure_data.get('Europa_League_Zone', False)
         
-        print(f"🎯 {team1_df['Team'].iloc[0]} Pressure Analysis: {pressure_level} (Pressure Score: {total_pressure})")
+        if verbose:
+            print(f"🎯 {team_name} Pressure Analysis: {pressure_level} (Pressure Score: {total_pressure})")
         
         # European qualification motivation boosts
-        if pressure_level in ['HIGH_EUROPEAN', 'MODERATE_EUROPEAN']:
+        if pressure_level in EUROPEAN_LEVELS:
             if champions_league:
-                european_boost = 1.20  # 20% boost for Champions League chase
-                print(f"   🏆 CHAMPIONS LEAGUE BOOST: {team1_df['Team'].iloc[0]} gets 20% motivation boost (UCL qualification)")
+                european_boost = p["champions_league_boost"]
+                if verbose:
+                    print(f"   🏆 CHAMPIONS LEAGUE BOOST: {team_name} gets {european_boost - 1:.0%} motivation boost (UCL qualification)")
             elif europa_league:
-                european_boost = 1.15  # 15% boost for Europa League chase
-                print(f"   🌍 EUROPA LEAGUE BOOST: {team1_df['Team'].iloc[0]} gets 15% motivation boost (UEFA qualification)")
+                european_boost = p["europa_league_boost"]
+                if verbose:
+                    print(f"   🌍 EUROPA LEAGUE BOOST: {team_name} gets {european_boost - 1:.0%} motivation boost (UEFA qualification)")
         
         # Relegation battle motivation boosts
-        elif pressure_level in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']:
-            relegation_boost = 1.15  # 15% boost due to desperation
-            print(f"   ⚡ RELEGATION BOOST: {team1_df['Team'].iloc[0]} gets 15% motivation boost (fighting for survival)")
-    
-    if team2_pressure_data is not None:
-        pressure_level = team2_pressure_data.get('Pressure_Level', 'NEUTRAL')
-        total_pressure = team2_pressure_data.get('Total_Pressure', 0)
-        champions_league = team2_pressure_data.get('Champions_League_Zone', False)
-        europa_league = team2_pressure_data.get('Europa_League_Zone', False)
-        
-        print(f"🎯 {team2_df['Team'].iloc[0]} Pressure Analysis: {pressure_level} (Pressure Score: {total_pressure})")
-        
-        if pressure_level in ['HIGH_EUROPEAN', 'MODERATE_EUROPEAN']:
-            if champions_league:
-                european_boost = 1.20
-                print(f"   🏆 CHAMPIONS LEAGUE BOOST: {team2_df['Team'].iloc[0]} gets 20% motivation boost (UCL qualification)")
-            elif europa_league:
-                european_boost = 1.15
-                print(f"   🌍 EUROPA LEAGUE BOOST: {team2_df['Team'].iloc[0]} gets 15% motivation boost (UEFA qualification)")
-        
-        elif pressure_level in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']:
-            relegation_boost = 1.15
-            print(f"   ⚡ RELEGATION BOOST: {team2_df['Team'].iloc[0]} gets 15% motivation boost (fighting for survival)")
+        elif pressure_level in RELEGATION_LEVELS:
+            relegation_boost = p["relegation_boost"]
+            if verbose:
+                print(f"   ⚡ RELEGATION BOOST: {team_name} gets {relegation_boost - 1:.0%} motivation boost (fighting for survival)")
 
     # Apply home advantage with European/relegation consideration
     if home_team:
-        lambda_home *= 1.05  # Base home advantage
+        lambda_home *= p["home_advantage"]  # Base home advantage
         
         # Home teams in European/relegation battles get extra boosts
         if team1_pressure_data:
             pressure_level = team1_pressure_data.get('Pressure_Level', 'NEUTRAL')
-            if pressure_level in ['HIGH_EUROPEAN', 'MODERATE_EUROPEAN']:
-                lambda_home *= 1.10  # Additional 5% for home teams chasing Europe
-                print(f"   🏠 HOME EUROPEAN BOOST: Extra 5% for home team chasing European qualification")
-            elif pressure_level in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']:
-                lambda_home *= 1.08  # Additional 3% for home teams in relegation battle
-                print(f"   🏠 HOME RELEGATION BOOST: Extra 3% for home team in relegation battle")
+            if pressure_level in EUROPEAN_LEVELS:
+                lambda_home *= p["home_european_boost"]
+                if verbose:
+                    print(f"   🏠 HOME EUROPEAN BOOST: Extra {p['home_european_boost'] - 1:.0%} for home team chasing European qualification")
+            elif pressure_level in RELEGATION_LEVELS:
+                lambda_home *= p["home_relegation_boost"]
+                if verbose:
+                    print(f"   🏠 HOME RELEGATION BOOST: Extra {p['home_relegation_boost'] - 1:.0%} for home team in relegation battle")
 
     # Apply sentiment adjustments with relegation consideration
     if team1_sentiment is not None and team2_sentiment is not None:
         diff = team1_sentiment - team2_sentiment
         # Teams under relegation pressure get amplified sentiment effects
-        sentiment_multiplier = 1.5 if (team1_pressure_data and team1_pressure_data.get('Pressure_Level') in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']) else 1.0
-        sentiment_multiplier = 1.5 if (team2_pressure_data and team2_pressure_data.get('Pressure_Level') in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']) else sentiment_multiplier
+        sentiment_multiplier = p["relegation_sentiment_multiplier"] if (team1_pressure_data and team1_pressure_data.get('Pressure_Level') in RELEGATION_LEVELS) else 1.0
+        sentiment_multiplier = p["relegation_sentiment_multiplier"] if (team2_pressure_data and team2_pressure_data.get('Pressure_Level') in RELEGATION_LEVELS) else sentiment_multiplier
         
-        lambda_home *= (1 + diff * 0.004 * sentiment_multiplier)
-        lambda_away *= (1 - diff * 0.004 * sentiment_multiplier)
+        lambda_home *= (1 + diff * p["sentiment_slope"] * sentiment_multiplier)
+        lambda_away *= (1 - diff * p["sentiment_slope"] * sentiment_multiplier)
 
     # Apply European motivation boosts
-    if team1_pressure_data and team1_pressure_data.get('Pressure_Level') in ['HIGH_EUROPEAN', 'MODERATE_EUROPEAN']:
+    if team1_pressure_data and team1_pressure_data.get('Pressure_Level') in EUROPEAN_LEVELS:
         lambda_home *= european_boost
-    if team2_pressure_data and team2_pressure_data.get('Pressure_Level') in ['HIGH_EUROPEAN', 'MODERATE_EUROPEAN']:
+    if team2_pressure_data and team2_pressure_data.get('Pressure_Level') in EUROPEAN_LEVELS:
         lambda_away *= european_boost
 
     # Apply relegation motivation boosts
-    if team1_pressure_data and team1_pressure_data.get('Pressure_Level') in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']:
+    if team1_pressure_data and team1_pressure_data.get('Pressure_Level') in RELEGATION_LEVELS:
         lambda_home *= relegation_boost
-    if team2_pressure_data and team2_pressure_data.get('Pressure_Level') in ['CRITICAL_RELEGATION', 'HIGH_RELEGATION']:
+    if team2_pressure_data and team2_pressure_data.get('Pressure_Level') in RELEGATION_LEVELS:
         lambda_away *= relegation_boost
 
+    # Results-based strength: the higher-rated side's expected goals grow with the rating gap
+    if elo_diff is not None:
+        elo_factor = math.exp(p["elo_weight"] * elo_diff / 400)
+        lambda_home *= elo_factor
+        lambda_away /= elo_factor
+        if verbose:
+            print(f"📈 Elo gap {elo_diff:+.0f}: home goals x{elo_factor:.2f}, away goals x{1 / elo_factor:.2f}")
+
+    return lambda_home, lambda_away
+
+@timed("predict")
+def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None, team2_sentiment=None, home_team=None, team1_pressure_data=None, team2_pressure_data=None, corner_data=None, form_data=None, return_details=False, odds_dict=None, margin_method="shin", params=None, calibrator=None, team1_features=None, team2_features=None, elo_diff=None, fair_dict=None):
+    if team1_df.empty or team2_df.empty:
+        raise ValueError("One of the team datasets is empty.")
+
+    lap = laps()
+    # Get team names
+    team1_name = team1_df['Team'].iloc[0]
+    team2_name = team2_df['Team'].iloc[0]
+
+    # ENHANCED: Analyze team styles, xG profiles, roles and form (unless materialized in a feature store)
+    if team1_features is None:
+        team1_features = team_features(team1_df, form_data)
+    if team2_features is None:
+        team2_features = team_features(team2_df, form_data)
+    team1_style, team1_xg = team1_features["style"], team1_features["xg_profile"]
+    team2_style, team2_xg = team2_features["style"], team2_features["xg_profile"]
+    team1_roles, team2_roles = team1_features["roles"], team2_features["roles"]
+    team1_form, team2_form = team1_features["form"], team2_features["form"]
+    lap("team_features")
+    
+    # Print form analysis if available
+    if team1_form and team2_form:
+        print(f"📈 FORM ANALYSIS:")
+        print(f"   {team1_name}: {team1_form['form_rating']:.1%} form, {team1_form['strength_of_schedule']:.1%} SOS, Momentum: {team1_form['momentum']:.2f}")
+        print(f"   {team2_name}: {team2_form['form_rating']:.1%} form, {team2_form['strength_of_schedule']:.1%} SOS, Momentum: {team2_form['momentum']:.2f}")
+    
+    # Use REAL corner data instead of estimates
+    if corner_data is not None:
+        corner_prediction = predict_corners_with_real_data(team1_name, team2_name, corner_data, home_advantage=True)
+        print(f"📊 USING REAL CORNER DATA:")
+        print(f"   {team1_name}: {corner_prediction['expected_home_corners']:.1f} corners expected")
+        print(f"   {team2_name}: {corner_prediction['expected_away_corners']:.1f} corners expected")
+        print(f"   Total: {corner_prediction['expected_total_corners']:.1f} corners expected")
+        print(f"   Data Quality: {corner_prediction['data_quality']}")
+    else:
+        # Fallback to estimated corner data
+        team1_corners = team1_features["corner_profile"]
+        team2_corners = team2_features["corner_profile"]
+        corner_prediction = predict_corners(team1_corners, team2_corners, home_advantage=True)
+        print(f"⚠️ Using ESTIMATED corner data (fallback)")
+    
+    print(f"🎯 Team Styles: {team1_df['Team'].iloc[0]} = {team1_style['style']}, {team2_df['Team'].iloc[0]} = {team2_style['style']}")
+    print(f"📊 xG Analysis: {team1_df['Team'].iloc[0]} (Eff: {team1_xg['xg_efficiency']:.2f}, Pen: {team1_xg['penalty_reliance']:.2f})")
+    print(f"📊 xG Analysis: {team2_df['Team'].iloc[0]} (Eff: {team2_xg['xg_efficiency']:.2f}, Pen: {team2_xg['penalty_reliance']:.2f})")
+    
+    # NEW: Print role-based analysis
+    print(f"👥 {team1_df['Team'].iloc[0]} Role Analysis: {team1_roles['playing_style']} style, Primary: {team1_roles['primary_strength']}")
+    print(f"👥 {team2_df['Team'].iloc[0]} Role Analysis: {team2_roles['playing_style']} style, Primary: {team2_roles['primary_strength']}")
+    lap("corners_and_analysis_printing")
+
+    lambda_home, lambda_away = compute_match_lambdas(
+        team1_features, team2_features, team1_sentiment, team2_sentiment, home_team,
+        team1_pressure_data, team2_pressure_data, params=params, elo_diff=elo_diff
+    )
+    lap("lambdas")
+
     pm = score_prob_matrix(lambda_home, lambda_away, max_goals=6)
     derived = derive_match_probs_from_poisson(pm)
+    lap("poisson_matrix")
 
     # Calculate half-time scoring probabilities
     halftime_probs = calculate_halftime_probabilities(lambda_home, lambda_away, team1_style, team2_style)
@@ -1034,6 +1115,7 @@ def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None
         team1_df['Team'].iloc[0], team2_df['Team'].iloc[0],
         team1_xg, team2_xg
     )
+    lap("halftime_and_key_scores")
 
     probs = {
         "Home Win": derived["P_home"],
@@ -1072,9 +1154,30 @@ def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None
             "Away Under 3.5": corner_prediction["probabilities"]["Away Under 3.5"]
         }
     }
+    # First goal and 15-minute band markets on the same half split
+    first_half_ratio, second_half_ratio = half_ratios(team1_style, team2_style)
+    timing = goal_timing_probabilities(lambda_home, lambda_away, first_half_ratio, second_half_ratio)
+    our_probabilities.update(timing_markets(timing))
+
+    # Map raw model probabilities onto observed frequencies (see calibration.py)
+    if calibrator is not None:
+        our_probabilities = calibrator.calibrate_probabilities(our_probabilities)
+    lap("market_probabilities")
 
-    # Calculate value bets
-    value_bets = calculate_value_bets(our_probabilities, BETTING_ODDS)
+    # Goalscorer and assist probabilities for every player of both squads
+    player_props = fixture_player_props(team1_df, team2_df, lambda_home, lambda_away)
+    lap("player_props")
+
+    player_probabilities = player_market_probabilities(player_props)
+    if calibrator is not None:
+        player_probabilities = calibrator.calibrate_probabilities(player_probabilities)
+
+    # Calculate value bets against this fixture's own prices when a snapshot is supplied
+    value_bets = calculate_value_bets({**our_probabilities, **player_probabilities},
+                                      odds_dict if odds_dict is not None else BETTING_ODDS,
+                                      margin_method=margin_method,
+                                      fair_dict=fair_dict if odds_dict is not None else None)
+    lap("value_bets")
 
     suggestions = defaultdict(list)
     suggestions["Match Result"].append(f"Predicted: {best} (P={probs[best]:.2f})")
@@ -1225,10 +1328,10 @@ def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None
         )
 
     # Top scorers with enhanced analysis
-    top1 = sorted(estimate_player_goal_probs(team1_df).items(), key=lambda x: x[1], reverse=True)[:3]
-    top2 = sorted(estimate_player_goal_probs(team2_df).items(), key=lambda x: x[1], reverse=True)[:3]
-    suggestions["Top Scorers Home"] = [f"{p} ({prob:.2f})" for p, prob in top1]
-    suggestions["Top Scorers Away"] = [f"{p} ({prob:.2f})" for p, prob in top2]
+    top1 = player_props[player_props["side"] == "home"].head(3)
+    top2 = player_props[player_props["side"] == "away"].head(3)
+    suggestions["Top Scorers Home"] = [f"{p} ({prob:.2f})" for p, prob in zip(top1["player"], top1["anytime"])]
+    suggestions["Top Scorers Away"] = [f"{p} ({prob:.2f})" for p, prob in zip(top2["player"], top2["anytime"])]
 
     # Correct score with style consideration
     top_scores = ", ".join([f"{i}-{j}" for (i,j), _ in derived["Top_scores"]])
@@ -1237,16 +1340,20 @@ def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None
     # Add value betting recommendations
     if value_bets:
         suggestions["🎯 VALUE BETS"] = []
-        for bet in value_bets[:3]:  # Top 3 value bets
-            kelly = calculate_kelly_criterion(float(bet['our_probability'].strip('%'))/100, bet['odds'])
+        top_bets = value_bets[:3]  # Top 3 value bets
+        # Same-match bets are correlated, so size them jointly on the score matrix
+        joint_kelly = fixture_portfolio_kelly(top_bets, pm)
+        for bet, kelly in zip(top_bets, joint_kelly):
             bet_suggestion = f"{bet['outcome']} in {bet['market']} @ {bet['odds']} (Value: {bet['value']}, Kelly: {kelly:.1%})"
             suggestions["🎯 VALUE BETS"].append(bet_suggestion)
 
+    lap("suggestions")
+
     # ENHANCED: Clearer market probabilities with explanations
     markets = {
-        "Home Win Probability": f"{derived['P_home']:.1%}",
-        "Draw Probability": f"{derived['P_draw']:.1%}",
-        "Away Win Probability": f"{derived['P_away']:.1%}",
+        "Home Win Probability": f"{our_probabilities['1X2']['Home Win']:.1%}",
+        "Draw Probability": f"{our_probabilities['1X2']['Draw']:.1%}",
+        "Away Win Probability": f"{our_probabilities['1X2']['Away Win']:.1%}",
         "Expected Total Goals": f"{derived['Exp_goals']:.2f}",
         "Both Teams Score Probability": f"{our_probabilities['Both Teams to Score']['Yes']:.1%}",
         "Over 2.5 Goals Probability": f"{our_probabilities['Over/Under 2.5']['Over']:.1%}",
@@ -1257,7 +1364,11 @@ def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None
         "Home Score in 1st Half": f"{halftime_probs['home_first_half_goal_prob']:.1%}",
         "Home Score in 2nd Half": f"{halftime_probs['home_second_half_goal_prob']:.1%}",
         "Away Score in 1st Half": f"{halftime_probs['away_first_half_goal_prob']:.1%}",
-        "Away Score in 2nd Half": f"{halftime_probs['away_second_half_goal_prob']:.1%}"
+        "Away Score in 2nd Half": f"{halftime_probs['away_second_half_goal_prob']:.1%}",
+        # First goal timing
+        "Home First Goal Probability": f"{our_probabilities['First Goal']['Home']:.1%}",
+        "Away First Goal Probability": f"{our_probabilities['First Goal']['Away']:.1%}",
+        "Likeliest First Goal Band": max(TIME_BANDS, key=our_probabilities["Time of First Goal"].get)
     }
 
     # ENHANCED: Detailed confidence metrics with role-based insights
@@ -1291,4 +1402,51 @@ def get_betting_suggestions_and_markets(team1_df, team2_df, team1_sentiment=None
         conf["Away Pressure Level"] = team2_pressure_data.get('Pressure_Level', 'UNKNOWN')
         conf["Away Relegation Pressure"] = team2_pressure_data.get('Total_Pressure', 0)
 
-    return dict(suggestions), markets, conf, value_bets
\ No newline at end of file
+    if not return_details:
+        return dict(suggestions), markets, conf, value_bets
+
+    # Numeric model outputs for batch consumers (streaming, backtesting, staking)
+    features = {
+        "lambda_home": lambda_home,
+        "lambda_away": lambda_away,
+        "elo_diff": elo_diff,
+        "first_half_ratio": first_half_ratio,
+        "second_half_ratio": second_half_ratio,
+        "p_home": derived["P_home"],
+        "p_draw": derived["P_draw"],
+        "p_away": derived["P_away"],
+        "exp_goals": derived["Exp_goals"],
+        "home_attack_strength": team1_style["attack_strength"],
+        "away_attack_strength": team2_style["attack_strength"],
+        "home_defense_strength": team1_style["defense_strength"],
+        "away_defense_strength": team2_style["defense_strength"],
+        "home_xg_efficiency": team1_xg["xg_efficiency"],
+        "away_xg_efficiency": team2_xg["xg_efficiency"],
+        "home_penalty_reliance": team1_xg["penalty_reliance"],
+        "away_penalty_reliance": team2_xg["penalty_reliance"],
+        "home_attacker_strength": float(team1_roles["attacker_strength"]),
+        "away_attacker_strength": float(team2_roles["attacker_strength"]),
+        "home_midfielder_strength": float(team1_roles["midfielder_strength"]),
+        "away_midfielder_strength": float(team2_roles["midfielder_strength"]),
+        "home_defender_strength": float(team1_roles["defender_strength"]),
+        "away_defender_strength": float(team2_roles["defender_strength"]),
+        "home_form_rating": team1_form["form_rating"] if team1_form else None,
+        "away_form_rating": team2_form["form_rating"] if team2_form else None,
+        "home_momentum": team1_form["momentum"] if team1_form else None,
+        "away_momentum": team2_form["momentum"] if team2_form else None,
+        "home_sentiment": team1_sentiment,
+        "away_sentiment": team2_sentiment,
+        "home_total_pressure": float(team1_pressure_data.get('Total_Pressure', 0)) if team1_pressure_data else None,
+        "away_total_pressure": float(team2_pressure_data.get('Total_Pressure', 0)) if team2_pressure_data else None,
+        "expected_home_corners": corner_prediction["expected_home_corners"],
+        "expected_away_corners": corner_prediction["expected_away_corners"],
+        "expected_total_corners": corner_prediction["expected_total_corners"],
+    }
+    details = {
+        "features": features,
+        "probabilities": our_probabilities,
+        "score_matrix": pm,
+        "player_props": player_props.to_dict("records"),
+    }
+    lap("markets_and_details")
+    return dict(suggestions), markets, conf, value_bets, details
\ No newline at end of file
@@ -0,0 +1,287 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Columns expected in an odds snapshot file. A fixture can be given either as one
+# "Home vs Away" column or as separate home/away columns.
+ODDS_COLUMNS = ["fixture", "bookmaker", "market", "outcome", "timestamp", "price"]
+KEY_COLUMNS = ["fixture", "bookmaker", "market", "outcome"]
+# Encoded value of a blank label and of a blank timestamp
+MISSING_ID = -1
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+
+def normalize_name(name):
+    """Lowercase alphanumeric form of a team name, used for fixture lookups"""
+    name = str(name).lower().strip()
+    name = ''.join(char for char in name if char.isalnum() or char.isspace())
+    return ' '.join(name.split())
+
+
+def fixture_key(home_team, away_team):
+    """Canonical fixture key shared by snapshot rows and predictor lookups"""
+    return f"{normalize_name(home_team)} vs {normalize_name(away_team)}"
+
+
+def _split_fixture(fixture):
+    """Normalize a 'Home vs Away' label into a fixture key"""
+    text = str(fixture)
+    for sep in (" vs ", " v ", " - "):
+        if sep in text.lower():
+            idx = text.lower().index(sep)
+            return fixture_key(text[:idx], text[idx + len(sep):])
+    return normalize_name(text)
+
+
+def _to_ns(value):
+    """A timestamp (string, datetime or epoch ns) as int64 nanoseconds UTC, or None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    return (stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")).value
+
+
+def _parse_timestamps(values):
+    """Parse timestamps (ISO strings or epoch seconds) to int64 nanoseconds UTC; blanks become MISSING_TIMESTAMP"""
+    if pd.api.types.is_numeric_dtype(values):
+        seconds = values.to_numpy(dtype="float64")
+        parsed = np.full(len(seconds), MISSING_TIMESTAMP, dtype="int64")
+        present = np.isfinite(seconds)
+        parsed[present] = (seconds[present] * 1e9).astype("int64")
+        return parsed
+
+    # Snapshots repeat a handful of capture times, so parse each distinct string once
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    try:
+        parsed = pd.to_datetime(uniques, utc=True, format="ISO8601")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(uniques, utc=True)
+    # Missing values have code -1, which picks the trailing sentinel
+    lookup = np.append(parsed.to_numpy(dtype="datetime64[ns]").view("int64"), MISSING_TIMESTAMP)
+    return lookup[codes]
+
+
+class _Vocabulary:
+    """Maps string labels to stable integer ids across chunks"""
+
+    def __init__(self, normalize=None):
+        self.ids = {}
+        self.labels = []
+        self.normalize = normalize
+
+    def encode(self, values):
+        """Integer ids of values; blank labels get MISSING_ID"""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        # Missing values have code -1, which picks the trailing MISSING_ID
+        lookup = np.full(len(uniques) + 1, MISSING_ID, dtype=np.int32)
+        for i, label in enumerate(uniques):
+            label = self.normalize(label) if self.normalize else str(label).strip()
+            if not label:
+                continue
+            if label not in self.ids:
+                self.ids[label] = len(self.labels)
+                self.labels.append(label)
+            lookup[i] = self.ids[label]
+        return lookup[codes]
+
+
+def _read_chunks(filepath, chunksize):
+    """Yield DataFrame chunks from a CSV (optionally compressed) or parquet snapshot"""
+    lower = filepath.lower()
+    if lower.endswith(".parquet"):
+        yield pd.read_parquet(filepath)
+        return
+    # Label columns are low-cardinality, so let the parser build categoricals directly
+    label_dtypes = {name: "category" for name in KEY_COLUMNS + ["home", "away"]}
+    header = pd.read_csv(filepath, nrows=0).columns
+    dtype = {col: label_dtypes[col.strip().lower()] for col in header if col.strip().lower() in label_dtypes}
+    yield from pd.read_csv(filepath, chunksize=chunksize, dtype=dtype)
+
+
+class OddsBook:
+    """Latest odds per (fixture, bookmaker, market, outcome), indexed by fixture.
+
+    Rows are held as sorted integer-coded arrays, so one fixture's prices are a
+    contiguous slice found through a dict lookup.
+    """
+
+    def __init__(self, fixture, bookmaker, market, outcome, timestamp, price, vocabularies):
+        self.fixture = fixture
+        self.bookmaker = bookmaker
+        self.market = market
+        self.outcome = outcome
+        self.timestamp = timestamp
+        self.price = price
+        self.vocabularies = vocabularies
+
+        # Contiguous slice per fixture (arrays are sorted by fixture first)
+        self._slices = {}
+        if len(fixture):
+            starts = np.flatnonzero(np.r_[True, fixture[1:] != fixture[:-1]])
+            ends = np.r_[starts[1:], len(fixture)]
+            labels = vocabularies["fixture"].labels
+            for start, end in zip(starts, ends):
+                self._slices[labels[fixture[start]]] = (start, end)
+
+    def __len__(self):
+        return len(self.price)
+
+    def __contains__(self, key):
+        return key in self._slices
+
+    def fixtures(self):
+        return list(self._slices)
+
+    def bookmakers(self):
+        return list(self.vocabularies["bookmaker"].labels)
+
+    def _fixture_slice(self, home_team, away_team):
+        key = fixture_key(home_team, away_team) if away_team is not None else _split_fixture(home_team)
+        return self._slices.get(key)
+
+    def odds_dict(self, home_team, away_team=None, bookmaker=None):
+        """Nested {market: {outcome: price}} for one fixture, shaped like BETTING_ODDS.
+
+        Uses the best price across bookmakers unless a bookmaker is given. Returns an
+        empty dict when the fixture is not in the snapshot.
+        """
+        bounds = self._fixture_slice(home_team, away_team)
+        if bounds is None:
+            return {}
+        start, end = bounds
+
+        market = self.market[start:end]
+        outcome = self.outcome[start:end]
+        price = self.price[start:end]
+        if bookmaker is not None:
+            book_id = self.vocabularies["bookmaker"].ids.get(str(bookmaker).strip())
+            if book_id is None:
+                return {}
+            mask = self.bookmaker[start:end] == book_id
+            market, outcome, price = market[mask], outcome[mask], price[mask]
+
+        market_labels = self.vocabularies["market"].labels
+        outcome_labels = self.vocabularies["outcome"].labels
+        odds = {}
+        for m, o, p in zip(market.tolist(), outcome.tolist(), price.tolist()):
+            outcomes = odds.setdefault(market_labels[m], {})
+            label = outcome_labels[o]
+            if p > outcomes.get(label, 0):
+                outcomes[label] = p
+        return odds
+
+    def to_frame(self):
+        """Latest prices as a DataFrame with categorical label columns"""
+        def categorical(name):
+            labels = self.vocabularies[name].labels
+            return pd.Categorical.from_codes(getattr(self, name), categories=pd.Index(labels))
+
+        return pd.DataFrame({
+            "fixture": categorical("fixture"),
+            "bookmaker": categorical("bookmaker"),
+            "market": categorical("market"),
+            "outcome": categorical("outcome"),
+            "timestamp": pd.to_datetime(self.timestamp, utc=True),
+            "price": self.price,
+        })
+
+
+def new_vocabularies():
+    """Empty label vocabularies for the four key columns"""
+    return {
+        "fixture": _Vocabulary(normalize=_split_fixture),
+        "bookmaker": _Vocabulary(),
+        "market": _Vocabulary(),
+        "outcome": _Vocabulary(),
+    }
+
+
+def encode_chunk(chunk, vocabularies):
+    """Integer-code one DataFrame of odds rows, dropping rows without a usable price,
+    label or timestamp.
+
+    Returns a dict of arrays keyed by ODDS_COLUMNS.
+    """
+    chunk.columns = [str(col).strip().lower() for col in chunk.columns]
+    if "fixture" not in chunk.columns:
+        if "home" not in chunk.columns or "away" not in chunk.columns:
+            raise ValueError(f"Odds file must contain a fixture column or home/away columns. Found: {list(chunk.columns)}")
+        fixture = chunk["home"].astype(str) + " vs " + chunk["away"].astype(str)
+        chunk["fixture"] = fixture.where(chunk["home"].notna() & chunk["away"].notna())
+    missing = [col for col in ODDS_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Odds file is missing columns {missing}. Found: {list(chunk.columns)}")
+
+    price = pd.to_numeric(chunk["price"], errors="coerce").to_numpy(dtype="float64")
+    codes = {name: vocabularies[name].encode(chunk[name]) for name in KEY_COLUMNS}
+    timestamp = _parse_timestamps(chunk["timestamp"])
+    keep = np.isfinite(price) & (price > 1.0) & (timestamp != MISSING_TIMESTAMP)
+    for name in KEY_COLUMNS:
+        keep &= codes[name] != MISSING_ID
+    columns = {name: codes[name][keep] for name in KEY_COLUMNS}
+    columns["timestamp"] = timestamp[keep]
+    columns["price"] = price[keep]
+    return columns
+
+
+def latest_book(columns, vocabularies):
+    """OddsBook holding the last quote (by timestamp) of every selection in columns"""
+    if len(columns["price"]) == 0:
+        empty = np.empty(0, dtype=np.int32)
+        return OddsBook(empty, empty, empty, empty, np.empty(0, dtype=np.int64), np.empty(0), vocabularies)
+
+    # Pack the four label ids into one int64 selection key (fixture first, so the
+    # result stays grouped by fixture), then keep the last quote of each selection
+    selection = np.zeros(len(columns["price"]), dtype=np.int64)
+    for name in KEY_COLUMNS:
+        selection = selection * len(vocabularies[name].labels) + columns[name]
+    order = np.lexsort((columns["timestamp"], selection))
+    selection = selection[order]
+    last = np.r_[selection[1:] != selection[:-1], True]
+    keep = order[last]
+    return OddsBook(*(columns[name][keep] for name in ODDS_COLUMNS), vocabularies)
+
+
+def load_odds_snapshots(filepaths, chunksize=1_000_000, as_of=None):
+    """Read odds snapshot files in chunks and keep the latest price per selection.
+
+    Each file needs bookmaker, market, outcome, timestamp and price columns plus
+    either a fixture column ("Home vs Away") or home/away columns. Pass as_of to
+    ignore prices quoted after that time.
+    """
+    if isinstance(filepaths, (str, os.PathLike)):
+        filepaths = [filepaths]
+
+    vocabularies = new_vocabularies()
+    as_of_ns = _to_ns(as_of)
+
+    parts = {name: [] for name in ODDS_COLUMNS}
+    total_rows = 0
+    for filepath in filepaths:
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"❌ Odds snapshot file not found: {filepath}")
+
+        print(f"📂 Loading odds snapshot from: {filepath}")
+        for chunk in _read_chunks(filepath, chunksize):
+            total_rows += len(chunk)
+            columns = encode_chunk(chunk, vocabularies)
+            keep = columns["timestamp"] <= as_of_ns if as_of_ns is not None else slice(None)
+            for name in ODDS_COLUMNS:
+                parts[name].append(columns[name][keep])
+
+    if parts["price"]:
+        columns = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+    else:
+        columns = {name: np.empty(0) for name in ODDS_COLUMNS}
+    book = latest_book(columns, vocabularies)
+    print(f"✅ Loaded {total_rows} odds rows -> {len(book)} latest prices for {len(book.fixtures())} fixtures "
+          f"from {len(vocabularies['bookmaker'].labels)} bookmakers")
+    return book
@@ -0,0 +1,385 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+from odds_ingestion import (
+    ODDS_COLUMNS,
+    KEY_COLUMNS,
+    _read_chunks,
+    _split_fixture,
+    _to_ns,
+    encode_chunk,
+    fixture_key,
+    latest_book,
+    new_vocabularies
+)
+
+MANIFEST_FILE = "manifest.json"
+NS_PER_DAY = 86_400 * 10**9
+
+
+def is_odds_store(path):
+    """True if path is an odds store directory"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+
+class OddsStore:
+    """Append-only odds history, stored as day partitions of .npy columns.
+
+    Every append writes new part directories (one per UTC day touched) holding one
+    integer-coded column per file, then atomically replaces manifest.json, which
+    lists each part's time range and the shared label vocabularies. Queries read only
+    the parts overlapping the requested time window, memory-mapped.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self.vocabularies = new_vocabularies()
+        self.partitions = []
+        self.next_part = 0
+        os.makedirs(root, exist_ok=True)
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as fh:
+                manifest = json.load(fh)
+            for name, labels in manifest["vocabulary"].items():
+                self.vocabularies[name].labels = list(labels)
+                self.vocabularies[name].ids = {label: i for i, label in enumerate(labels)}
+            self.partitions = manifest["partitions"]
+            self.next_part = manifest["next_part"]
+
+    def __len__(self):
+        return sum(part["rows"] for part in self.partitions)
+
+    def _save_manifest(self):
+        manifest = {
+            "vocabulary": {name: vocab.labels for name, vocab in self.vocabularies.items()},
+            "partitions": self.partitions,
+            "next_part": self.next_part,
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _write_parts(self, columns):
+        """Write coded columns as new parts, one per UTC day"""
+        if len(columns["price"]) == 0:
+            return []
+        day = columns["timestamp"] // NS_PER_DAY
+        order = np.lexsort((columns["timestamp"], day))
+        day = day[order]
+        bounds = np.flatnonzero(np.r_[True, day[1:] != day[:-1], True])
+
+        written = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            rows = order[start:end]
+            date = pd.Timestamp(int(day[start]) * NS_PER_DAY, tz="UTC").strftime("%Y-%m-%d")
+            rel_path = os.path.join(date, f"part-{self.next_part:06d}")
+            os.makedirs(os.path.join(self.root, rel_path))
+            for name in ODDS_COLUMNS:
+                np.save(os.path.join(self.root, rel_path, f"{name}.npy"), columns[name][rows])
+            written.append({
+                "path": rel_path,
+                "rows": int(len(rows)),
+                "min_timestamp": int(columns["timestamp"][rows[0]]),
+                "max_timestamp": int(columns["timestamp"][rows[-1]]),
+            })
+            self.next_part += 1
+        return written
+
+    def append(self, frame):
+        """Append a DataFrame of quotes (same columns as an odds snapshot file)"""
+        written = self._write_parts(encode_chunk(frame.copy(deep=False), self.vocabularies))
+        if written:
+            self.partitions.extend(written)
+            self._save_manifest()
+        return sum(part["rows"] for part in written)
+
+    def ingest(self, filepaths, chunksize=1_000_000):
+        """Append every row of one or more odds snapshot files (CSV or parquet)"""
+        if isinstance(filepaths, (str, os.PathLike)):
+            filepaths = [filepaths]
+        total = 0
+        for filepath in filepaths:
+            if not os.path.exists(filepath):
+                raise FileNotFoundError(f"❌ Odds snapshot file not found: {filepath}")
+            print(f"📂 Adding odds snapshot to store: {filepath}")
+            for chunk in _read_chunks(filepath, chunksize):
+                total += self.append(chunk)
+        print(f"✅ Stored {total} quotes ({len(self)} in total, {len(self.partitions)} parts)")
+        return total
+
+    def compact(self):
+        """Merge each day's parts into one, so long-running collection stays fast to read"""
+        by_day = {}
+        for part in self.partitions:
+            by_day.setdefault(os.path.dirname(part["path"]), []).append(part)
+
+        partitions, stale = [], []
+        for day, parts in sorted(by_day.items()):
+            if len(parts) == 1:
+                partitions.extend(parts)
+                continue
+            columns = {name: np.concatenate([self._read_column(part, name) for part in parts]) for name in ODDS_COLUMNS}
+            partitions.extend(self._write_parts(columns))
+            stale.extend(parts)
+
+        self.partitions = partitions
+        self._save_manifest()
+        for part in stale:
+            shutil.rmtree(os.path.join(self.root, part["path"]), ignore_errors=True)
+        return len(stale)
+
+    def _read_column(self, part, name):
+        return np.load(os.path.join(self.root, part["path"], f"{name}.npy"), mmap_mode="r")
+
+    def _fixture_ids(self, fixtures):
+        """Vocabulary ids for fixture labels ("Home vs Away" or (home, away) pairs)"""
+        ids = []
+        for fixture in fixtures:
+            key = fixture_key(*fixture) if isinstance(fixture, (tuple, list)) else _split_fixture(fixture)
+            if key in self.vocabularies["fixture"].ids:
+                ids.append(self.vocabularies["fixture"].ids[key])
+        return np.array(ids, dtype=np.int32)
+
+    def scan(self, start=None, end=None, fixtures=None):
+        """All quotes with start <= timestamp <= end as a dict of arrays.
+
+        Only parts whose time range overlaps the window are opened; fixtures
+        optionally restricts the result to a list of fixtures.
+        """
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        fixture_ids = self._fixture_ids(fixtures) if fixtures is not None else None
+
+        parts = {name: [] for name in ODDS_COLUMNS}
+        for part in self.partitions:
+            if start_ns is not None and part["max_timestamp"] < start_ns:
+                continue
+            if end_ns is not None and part["min_timestamp"] > end_ns:
+                continue
+
+            inside = (start_ns is None or part["min_timestamp"] >= start_ns) and \
+                     (end_ns is None or part["max_timestamp"] <= end_ns)
+            if inside and fixture_ids is None:
+                for name in ODDS_COLUMNS:
+                    parts[name].append(np.asarray(self._read_column(part, name)))
+                continue
+
+            timestamp = self._read_column(part, "timestamp")
+            keep = np.ones(len(timestamp), dtype=bool)
+            if start_ns is not None:
+                keep &= timestamp >= start_ns
+            if end_ns is not None:
+                keep &= timestamp <= end_ns
+            if fixture_ids is not None:
+                keep &= np.isin(self._read_column(part, "fixture"), fixture_ids)
+            if not keep.any():
+                continue
+            for name in ODDS_COLUMNS:
+                parts[name].append(np.asarray(self._read_column(part, name)[keep]))
+
+        if not parts["price"]:
+            return {
+                name: np.empty(0, dtype=np.float64 if name == "price" else np.int64 if name == "timestamp" else np.int32)
+                for name in ODDS_COLUMNS
+            }
+        return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+    def latest(self, as_of=None, since=None, fixtures=None):
+        """OddsBook of the latest price per selection quoted at or before as_of.
+
+        since bounds how far back to look (e.g. a few days before kick-off), which
+        keeps older parts from being read at all.
+        """
+        return latest_book(self.scan(since, as_of, fixtures), self.vocabularies)
+
+    def _selection_runs(self, columns):
+        """Sort quotes by (selection, timestamp); returns the order and run boundaries"""
+        selection = np.zeros(len(columns["price"]), dtype=np.int64)
+        for name in KEY_COLUMNS:
+            selection = selection * max(len(self.vocabularies[name].labels), 1) + columns[name]
+        order = np.lexsort((columns["timestamp"], selection))
+        selection = selection[order]
+        first = np.r_[True, selection[1:] != selection[:-1]] if len(order) else np.empty(0, dtype=bool)
+        return order, first
+
+    def _labels(self, name, codes):
+        return np.asarray(self.vocabularies[name].labels, dtype=object)[codes]
+
+    def movement(self, start=None, end=None, fixtures=None):
+        """Opening-to-closing price movement of every selection in the window.
+
+        One row per (fixture, bookmaker, market, outcome) with its first and last
+        price, the number of quotes and the change in implied probability (positive
+        when the price shortened). Sorted by the largest shortening first.
+        """
+        columns = self.scan(start, end, fixtures)
+        order, first = self._selection_runs(columns)
+        last = np.r_[first[1:], True] if len(order) else first
+        open_rows, close_rows = order[first], order[last]
+        starts = np.flatnonzero(first)
+        quotes = np.diff(np.r_[starts, len(order)])
+        sorted_price = columns["price"][order]
+
+        opening, closing = columns["price"][open_rows], columns["price"][close_rows]
+        table = pd.DataFrame({
+            "fixture": self._labels("fixture", columns["fixture"][open_rows]),
+            "bookmaker": self._labels("bookmaker", columns["bookmaker"][open_rows]),
+            "market": self._labels("market", columns["market"][open_rows]),
+            "outcome": self._labels("outcome", columns["outcome"][open_rows]),
+            "opening_time": pd.to_datetime(columns["timestamp"][open_rows], utc=True),
+            "closing_time": pd.to_datetime(columns["timestamp"][close_rows], utc=True),
+            "quotes": quotes,
+            "opening_price": opening,
+            "closing_price": closing,
+            "low_price": np.minimum.reduceat(sorted_price, starts) if len(starts) else np.empty(0),
+            "high_price": np.maximum.reduceat(sorted_price, starts) if len(starts) else np.empty(0),
+            "price_change": closing / opening - 1.0,
+            "implied_change": 1.0 / closing - 1.0 / opening,
+        })
+        return table.sort_values("implied_change", ascending=False, kind="stable").reset_index(drop=True)
+
+    def steam_moves(self, window="15min", min_drop=0.03, min_books=3, start=None, end=None, fixtures=None):
+        """Sharp price drops on the same selection at several bookmakers at once.
+
+        A drop is a quote at least min_drop (relative) below the same bookmaker's
+        previous quote. A steam move is min_books or more different bookmakers
+        dropping the same (fixture, market, outcome) within window; later drops in
+        the following window are folded into the same move.
+        """
+        columns = self.scan(start, end, fixtures)
+        window_ns = pd.Timedelta(window).value
+        order, first = self._selection_runs(columns)
+
+        # Drops between consecutive quotes of the same bookmaker's selection
+        price = columns["price"][order]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drop = 1.0 - price[1:] / price[:-1]
+        event = np.flatnonzero(~first[1:] & (drop >= min_drop)) + 1
+        rows = order[event]
+        event_drop = drop[event - 1]
+        before = price[event - 1]
+
+        n_outcomes = max(len(self.vocabularies["outcome"].labels), 1)
+        n_markets = max(len(self.vocabularies["market"].labels), 1)
+        market_key = (columns["fixture"][rows].astype(np.int64) * n_markets + columns["market"][rows]) * n_outcomes + columns["outcome"][rows]
+        event_time = columns["timestamp"][rows]
+        event_order = np.lexsort((event_time, market_key))
+
+        moves = []
+        current = None
+        window_books = {}
+        previous_key = None
+        for i in event_order.tolist():
+            key, t, book = market_key[i], int(event_time[i]), int(columns["bookmaker"][rows[i]])
+            if key != previous_key:
+                current, window_books, previous_key = None, {}, key
+
+            if current is not None and t <= current["trigger_ns"] + window_ns:
+                current["books"].add(book)
+                current["drops"].append(event_drop[i])
+                current["before"].append(before[i])
+                current["after"].append(price[event[i]])
+                current["last_ns"] = t
+                continue
+            current = None
+
+            window_books[book] = (t, event_drop[i], before[i], price[event[i]])
+            window_books = {b: e for b, e in window_books.items() if e[0] > t - window_ns}
+            if len(window_books) >= min_books:
+                current = {
+                    "row": rows[i],
+                    "start_ns": min(e[0] for e in window_books.values()),
+                    "trigger_ns": t,
+                    "last_ns": t,
+                    "books": set(window_books),
+                    "drops": [e[1] for e in window_books.values()],
+                    "before": [e[2] for e in window_books.values()],
+                    "after": [e[3] for e in window_books.values()],
+                }
+                moves.append(current)
+                window_books = {}
+
+        return pd.DataFrame({
+            "fixture": [self.vocabularies["fixture"].labels[columns["fixture"][m["row"]]] for m in moves],
+            "market": [self.vocabularies["market"].labels[columns["market"][m["row"]]] for m in moves],
+            "outcome": [self.vocabularies["outcome"].labels[columns["outcome"][m["row"]]] for m in moves],
+            "start_time": pd.to_datetime([m["start_ns"] for m in moves], utc=True),
+            "trigger_time": pd.to_datetime([m["trigger_ns"] for m in moves], utc=True),
+            "end_time": pd.to_datetime([m["last_ns"] for m in moves], utc=True),
+            "books": [len(m["books"]) for m in moves],
+            "bookmakers": [", ".join(sorted(self.vocabularies["bookmaker"].labels[b] for b in m["books"])) for m in moves],
+            "mean_drop": [float(np.mean(m["drops"])) for m in moves],
+            "mean_price_before": [float(np.mean(m["before"])) for m in moves],
+            "mean_price_after": [float(np.mean(m["after"])) for m in moves],
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Odds history store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Append odds snapshot files to a store")
+    ingest.add_argument("store")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--compact", action="store_true", help="Merge each day's parts afterwards")
+
+    latest = commands.add_parser("latest", help="Latest price per selection as of a time")
+    latest.add_argument("store")
+    latest.add_argument("--as-of", help="Ignore quotes after this time (default: now, UTC)")
+    latest.add_argument("--since", help="Ignore quotes before this time")
+    latest.add_argument("--out", help="Write the prices to this CSV instead of printing a summary")
+
+    movement = commands.add_parser("movement", help="Opening-to-closing movement per selection")
+    movement.add_argument("store")
+    movement.add_argument("--start")
+    movement.add_argument("--end")
+    movement.add_argument("--out", help="Write the table to this CSV")
+
+    steam = commands.add_parser("steam", help="Detect steam moves across bookmakers")
+    steam.add_argument("store")
+    steam.add_argument("--window", default="15min")
+    steam.add_argument("--min-drop", type=float, default=0.03)
+    steam.add_argument("--min-books", type=int, default=3)
+    steam.add_argument("--start")
+    steam.add_argument("--end")
+    steam.add_argument("--out", help="Write the moves to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.command != "ingest" and not is_odds_store(args.store):
+        print(f"❌ No odds store at {args.store}", file=sys.stderr)
+        sys.exit(1)
+    store = OddsStore(args.store)
+
+    if args.command == "ingest":
+        store.ingest(args.files)
+        if args.compact:
+            print(f"🧹 Merged {store.compact()} parts")
+        return
+
+    if args.command == "latest":
+        book = store.latest(as_of=args.as_of or pd.Timestamp.now(tz="UTC"), since=args.since)
+        table = book.to_frame()
+        print(f"✅ {len(book)} latest prices for {len(book.fixtures())} fixtures")
+    elif args.command == "movement":
+        table = store.movement(args.start, args.end)
+        print(f"--- 📈 PRICE MOVEMENT ({len(table)} selections, biggest shortening first) ---")
+        print(table.head(15).to_string(index=False))
+    else:
+        table = store.steam_moves(args.window, args.min_drop, args.min_books, args.start, args.end)
+        print(f"--- ♨️ STEAM MOVES: {len(table)} found ---")
+        if not table.empty:
+            print(table.head(15).to_string(index=False))
+
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"✅ Written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
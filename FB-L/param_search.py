@@ -0,0 +1,296 @@
+import os, sys
+import json
+import argparse
+import contextlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from main import find_team_match, fixture_inputs, load_feature_store, load_league_data
+from match_predictor import DEFAULT_PARAMS, team_features, compute_match_lambdas
+from backtester import read_results, find_snapshots, assign_snapshots, _probability_scores
+from elo_engine import pre_match_elo_diff
+
+SEARCH_STRATEGIES = ("grid", "random", "cem")
+OBJECTIVES = ("log_loss", "brier", "rps")
+
+# (low, high) per tuned parameter; the rest stay at DEFAULT_PARAMS unless the space names them
+DEFAULT_SEARCH_SPACE = {
+    "base_lambda_home": (1.2, 2.0),
+    "base_lambda_away": (0.9, 1.5),
+    "form_weight": (0.0, 0.6),
+    "momentum_weight": (0.0, 0.4),
+    "defense_form_weight": (0.0, 0.8),
+    "role_attack_weight": (0.0, 0.6),
+    "home_advantage": (1.0, 1.15),
+    "champions_league_boost": (1.0, 1.3),
+    "europa_league_boost": (1.0, 1.25),
+    "relegation_boost": (1.0, 1.25),
+    "sentiment_slope": (0.0, 0.01),
+}
+# Range searched for elo_weight when fixtures carry Elo gaps
+ELO_WEIGHT_RANGE = (0.0, 1.5)
+
+# Fixtures prepared once in the parent and handed to every worker
+_FIXTURES = None
+_OUTCOMES = None
+
+
+def prepare_fixtures(results, snapshot_root, elo=False):
+    """Model inputs of every historical fixture that can be priced.
+
+    Each fixture uses the latest snapshot before its date (see backtester). Team
+    features come from the snapshot's feature store and are shared between
+    fixtures, so evaluating a parameter set only repeats the cheap lambda arithmetic.
+    With elo, fixtures carry the Elo gap rated from the earlier results.
+    Returns (fixtures, outcomes) with outcomes 0/1/2 for home/draw/away.
+    """
+    if elo:
+        results = results.assign(elo_diff=pre_match_elo_diff(results))
+    results = assign_snapshots(results, find_snapshots(snapshot_root))
+    results = results[results["snapshot"].notna()]
+
+    fixtures, outcomes = [], []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for snapshot_dir, rows in results.groupby("snapshot", sort=True):
+            team_df, player_df, corner_data, form_data = load_league_data(snapshot_dir)
+            feature_store = load_feature_store(team_df, player_df, form_data, data_dir=snapshot_dir,
+                                               league=rows["league"].iloc[0])
+            player_teams = set(player_df["Team"].dropna().unique())
+
+            for fixture in rows.to_dict("records"):
+                home_team = find_team_match(fixture["home"], player_teams)
+                away_team = find_team_match(fixture["away"], player_teams)
+                inputs = fixture_inputs(home_team, away_team, team_df, player_df, feature_store) if home_team and away_team else None
+                if inputs is None:
+                    continue
+                if "team1_features" not in inputs:
+                    inputs["team1_features"] = team_features(inputs["team1_df"], form_data)
+                    inputs["team2_features"] = team_features(inputs["team2_df"], form_data)
+
+                fixtures.append({
+                    "team1_features": inputs["team1_features"],
+                    "team2_features": inputs["team2_features"],
+                    "team1_sentiment": inputs["team1_sentiment"],
+                    "team2_sentiment": inputs["team2_sentiment"],
+                    "home_team": inputs["home_team"],
+                    "team1_pressure_data": inputs["team1_pressure_data"],
+                    "team2_pressure_data": inputs["team2_pressure_data"],
+                    "elo_diff": fixture.get("elo_diff"),
+                })
+                home_goals, away_goals = fixture["home_goals"], fixture["away_goals"]
+                outcomes.append(0 if home_goals > away_goals else 1 if home_goals == away_goals else 2)
+    return fixtures, np.array(outcomes, dtype=np.int64)
+
+
+def result_probabilities(lambda_home, lambda_away, max_goals=6):
+    """Home/draw/away probabilities for arrays of lambdas from the truncated Poisson grid"""
+    goals = np.arange(max_goals + 1)
+    log_factorial = np.cumsum(np.log(np.maximum(goals, 1)))
+    home = np.exp(goals * np.log(lambda_home[:, None]) - lambda_home[:, None] - log_factorial)
+    away = np.exp(goals * np.log(lambda_away[:, None]) - lambda_away[:, None] - log_factorial)
+    grid = home[:, :, None] * away[:, None, :]
+    diff = goals[:, None] - goals[None, :]
+    return np.stack([grid[:, diff > 0].sum(axis=1), grid[:, diff == 0].sum(axis=1), grid[:, diff < 0].sum(axis=1)], axis=1)
+
+
+def evaluate_params(params, fixtures=None, outcomes=None):
+    """Mean log-loss, Brier score and RPS of one parameter set over the fixtures"""
+    fixtures = _FIXTURES if fixtures is None else fixtures
+    outcomes = _OUTCOMES if outcomes is None else outcomes
+    lambdas = np.array([compute_match_lambdas(**fixture, params=params, verbose=False) for fixture in fixtures])
+    lambdas = np.clip(lambdas, 1e-6, None)
+    scores = _probability_scores(result_probabilities(lambdas[:, 0], lambdas[:, 1]), outcomes)
+    return {name: float(values.mean()) for name, values in zip(OBJECTIVES, scores)}
+
+
+def _init_worker(fixtures, outcomes):
+    global _FIXTURES, _OUTCOMES
+    _FIXTURES, _OUTCOMES = fixtures, outcomes
+
+
+def _evaluate_candidate(params):
+    try:
+        return evaluate_params(params)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def grid_candidates(space, points=3):
+    """Every combination of the space: explicit value lists, or `points` evenly spaced values per range"""
+    names = list(space)
+    axes = [list(values) if isinstance(values, list) else list(np.linspace(values[0], values[1], points))
+            for values in space.values()]
+    return [dict(zip(names, map(float, combo))) for combo in itertools.product(*axes)]
+
+
+def random_candidates(space, n, rng):
+    """n parameter sets drawn uniformly from each (low, high) range"""
+    columns = {name: rng.uniform(low, high, n) for name, (low, high) in space.items()}
+    return [{name: float(columns[name][i]) for name in space} for i in range(n)]
+
+
+class ParamSearch:
+    """Evaluates parameter sets on a process pool that holds the prepared fixtures"""
+
+    def __init__(self, fixtures, outcomes, workers=None, objective="log_loss"):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}'. Use one of {OBJECTIVES}")
+        self.fixtures = fixtures
+        self.outcomes = outcomes
+        self.objective = objective
+        self.workers = workers or os.cpu_count() or 1
+        self.trials = []
+        self._executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.fixtures, self.outcomes))
+        return self
+
+    def __exit__(self, *exc):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def evaluate(self, candidates):
+        """Scores of each candidate (in order); every trial is also kept in self.trials"""
+        if self._executor is None:
+            _init_worker(self.fixtures, self.outcomes)
+            scores = [_evaluate_candidate(params) for params in candidates]
+        else:
+            chunk = max(1, len(candidates) // (self.workers * 4))
+            scores = list(self._executor.map(_evaluate_candidate, candidates, chunksize=chunk))
+        for params, score in zip(candidates, scores):
+            self.trials.append({**params, **score})
+        return [score.get(self.objective, np.inf) for score in scores]
+
+    def cross_entropy(self, space, iterations=10, population=64, elite=0.2, rng=None):
+        """Cross-entropy method: sample from a Gaussian per parameter, refit it to the best fraction, repeat"""
+        rng = rng or np.random.default_rng(0)
+        names = list(space)
+        low = np.array([space[name][0] for name in names], dtype=float)
+        high = np.array([space[name][1] for name in names], dtype=float)
+        mean = np.clip([DEFAULT_PARAMS.get(name, 0.0) for name in names], low, high)
+        std = (high - low) / 2
+        n_elite = max(2, int(population * elite))
+
+        for iteration in range(iterations):
+            samples = np.clip(rng.normal(mean, std, (population, len(names))), low, high)
+            candidates = [dict(zip(names, map(float, row))) for row in samples]
+            scores = np.array(self.evaluate(candidates))
+            best = samples[np.argsort(scores)[:n_elite]]
+            mean, std = best.mean(axis=0), best.std(axis=0) + 1e-3 * (high - low)
+            print(f"   iteration {iteration + 1}/{iterations}: best {self.objective} {np.min(scores):.5f}")
+
+    def results(self):
+        """All trials so far, best first"""
+        trials = pd.DataFrame(self.trials)
+        if trials.empty or self.objective not in trials.columns:
+            return trials
+        return trials.sort_values(self.objective, kind="stable").reset_index(drop=True)
+
+
+def check_search_space(space, strategy):
+    """Reject a space the strategy cannot sample: explicit value lists only make sense for grid"""
+    unknown = set(space) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown predictor parameters in search space: {sorted(unknown)}")
+    value_lists = sorted(name for name, values in space.items() if isinstance(values, list))
+    if value_lists and strategy != "grid":
+        raise ValueError(f"Explicit value lists ({value_lists}) need --strategy grid; give {strategy} search (low, high) ranges")
+
+
+def run_search(fixtures, outcomes, strategy="random", space=None, n_candidates=200, points=3,
+               iterations=10, workers=None, objective="log_loss", seed=0):
+    """Search the predictor parameters, returning every trial sorted by the objective.
+
+    DEFAULT_PARAMS is scored first as the baseline; its row has no overrides.
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy '{strategy}'. Use one of {SEARCH_STRATEGIES}")
+    space = space or DEFAULT_SEARCH_SPACE
+    check_search_space(space, strategy)
+    rng = np.random.default_rng(seed)
+
+    with ParamSearch(fixtures, outcomes, workers=workers, objective=objective) as search:
+        baseline = search.evaluate([{}])[0]
+        print(f"📏 Current parameters: {objective} {baseline:.5f} over {len(fixtures)} fixtures")
+        if strategy == "grid":
+            candidates = grid_candidates(space, points)
+            print(f"🔎 Grid search over {len(candidates)} parameter sets on {search.workers} worker(s)")
+            search.evaluate(candidates)
+        elif strategy == "random":
+            print(f"🔎 Random search over {n_candidates} parameter sets on {search.workers} worker(s)")
+            search.evaluate(random_candidates(space, n_candidates, rng))
+        else:
+            population = max(8, n_candidates // iterations)
+            print(f"🔎 Cross-entropy search: {iterations} rounds of {population} on {search.workers} worker(s)")
+            search.cross_entropy(space, iterations=iterations, population=population, rng=rng)
+        return search.results()
+
+
+def best_params(trials):
+    """Parameter overrides of the best trial (only the searched names)"""
+    best = trials.iloc[0]
+    return {name: float(best[name]) for name in DEFAULT_PARAMS if name in trials.columns and pd.notna(best[name])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the predictor constants against historical results")
+    parser.add_argument("--results", required=True, help="CSV of historical results (date, home, away, home_goals, away_goals)")
+    parser.add_argument("--snapshots", required=True, help="Folder of dated data snapshots: <league>/<YYYY-MM-DD>/")
+    parser.add_argument("--league", help="League name for a results file without a league column")
+    parser.add_argument("--strategy", default="random", choices=SEARCH_STRATEGIES)
+    parser.add_argument("--space", help="JSON file of {name: [low, high]} ranges (or {name: {\"values\": [...]}} for grid)")
+    parser.add_argument("--candidates", type=int, default=200, help="Parameter sets to try (random and cem)")
+    parser.add_argument("--points", type=int, default=3, help="Grid points per range")
+    parser.add_argument("--iterations", type=int, default=10, help="Cross-entropy rounds")
+    parser.add_argument("--objective", default="log_loss", choices=OBJECTIVES)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--elo", action="store_true",
+                        help="Rate Elo gaps from the earlier results and tune elo_weight too")
+    parser.add_argument("--out", help="Write the best parameters to this JSON file (e.g. predictor_params.json)")
+    parser.add_argument("--trials", help="Write every trial to this CSV")
+    args = parser.parse_args(argv)
+
+    space = None
+    if args.space:
+        with open(args.space) as f:
+            space = {name: value["values"] if isinstance(value, dict) else tuple(value) for name, value in json.load(f).items()}
+    if args.elo and not (space or {}).get("elo_weight"):
+        space = {**(space or DEFAULT_SEARCH_SPACE), "elo_weight": ELO_WEIGHT_RANGE}
+    try:
+        check_search_space(space or DEFAULT_SEARCH_SPACE, args.strategy)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        results = read_results(args.results, league=args.league)
+        fixtures, outcomes = prepare_fixtures(results, args.snapshots, elo=args.elo)
+        if not fixtures:
+            print("⚠️ No fixtures could be prepared")
+            return
+        trials = run_search(fixtures, outcomes, strategy=args.strategy, space=space, n_candidates=args.candidates,
+                            points=args.points, iterations=args.iterations, workers=args.workers,
+                            objective=args.objective, seed=args.seed)
+    except Exception as e:
+        print("❌ Parameter search failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n--- 🏁 TOP PARAMETER SETS ({len(trials)} tried) ---")
+    print(trials.head(10).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(best_params(trials), f, indent=2)
+        print(f"✅ Best parameters written to {args.out}")
+    if args.trials:
+        trials.to_csv(args.trials, index=False)
+        print(f"✅ Trials written to {args.trials}")
+
+
+if __name__ == "__main__":
+    main()
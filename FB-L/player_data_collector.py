@@ -2,6 +2,8 @@ import pandas as pd
 import os
 import re
 import numpy as np
+from stage_timer import timed, laps
+from sheet_io import read_sheet
 
 # Define stat categories for different player roles
 stat_categories = {
@@ -157,6 +159,7 @@ def calculate_role_specific_strength(player_row, role_category):
     
     return ", ".join(strengths) if strengths else "Solid Performer"
 
+@timed("load_player_data")
 def load_player_data(filepath=None):
     if filepath is None:
         filepath = "FutBall.xlsx"
@@ -166,17 +169,20 @@ def load_player_data(filepath=None):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"❌ Player data file not found: {filepath}")
 
+    lap = laps()
+
     try:
         print("📋 Trying to read 'Sheet1' directly...")
-        df = pd.read_excel(filepath, sheet_name='Sheet1')
+        df = read_sheet(filepath, 'Sheet1')
         print("✅ Successfully read 'Sheet1' directly")
     except Exception as e1:
         print(f"⚠️ Could not read 'Sheet1' directly: {e1}")
         try:
-            df = pd.read_excel(filepath, sheet_name=0, header=0)
+            df = read_sheet(filepath, 0)
             print("✅ Successfully read first sheet")
         except Exception as e3:
             raise ValueError(f"❌ All reading methods failed: {e3}")
+    lap("read_sheet")
 
     print(f"🔍 Final columns found: {list(df.columns)}")
     print(f"📊 Final data shape: {df.shape}")
@@ -267,6 +273,8 @@ def load_player_data(filepath=None):
     else:
         df["Role"] = "Unknown"
 
+    lap("column_mapping")
+
     # ENHANCED: Classify player roles
     print("🎯 Classifying player roles...")
     df["Role_Category"] = df["Role"].apply(classify_player_role)
@@ -281,11 +289,14 @@ def load_player_data(filepath=None):
     try:
         print("🔄 Calculating enhanced derived metrics with role-based analysis...")
         
+        lap("role_classification")
+
         # Calculate role-based scores
         df["Role_Based_Score"] = df.apply(
             lambda row: calculate_role_based_score(row, row["Role_Category"]), 
             axis=1
         )
+        lap("role_scoring")
         
         # Attack metrics with advanced xG
         df["Attack_Index"] = (
@@ -356,11 +367,14 @@ def load_player_data(filepath=None):
             df["Discipline_Index"] * 0.01
         )
         
+        lap("derived_metrics")
+
         # Calculate role-specific strengths
         df["Role_Specific_Strength"] = df.apply(
             lambda row: calculate_role_specific_strength(row, row["Role_Category"]), 
             axis=1
         )
+        lap("role_strengths")
         
         print("✅ Enhanced role-based metrics calculated")
         
@@ -388,5 +402,6 @@ def load_player_data(filepath=None):
         print(f"\n{role}:")
         for _, player in top_players.iterrows():
             print(f"   {player['Player']} ({player['Team']}): {player['Role_Based_Score']:.1f}")
+    lap("summary_printing")
     
     return df
\ No newline at end of file
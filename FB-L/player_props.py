@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from odds_ingestion import fixture_key
+
+# Player markets priced here; several players can win each, so none is de-vigged as one book
+PLAYER_MARKETS = {
+    "anytime": "Anytime Goalscorer",
+    "two_plus": "To Score 2+",
+    "first_scorer": "First Goalscorer",
+    "assist": "Anytime Assist",
+}
+# Share of goals that come with an assist
+ASSISTED_SHARE = 0.75
+# Per-90 rates of players with fewer minutes are computed over this many minutes
+MIN_MINUTES = 270
+
+
+def _column(df, names, default=0.0):
+    """First available numeric column of names (or a constant)"""
+    for name in names:
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    return np.full(len(df), default)
+
+
+def player_shares(player_df):
+    """Each player's share of the team's goals and assists.
+
+    A player's weight is per-90 npxG (xG, then goals, when missing) times the
+    expected share of the 90 minutes: Expected_Minutes / 90 when given, otherwise
+    minutes relative to the team's most-used player. The penalty part of the team's
+    xG is split by penalty xG, since penalties go to the taker.
+    """
+    players = player_df.dropna(subset=["Team"]).reset_index(drop=True)
+    team = players["Team"].to_numpy()
+    team_codes, team_index = np.unique(team, return_inverse=True)
+    n_teams = len(team_codes)
+
+    minutes = _column(players, ["Minutes"], default=90.0)
+    if "Expected_Minutes" in players.columns:
+        availability = np.clip(_column(players, ["Expected_Minutes"]) / 90.0, 0.0, 1.0)
+    else:
+        most_used = np.zeros(n_teams)
+        np.maximum.at(most_used, team_index, minutes)
+        availability = np.clip(minutes / np.maximum(most_used[team_index], 1.0), 0.0, 1.0)
+    per_90 = 90.0 / np.maximum(minutes, MIN_MINUTES)
+
+    xg = _column(players, ["xG", "Goals"])
+    npxg = _column(players, ["npxG"]) if "npxG" in players.columns else xg
+    penalty_xg = np.maximum(xg - npxg, 0.0)
+    assist_threat = _column(players, ["xA", "xAG", "Assists"])
+
+    def share(weight):
+        total = np.bincount(team_index, weights=weight, minlength=n_teams)
+        # A team with no recorded threat splits evenly across its squad
+        squad = np.bincount(team_index, minlength=n_teams)
+        return np.where(total[team_index] > 0, weight / np.where(total[team_index] > 0, total[team_index], 1.0),
+                        1.0 / squad[team_index])
+
+    team_xg = np.bincount(team_index, weights=xg, minlength=n_teams)
+    team_penalty_xg = np.bincount(team_index, weights=penalty_xg, minlength=n_teams)
+    penalty_fraction = np.where(team_xg > 0, team_penalty_xg / np.where(team_xg > 0, team_xg, 1.0), 0.0)[team_index]
+
+    open_play = share(npxg * per_90 * availability)
+    penalties = share(penalty_xg) if penalty_xg.any() else open_play
+    return pd.DataFrame({
+        "team": team,
+        "player": players["Player"].to_numpy() if "Player" in players.columns else np.arange(len(players)).astype(str),
+        "expected_minutes": availability * 90.0,
+        "goal_share": (1.0 - penalty_fraction) * open_play + penalty_fraction * penalties,
+        "assist_share": share(assist_threat * per_90 * availability),
+    })
+
+
+def price_player_props(shares, fixtures):
+    """Goalscorer and assist probabilities for every player of every fixture at once.
+
+    shares comes from player_shares; fixtures has home, away, lambda_home and
+    lambda_away columns (one row per fixture). A player's goals are Poisson with
+    mean goal_share * team lambda, so the team's goals are split between its
+    players; first scorer is the player's share of all goals times the chance of
+    any goal.
+    """
+    fixtures = pd.DataFrame(fixtures).reset_index(drop=True)
+    teams = pd.Index(pd.unique(shares["team"]))
+    team_index = teams.get_indexer(shares["team"])
+    order = np.argsort(team_index, kind="stable")
+    squad_size = np.bincount(team_index, minlength=len(teams))
+    squad_start = np.concatenate([[0], np.cumsum(squad_size)[:-1]])
+
+    # Every (fixture, player) row for both sides, gathered without a loop over fixtures
+    fixture_ids, rows, team_lambda, sides = [], [], [], []
+    for side in ("home", "away"):
+        code = teams.get_indexer(fixtures[side])
+        size = np.where(code >= 0, squad_size[np.maximum(code, 0)], 0)
+        first = np.repeat(np.cumsum(size) - size, size)
+        position = np.arange(size.sum()) - first
+        fixture_ids.append(np.repeat(np.arange(len(fixtures)), size))
+        rows.append(order[np.repeat(squad_start[np.maximum(code, 0)], size) + position])
+        team_lambda.append(np.repeat(fixtures[f"lambda_{side}"].to_numpy(dtype=float), size))
+        sides.append(np.full(size.sum(), side))
+
+    fixture_ids = np.concatenate(fixture_ids)
+    rows = np.concatenate(rows)
+    team_lambda = np.concatenate(team_lambda)
+    if len(rows) == 0:
+        return pd.DataFrame(columns=["home", "away", "side", "team", "player", "expected_goals", "expected_assists",
+                                     "expected_minutes"] + list(PLAYER_MARKETS))
+    total_lambda = (fixtures["lambda_home"].to_numpy(dtype=float) + fixtures["lambda_away"].to_numpy(dtype=float))[fixture_ids]
+
+    goals = shares["goal_share"].to_numpy()[rows] * team_lambda
+    assists = shares["assist_share"].to_numpy()[rows] * team_lambda * ASSISTED_SHARE
+    no_goal = np.exp(-goals)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        first_scorer = np.where(total_lambda > 0, goals / total_lambda * -np.expm1(-total_lambda), 0.0)
+
+    props = pd.DataFrame({
+        "home": fixtures["home"].to_numpy()[fixture_ids],
+        "away": fixtures["away"].to_numpy()[fixture_ids],
+        "side": np.concatenate(sides),
+        "team": shares["team"].to_numpy()[rows],
+        "player": shares["player"].to_numpy()[rows],
+        "expected_goals": goals,
+        "expected_assists": assists,
+        "expected_minutes": shares["expected_minutes"].to_numpy()[rows],
+        "anytime": -np.expm1(-goals),
+        "two_plus": 1.0 - no_goal * (1.0 + goals),
+        "first_scorer": first_scorer,
+        "assist": -np.expm1(-assists),
+    })
+    # Fixtures in input order, home squad first, likeliest scorers first
+    order = np.lexsort((-props["anytime"].to_numpy(), props["side"].to_numpy() == "away", fixture_ids))
+    return props.iloc[order].reset_index(drop=True)
+
+
+def fixture_player_props(team1_df, team2_df, lambda_home, lambda_away):
+    """price_player_props for one fixture from the two squads"""
+    shares = player_shares(pd.concat([team1_df, team2_df], ignore_index=True))
+    fixture = {"home": [team1_df["Team"].iloc[0]], "away": [team2_df["Team"].iloc[0]],
+               "lambda_home": [lambda_home], "lambda_away": [lambda_away]}
+    return price_player_props(shares, fixture)
+
+
+def player_outcomes(props):
+    """Outcome label of every props row: the player's name, or "<player> (<team>)" when the
+    name occurs more than once in the fixture (and a running number if still repeated)"""
+    frame = pd.DataFrame({"home": props["home"].to_numpy(), "away": props["away"].to_numpy(),
+                          "player": props["player"].astype(str).to_numpy(), "team": props["team"].astype(str).to_numpy()})
+    repeated = frame.duplicated(["home", "away", "player"], keep=False).to_numpy()
+    labels = np.where(repeated, frame["player"] + " (" + frame["team"] + ")", frame["player"])
+    frame["label"] = labels
+    occurrence = frame.groupby(["home", "away", "label"], sort=False).cumcount().to_numpy()
+    return pd.Series(np.where(occurrence > 0, [f"{label} {n + 1}" for label, n in zip(labels, occurrence)], labels),
+                     index=props.index)
+
+
+def player_market_probabilities(props):
+    """{market: {outcome: probability}} for one fixture, in the predictor's nested layout (outcomes from player_outcomes)"""
+    outcomes = player_outcomes(props)
+    return {market: dict(zip(outcomes, props[column].astype(float))) for column, market in PLAYER_MARKETS.items()}
+
+
+def player_probability_table(props):
+    """Long (fixture, market, outcome, probability) rows, as value_scanner.model_probability_table"""
+    fixture = [fixture_key(home, away) for home, away in zip(props["home"], props["away"])]
+    outcomes = player_outcomes(props).to_numpy()
+    frames = [pd.DataFrame({"fixture": fixture, "market": market, "outcome": outcomes,
+                            "probability": props[column].to_numpy(dtype=float)})
+              for column, market in PLAYER_MARKETS.items()]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,269 @@
+import re
+import numpy as np
+
+_OVER_UNDER = re.compile(r"^(Over|Under)\s*(\d+(?:\.\d+)?)$", re.IGNORECASE)
+_LINE_IN_MARKET = re.compile(r"(\d+(?:\.\d+)?)")
+_CORRECT_SCORE = re.compile(r"^(\d+)\s*-\s*(\d+)$")
+_HANDICAP = re.compile(r"^(Home|Away)\s*([+-]\d+(?:\.\d+)?)$", re.IGNORECASE)
+
+
+def _settlement_on_scores(market, outcome, home_goals, away_goals):
+    """Win (1), push (0) or loss (-1) of a bet on every scoreline, or None if the bet
+    cannot be settled from the final score alone (corners, first goal, ...)"""
+    diff = home_goals - away_goals
+    total = home_goals + away_goals
+
+    def win_if(mask):
+        return np.where(mask, 1, -1)
+
+    if market == "1X2":
+        if outcome in ("Home Win", "Home", "1"):
+            return win_if(diff > 0)
+        if outcome in ("Draw", "X"):
+            return win_if(diff == 0)
+        if outcome in ("Away Win", "Away", "2"):
+            return win_if(diff < 0)
+
+    if market == "Draw No Bet":
+        if outcome == "Home":
+            return np.where(diff > 0, 1, np.where(diff == 0, 0, -1))
+        if outcome == "Away":
+            return np.where(diff < 0, 1, np.where(diff == 0, 0, -1))
+
+    if market == "Double Chance":
+        if outcome == "Home or Draw":
+            return win_if(diff >= 0)
+        if outcome == "Draw or Away":
+            return win_if(diff <= 0)
+        if outcome == "Home or Away":
+            return win_if(diff != 0)
+
+    if market == "Both Teams to Score":
+        both = (home_goals > 0) & (away_goals > 0)
+        if outcome == "Yes":
+            return win_if(both)
+        if outcome == "No":
+            return win_if(~both)
+
+    if market.startswith("Over/Under") and outcome in ("Over", "Under"):
+        line = _LINE_IN_MARKET.search(market)
+        if line:
+            line = float(line.group(1))
+            over = np.where(total > line, 1, np.where(total == line, 0, -1))
+            return over if outcome == "Over" else -over
+
+    if market in ("Total Goals", "Goals"):
+        match = _OVER_UNDER.match(outcome)
+        if match:
+            line = float(match.group(2))
+            over = np.where(total > line, 1, np.where(total == line, 0, -1))
+            return over if match.group(1).lower() == "over" else -over
+
+    if market == "Correct Score":
+        match = _CORRECT_SCORE.match(outcome)
+        if match:
+            return win_if((home_goals == int(match.group(1))) & (away_goals == int(match.group(2))))
+
+    if market == "Asian Handicap":
+        match = _HANDICAP.match(outcome)
+        if match:
+            line = float(match.group(2))
+            margin = (diff if match.group(1).lower() == "home" else -diff) + line
+            return np.where(margin > 0, 1, np.where(margin == 0, 0, -1))
+
+    return None
+
+
+def bet_returns_on_scores(bet, score_matrix):
+    """Net return per unit stake of a bet on every scoreline of the matrix (flattened),
+    or None if the bet does not settle on the score"""
+    n = len(score_matrix)
+    home_goals, away_goals = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    result = _settlement_on_scores(bet["market"], bet["outcome"], home_goals.ravel(), away_goals.ravel())
+    if result is None:
+        return None
+    odds = float(bet["odds"])
+    return np.where(result > 0, odds - 1.0, np.where(result == 0, 0.0, -1.0))
+
+
+def settle_outcomes(market, outcome, home_goals, away_goals):
+    """Win (1), push (0) or loss (-1) of one selection for arrays of final scores, or None
+    if the market does not settle on the score"""
+    return _settlement_on_scores(market, outcome, np.asarray(home_goals), np.asarray(away_goals))
+
+
+def settle_on_score(bet, home_goals, away_goals):
+    """Profit per unit stake of a bet given the final score, or None if the score does not settle it"""
+    result = _settlement_on_scores(bet["market"], bet["outcome"], np.array([home_goals]), np.array([away_goals]))
+    if result is None:
+        return None
+    if result[0] > 0:
+        return float(bet["odds"]) - 1.0
+    return 0.0 if result[0] == 0 else -1.0
+
+
+def bet_probability(bet):
+    """Model probability of a bet (raw float, falling back to the formatted string)"""
+    if "probability" in bet:
+        return float(bet["probability"])
+    return float(str(bet["our_probability"]).strip('%')) / 100
+
+
+def _fit_marginals(weights, R, columns, probabilities, iterations=200, tol=1e-10):
+    """Reweight scenarios (iterative proportional fitting) so each bet in columns wins
+    with its probability among its settled (non-push) scenarios; push mass is kept"""
+    weights = weights.copy()
+    wins = {i: R[:, i] > 0 for i in columns}
+    losses = {i: R[:, i] < 0 for i in columns}
+    for _ in range(iterations):
+        worst = 0.0
+        for i, p in zip(columns, probabilities):
+            won, lost = weights[wins[i]].sum(), weights[losses[i]].sum()
+            settled = won + lost
+            worst = max(worst, abs(won / settled - p))
+            weights[wins[i]] *= p * settled / won
+            weights[losses[i]] *= (1 - p) * settled / lost
+        if worst < tol:
+            break
+    return weights
+
+
+def fixture_scenarios(bets, score_matrix):
+    """Joint outcome scenarios for bets on one fixture.
+
+    Bets that settle on the score share the scoreline axis, which supplies their
+    dependence; the score matrix is then reweighted so each of them wins with its own
+    model probability, the one that flagged it as value (markets priced off the matrix,
+    such as calibrated 1X2 or the Over/Under and BTTS rules, need not match it). Any
+    other bet (corners, first goal), or one the matrix never settles both ways, is an
+    independent Bernoulli with its model probability, which expands the scenario space
+    by a factor of two per such bet.
+
+    Returns (R, weights): R[s, i] is the net return of bet i in scenario s.
+    """
+    pm = np.asarray(score_matrix, dtype=float)
+    weights = pm.ravel() / pm.sum()
+    R = np.zeros((len(weights), len(bets)))
+
+    on_scores, independent = [], []
+    for i, bet in enumerate(bets):
+        returns = bet_returns_on_scores(bet, pm)
+        p = bet_probability(bet)
+        if returns is None or not (weights[returns > 0].sum() > 0 and weights[returns < 0].sum() > 0) or not 0 < p < 1:
+            independent.append(i)
+        else:
+            R[:, i] = returns
+            on_scores.append(i)
+
+    if on_scores:
+        weights = _fit_marginals(weights, R, on_scores, [bet_probability(bets[i]) for i in on_scores])
+
+    for i in independent:
+        p = min(max(bet_probability(bets[i]), 0.0), 1.0)
+        odds = float(bets[i]["odds"])
+        win = R.copy()
+        win[:, i] = odds - 1.0
+        lose = R.copy()
+        lose[:, i] = -1.0
+        R = np.vstack([win, lose])
+        weights = np.concatenate([weights * p, weights * (1 - p)])
+
+    return R, weights
+
+
+def optimize_kelly(R, weights, max_exposure=0.95, iterations=100, tol=1e-10):
+    """Stakes f >= 0 maximising sum_s w_s * log(1 + R[s] . f) with sum(f) <= max_exposure.
+
+    Projected Newton iterations on the whole scenario matrix at once; each step is a
+    couple of matrix products, so portfolios of dozens of bets solve in milliseconds.
+    """
+    R = np.asarray(R, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    w = w / w.sum()
+    n_bets = R.shape[1]
+    f = np.zeros(n_bets)
+    if n_bets == 0:
+        return f
+
+    def growth(stakes):
+        wealth = 1.0 + R @ stakes
+        if np.any(wealth <= 0):
+            return -np.inf
+        return float(w @ np.log(wealth))
+
+    current = growth(f)
+    for _ in range(iterations):
+        wealth = 1.0 + R @ f
+        scaled = R / wealth[:, None]
+        gradient = scaled.T @ w
+        hessian = (scaled * w[:, None]).T @ scaled + 1e-12 * np.eye(n_bets)
+
+        # Bets at zero with a non-positive gradient stay out of the Newton step
+        free = (f > 1e-12) | (gradient > 0)
+        if not np.any(free):
+            break
+        step = np.zeros(n_bets)
+        step[free] = np.linalg.solve(hessian[np.ix_(free, free)], gradient[free])
+
+        t = 1.0
+        while t > 1e-8:
+            candidate = np.clip(f + t * step, 0.0, None)
+            exposure = candidate.sum()
+            if exposure > max_exposure:
+                candidate *= max_exposure / exposure
+            value = growth(candidate)
+            if value >= current:
+                break
+            t *= 0.5
+        else:
+            break
+
+        improvement = value - current
+        f, current = candidate, value
+        if improvement < tol:
+            break
+
+    return f
+
+
+def fixture_portfolio_kelly(bets, score_matrix, bankroll_fraction=0.25, max_exposure=0.95):
+    """Fractional Kelly stakes for simultaneous bets on one fixture.
+
+    Uses the joint score distribution so correlated legs (e.g. Away Win, Over 2.5 and
+    BTTS) are not over-staked the way independent sizing would; a single bet gets the
+    calculate_kelly_criterion stake of its model probability.
+    """
+    if not bets:
+        return []
+    R, weights = fixture_scenarios(bets, score_matrix)
+    return (optimize_kelly(R, weights, max_exposure=max_exposure) * bankroll_fraction).tolist()
+
+
+def slate_portfolio_kelly(fixtures, bankroll_fraction=0.25, max_exposure=0.95, n_samples=20000, seed=0):
+    """Fractional Kelly stakes for bets across a slate of independent fixtures.
+
+    fixtures is a list of (bets, score_matrix). Each fixture's joint scenarios are
+    sampled independently, giving one shared scenario matrix for the whole slate.
+    Returns one list of stakes per fixture.
+    """
+    rng = np.random.default_rng(seed)
+    blocks = []
+    sizes = []
+    for bets, score_matrix in fixtures:
+        sizes.append(len(bets))
+        if not bets:
+            continue
+        R, weights = fixture_scenarios(bets, score_matrix)
+        picks = rng.choice(len(weights), size=n_samples, p=weights / weights.sum())
+        blocks.append(R[picks])
+
+    if not blocks:
+        return [[] for _ in fixtures]
+
+    stakes = optimize_kelly(np.hstack(blocks), np.ones(n_samples), max_exposure=max_exposure) * bankroll_fraction
+    result = []
+    start = 0
+    for size in sizes:
+        result.append(stakes[start:start + size].tolist())
+        start += size
+    return result
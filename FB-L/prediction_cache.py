@@ -0,0 +1,190 @@
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+import time
+from collections import OrderedDict
+
+# Version of the cached prediction's shape and contents; bump it whenever the predictor's
+# outputs or details change so entries written by older code are never served
+CACHE_SCHEMA_VERSION = 3
+
+
+def data_fingerprint(filepaths, content=False):
+    """Fingerprint the input spreadsheets so cached predictions follow the data version.
+
+    By default only the size and modification time of each file are hashed, which is
+    cheap enough to check before every lookup. Pass content=True to hash the bytes.
+    """
+    digest = hashlib.sha1()
+    for filepath in sorted(str(p) for p in filepaths if p):
+        digest.update(os.path.abspath(filepath).encode("utf-8"))
+        if not os.path.exists(filepath):
+            digest.update(b"<missing>")
+            continue
+        if content:
+            with open(filepath, "rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(block)
+        else:
+            st = os.stat(filepath)
+            digest.update(f"{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def make_cache_key(league, home_team, away_team, params=None, fingerprint=""):
+    """Build the cache key for one fixture under a given parameter set, data version and cache schema"""
+    payload = json.dumps(
+        [CACHE_SCHEMA_VERSION, league, home_team, away_team, params or {}, fingerprint],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """A two-tier (in-memory LRU + SQLite) cache for full prediction outputs.
+
+    Entries are keyed by (league, home, away, model params, data fingerprint). The
+    fingerprint of the source spreadsheets is re-checked on every lookup, and when it
+    changes all entries recorded against the old version are dropped from both tiers.
+    """
+
+    def __init__(self, league, source_files=(), path=None, max_memory_entries=256, content_hash=False):
+        self.league = league
+        self.source_files = [f for f in source_files if f]
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.content_hash = content_hash
+
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " key TEXT PRIMARY KEY,"
+                " league TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " value BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_predictions_league ON predictions (league, fingerprint)"
+            )
+            self._conn.commit()
+
+        self.fingerprint = None
+        self.refresh()
+
+    def refresh(self):
+        """Re-fingerprint the source files and drop entries built from older data"""
+        current = data_fingerprint(self.source_files, content=self.content_hash)
+        if current == self.fingerprint:
+            return False
+
+        self.fingerprint = current
+        self._memory.clear()
+        if self._conn is not None:
+            cur = self._conn.execute(
+                "DELETE FROM predictions WHERE league = ? AND fingerprint != ?",
+                (self.league, current)
+            )
+            self._conn.commit()
+            if cur.rowcount:
+                self.invalidations += cur.rowcount
+        return True
+
+    def _key(self, home_team, away_team, params):
+        return make_cache_key(self.league, home_team, away_team, params, self.fingerprint)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, home_team, away_team, params=None):
+        """Return the cached prediction or None"""
+        self.refresh()
+        key = self._key(home_team, away_team, params)
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+
+        if self._conn is not None:
+            row = self._conn.execute("SELECT value FROM predictions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value = pickle.loads(row[0])
+                self._remember(key, value)
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, home_team, away_team, value, params=None):
+        """Store a prediction in both tiers"""
+        key = self._key(home_team, away_team, params)
+        self._remember(key, value)
+        if self._conn is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions (key, league, fingerprint, created, value) VALUES (?, ?, ?, ?, ?)",
+                (key, self.league, self.fingerprint, time.time(), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            )
+            self._conn.commit()
+
+    def get_or_compute(self, home_team, away_team, compute, params=None):
+        """Return the cached prediction for a fixture, calling compute() on a miss"""
+        value = self.get(home_team, away_team, params)
+        if value is None:
+            value = compute()
+            self.put(home_team, away_team, value, params)
+        return value
+
+    def clear(self):
+        """Drop every entry for this league from both tiers"""
+        self._memory.clear()
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM predictions WHERE league = ?", (self.league,))
+            self._conn.commit()
+
+    def stats(self):
+        """Hit rates and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        disk_entries = 0
+        disk_bytes = 0
+        if self._conn is not None:
+            disk_entries = self._conn.execute(
+                "SELECT COUNT(*) FROM predictions WHERE league = ?", (self.league,)
+            ).fetchone()[0]
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            disk_bytes = page_count * page_size
+
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_capacity": self.max_memory_entries,
+            "disk_entries": disk_entries,
+            "disk_bytes": disk_bytes,
+            "invalidated_entries": self.invalidations,
+            "fingerprint": self.fingerprint,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,96 @@
+import sys
+import json
+from datetime import datetime, timezone
+
+# Bump when a field is renamed or removed; adding fields keeps the version
+SCHEMA_VERSION = 1
+
+
+def _json_default(obj):
+    """Convert numpy/pandas scalars and other stragglers into plain JSON values"""
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _value_bet_record(bet):
+    """Numeric view of one entry from calculate_value_bets"""
+    odds = float(bet["odds"])
+    return {
+        "market": bet["market"],
+        "outcome": bet["outcome"],
+        "odds": odds,
+        "probability": float(bet["probability"]),
+        "implied_probability": 1 / odds if odds > 0 else None,
+        "fair_probability": float(bet["fair_probability"]) if "fair_probability" in bet else None,
+        "edge": float(bet["edge"]),
+        "expected_value": float(bet["expected_value"]),
+    }
+
+
+def fixture_record(league, home_team, away_team, suggestions, markets, confidence, value_bets, details):
+    """Build the stable JSON record for one priced fixture"""
+    probabilities = {
+        market: {outcome: float(p) for outcome, p in outcomes.items()}
+        for market, outcomes in details["probabilities"].items()
+    }
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "league": league,
+        "home_team": home_team,
+        "away_team": away_team,
+        "probabilities": probabilities,
+        "markets": markets,
+        "confidence": confidence,
+        "value_bets": [_value_bet_record(bet) for bet in value_bets],
+        "features": details["features"],
+        "suggestions": suggestions,
+    }
+
+
+class PredictionStreamWriter:
+    """Writes one JSON line per priced fixture and flushes it straight away.
+
+    Pass a path, "-" for stdout, or an open text stream. Consumers can tail the file and
+    start on the first fixtures while the rest of a batch is still being priced.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        if hasattr(path, "write"):
+            self._fh = path
+            self._owns_handle = False
+        elif path == "-":
+            self._fh = sys.stdout
+            self._owns_handle = False
+        else:
+            self._fh = open(path, "a", encoding="utf-8")
+            self._owns_handle = True
+
+    def write(self, record):
+        self._fh.write(json.dumps(record, default=_json_default, ensure_ascii=False))
+        self._fh.write("\n")
+        self._fh.flush()
+        self.count += 1
+
+    def write_fixture(self, league, home_team, away_team, prediction):
+        """Write a (suggestions, markets, confidence, value_bets, details) prediction"""
+        suggestions, markets, confidence, value_bets, details = prediction
+        self.write(fixture_record(league, home_team, away_team, suggestions, markets, confidence, value_bets, details))
+
+    def close(self):
+        if self._owns_handle:
+            self._fh.close()
+        else:
+            self._fh.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
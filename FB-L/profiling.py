@@ -0,0 +1,161 @@
+import os, sys
+import io
+import time
+import atexit
+import pstats
+import cProfile
+import tracemalloc
+import pandas as pd
+import stage_timer
+
+# Functions and allocation sites listed in each stage's text reports
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+# Frames kept per allocation by tracemalloc (more frames, slower runs)
+TRACE_FRAMES = 1
+# Profile of the code that runs outside every stage
+OTHER_STAGE = "other"
+
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _file_stem(path):
+    return path.replace("/", ".")
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+
+
+class ProfileSession:
+    """cProfile and tracemalloc per pipeline stage (the stages of stage_timer).
+
+    Each stage path gets its own profiler, switched on while the stage is the
+    innermost one running, so a stage's profile excludes its timed sub-stages.
+    Memory is tracked per stage as the traced peak above the stage's starting
+    level, and the allocations of each stage's first call are diffed from
+    tracemalloc snapshots (later calls skip the snapshot cost).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.profiles = {OTHER_STAGE: cProfile.Profile()}
+        self.calls = {}
+        self.peaks = {}
+        self.allocations = {}
+        self.memory_stack = []
+        self.profile_stack = [self.profiles[OTHER_STAGE]]
+        self.finished = False
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        stage_timer.add_listener(self)
+        self.profile_stack[-1].enable()
+
+    def stage_entered(self, path):
+        self.profile_stack[-1].disable()
+        if self.memory_stack:
+            self.memory_stack[-1]["peak"] = max(self.memory_stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        before = _snapshot() if path not in self.allocations else None
+        tracemalloc.reset_peak()
+        self.memory_stack.append({"start": tracemalloc.get_traced_memory()[0], "peak": 0, "before": before})
+
+        profile = self.profiles.setdefault(path, cProfile.Profile())
+        self.profile_stack.append(profile)
+        profile.enable()
+
+    def stage_exited(self, path):
+        if len(self.profile_stack) == 1:
+            return  # The stage was already running when profiling started
+        self.profile_stack.pop().disable()
+        frame = self.memory_stack.pop()
+        peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+        self.peaks[path] = max(self.peaks.get(path, 0), peak - frame["start"])
+        self.calls[path] = self.calls.get(path, 0) + 1
+        if frame["before"] is not None:
+            self.allocations[path] = _snapshot().compare_to(frame["before"], "lineno")
+        if self.memory_stack:
+            self.memory_stack[-1]["peak"] = max(self.memory_stack[-1]["peak"], peak)
+        self.profile_stack[-1].enable()
+
+    def finish(self):
+        """Stop profiling and write the reports; returns the summary table"""
+        if self.finished:
+            return None
+        self.finished = True
+        for profile in self.profile_stack:
+            profile.disable()
+        stage_timer.remove_listener(self)
+        run_snapshot = _snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rows = []
+        for path, profile in self.profiles.items():
+            stem = _file_stem(path)
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:
+                continue  # Never enabled long enough to record a call
+            stats.dump_stats(os.path.join(self.directory, f"{stem}.pstats"))
+            with open(os.path.join(self.directory, f"{stem}_profile.txt"), "w") as f:
+                text = io.StringIO()
+                stats = pstats.Stats(profile, stream=text)
+                stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+                f.write(text.getvalue())
+
+            differences = self.allocations.get(path)
+            if differences is not None:
+                with open(os.path.join(self.directory, f"{stem}_allocations.txt"), "w") as f:
+                    f.write(f"Top allocations of the first call of {path} (size and count change per line)\n\n")
+                    for difference in differences[:TOP_ALLOCATIONS]:
+                        f.write(f"{difference}\n")
+
+            rows.append({
+                "stage": path,
+                "calls": self.calls.get(path, 0),
+                "profiled_s": stats.total_tt,
+                "peak_kb": self.peaks.get(path, 0) / 1024,
+                "first_call_allocated_kb": sum(d.size_diff for d in differences) / 1024 if differences else 0.0,
+            })
+
+        # Allocations still alive at the end of the run, whichever stage made them
+        with open(os.path.join(self.directory, "run_allocations.txt"), "w") as f:
+            f.write(f"Traced memory at exit {current / 1024:.0f} KB, peak {peak / 1024:.0f} KB\n\n")
+            for statistic in run_snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{statistic}\n")
+
+        table = pd.DataFrame(rows, columns=["stage", "calls", "profiled_s", "peak_kb", "first_call_allocated_kb"])
+        table = table.sort_values("profiled_s", ascending=False, kind="stable").reset_index(drop=True)
+        table.to_csv(os.path.join(self.directory, "summary.csv"), index=False)
+        print(f"🔬 Profile reports for {len(table)} stages written to {self.directory}", file=sys.stderr)
+        return table
+
+
+def profile_directory(base_dir, label):
+    """Timestamped directory for one profiled run, e.g. profiles/batch_20250101_120000"""
+    return os.path.join(base_dir, f"{label}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+
+def start_profiling(base_dir, label):
+    """Profile the rest of the run into a new timestamped directory under base_dir.
+
+    Stage timing is switched on (its table goes to stage_timings.csv unless it
+    was already enabled elsewhere) and the reports are written at exit.
+    """
+    directory = profile_directory(base_dir, label)
+    session = ProfileSession(directory)
+    session.start()
+    if not stage_timer.is_enabled():
+        stage_timer.enable(os.path.join(directory, "stage_timings.csv"))
+    atexit.register(session.finish)
+    print(f"🔬 Profiling into {directory}", file=sys.stderr)
+    return session
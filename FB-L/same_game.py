@@ -0,0 +1,244 @@
+import os, sys
+import re
+import time
+import argparse
+import contextlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Joint samples drawn per fixture
+SIMULATIONS = 1_000_000
+# Variance of the match intensity factor (gamma, mean 1) shared by every count of a sample;
+# 0 leaves goals, corners and cards independent of each other
+INTENSITY_VARIANCE = 0.05
+# Team cards per match when the squad sheet has no card or minutes columns
+DEFAULT_TEAM_CARDS = 2.0
+# Player minutes in one full team match
+TEAM_MATCH_MINUTES = 11 * 90
+# Fixtures whose samples are kept in memory at once
+MAX_CACHED_FIXTURES = 8
+SAMPLE_FIELDS = ("home_goals", "away_goals", "home_corners", "away_corners", "home_cards", "away_cards")
+
+# Legs that can be named instead of written as conditions on the sample fields
+NAMED_LEGS = {
+    "home win": "home_goals > away_goals",
+    "draw": "home_goals == away_goals",
+    "away win": "home_goals < away_goals",
+    "home or draw": "home_goals >= away_goals",
+    "away or draw": "home_goals <= away_goals",
+    "btts yes": "home_goals > 0 and away_goals > 0",
+    "btts no": "home_goals == 0 or away_goals == 0",
+}
+# "Over 2.5", "Under 9.5 Corners", "Home Over 1.5 Cards": goals unless corners or cards are named
+LINE_LEG = re.compile(r"^(?:(home|away)\s+)?(over|under)\s+(\d+(?:\.\d+)?)(?:\s+(goals|corners|cards))?$")
+
+
+def team_card_rate(team_df):
+    """Expected cards per match of a team, from its squad's cards per full team match played"""
+    if not {"Yellow_Cards", "Minutes"}.issubset(team_df.columns):
+        return DEFAULT_TEAM_CARDS
+    cards = pd.to_numeric(team_df["Yellow_Cards"], errors="coerce").fillna(0).sum()
+    if "Red_Cards" in team_df.columns:
+        cards += pd.to_numeric(team_df["Red_Cards"], errors="coerce").fillna(0).sum()
+    matches = pd.to_numeric(team_df["Minutes"], errors="coerce").fillna(0).sum() / TEAM_MATCH_MINUTES
+    return float(cards / matches) if matches > 0 else DEFAULT_TEAM_CARDS
+
+
+def fixture_rates(details, team1_df, team2_df):
+    """Mean of each sample field for a fixture: the predictor's lambdas and corner
+    expectations, and each squad's card rate"""
+    features = details["features"]
+    return {
+        "home_goals": features["lambda_home"],
+        "away_goals": features["lambda_away"],
+        "home_corners": features["expected_home_corners"],
+        "away_corners": features["expected_away_corners"],
+        "home_cards": team_card_rate(team1_df),
+        "away_cards": team_card_rate(team2_df),
+    }
+
+
+def leg_expression(leg):
+    """The condition on the sample fields a leg stands for"""
+    text = " ".join(str(leg).split())
+    named = NAMED_LEGS.get(text.lower())
+    if named:
+        return named
+    line = LINE_LEG.match(text.lower())
+    if line:
+        side, direction, value, kind = line.groups()
+        return f"{side or 'total'}_{kind or 'goals'} {'>' if direction == 'over' else '<'} {value}"
+    return text
+
+
+def simulate_fixture(rates, simulations=SIMULATIONS, intensity_variance=INTENSITY_VARIANCE, seed=None):
+    """Joint samples of one fixture: every count is Poisson around its rate times a match
+    intensity shared by the whole sample, which is what correlates the legs of a combo"""
+    rng = np.random.default_rng(seed)
+    if intensity_variance > 0:
+        intensity = rng.gamma(1 / intensity_variance, intensity_variance, simulations)
+    else:
+        intensity = np.ones(simulations)
+    samples = {field: rng.poisson(rates[field] * intensity).astype(np.int16) for field in SAMPLE_FIELDS}
+    return FixtureSamples(samples, rates)
+
+
+class FixtureSamples:
+    """Cached joint samples of one fixture; legs are evaluated once and their masks reused across combos"""
+
+    def __init__(self, samples, rates=None):
+        self.samples = dict(samples)
+        for kind in ("goals", "corners", "cards"):
+            self.samples[f"total_{kind}"] = self.samples[f"home_{kind}"] + self.samples[f"away_{kind}"]
+        self.samples["goal_difference"] = self.samples["home_goals"] - self.samples["away_goals"]
+        self.rates = rates or {}
+        self.masks = {}
+
+    def __len__(self):
+        return len(self.samples["home_goals"])
+
+    def mask(self, leg):
+        """Boolean mask of the samples in which a leg wins"""
+        expression = leg_expression(leg)
+        if expression not in self.masks:
+            try:
+                mask = pd.eval(expression, local_dict=self.samples, engine="python")
+            except Exception as e:
+                raise ValueError(f"Could not evaluate leg '{leg}': {e}") from e
+            mask = np.asarray(mask)
+            if mask.dtype != bool or mask.shape != (len(self),):
+                raise ValueError(f"Leg '{leg}' is not a condition on the sample fields")
+            self.masks[expression] = mask
+        return self.masks[expression]
+
+    def probability(self, legs):
+        """Probability that every leg wins together"""
+        legs = list(legs)
+        if not legs:
+            return 1.0
+        joint = self.mask(legs[0])
+        for leg in legs[1:]:
+            joint = joint & self.mask(leg)
+        return float(np.count_nonzero(joint) / len(self))
+
+    def price(self, legs):
+        """Joint probability of a combo next to the product of its legs' own probabilities"""
+        legs = list(legs)
+        probability = self.probability(legs)
+        independent = float(np.prod([self.probability([leg]) for leg in legs]))
+        return {
+            "combo": " + ".join(str(leg) for leg in legs),
+            "legs": len(legs),
+            "probability": probability,
+            "std_error": float(np.sqrt(probability * (1 - probability) / len(self))),
+            "fair_odds": 1 / probability if probability > 0 else float("inf"),
+            "independent_probability": independent,
+            "correlation_lift": probability / independent if independent > 0 else float("nan"),
+        }
+
+
+class SameGamePricer:
+    """Prices same-game combos from per-fixture samples, simulated on first use and kept in an LRU"""
+
+    def __init__(self, team_df, player_df, corner_data, form_data, params=None, elo=None,
+                 simulations=SIMULATIONS, intensity_variance=INTENSITY_VARIANCE, seed=0, max_fixtures=MAX_CACHED_FIXTURES):
+        self.team_df = team_df
+        self.player_df = player_df
+        self.corner_data = corner_data
+        self.form_data = form_data
+        self.params = params
+        self.elo = elo
+        self.simulations = simulations
+        self.intensity_variance = intensity_variance
+        self.seed = seed
+        self.max_fixtures = max_fixtures
+        self.player_teams = set(player_df["Team"].dropna().unique())
+        self._fixtures = OrderedDict()
+
+    def samples(self, home_input, away_input):
+        """FixtureSamples of a fixture, or None if either squad is missing"""
+        from main import find_team_match, get_fixture_inputs, elo_difference
+        from match_predictor import get_betting_suggestions_and_markets
+
+        home_team = find_team_match(home_input, self.player_teams)
+        away_team = find_team_match(away_input, self.player_teams)
+        key = (home_team, away_team)
+        if key in self._fixtures:
+            self._fixtures.move_to_end(key)
+            return self._fixtures[key]
+
+        inputs = get_fixture_inputs(home_team, away_team, self.team_df, self.player_df) if home_team and away_team else None
+        if inputs is None:
+            return None
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            details = get_betting_suggestions_and_markets(
+                **inputs, corner_data=self.corner_data, form_data=self.form_data, return_details=True,
+                params=self.params, elo_diff=elo_difference(self.elo, home_team, away_team))[4]
+        rates = fixture_rates(details, inputs["team1_df"], inputs["team2_df"])
+        samples = simulate_fixture(rates, self.simulations, self.intensity_variance, self.seed)
+        self._fixtures[key] = samples
+        while len(self._fixtures) > self.max_fixtures:
+            self._fixtures.popitem(last=False)
+        return samples
+
+    def price_combos(self, home_input, away_input, combos):
+        """One row per combo (a list of legs) of a fixture"""
+        samples = self.samples(home_input, away_input)
+        if samples is None:
+            raise ValueError(f"Could not find squads for {home_input} vs {away_input}")
+        return pd.DataFrame([samples.price(legs) for legs in combos])
+
+
+def main(argv=None):
+    from main import PARAMS_FILE, ELO_FILE, load_league_data, load_predictor_params, load_elo_ratings
+
+    parser = argparse.ArgumentParser(description="Price same-game combos from joint goal, corner and card samples")
+    parser.add_argument("--home", required=True, help="Home team")
+    parser.add_argument("--away", required=True, help="Away team")
+    parser.add_argument("--combo", action="append", required=True,
+                        help="Legs separated by ';', e.g. 'Home Win; Over 2.5; Over 9.5 Corners' or conditions "
+                             "such as 'total_cards > 4.5' (repeat for more combos)")
+    parser.add_argument("--simulations", type=int, default=SIMULATIONS, help="Joint samples drawn for the fixture")
+    parser.add_argument("--intensity-variance", type=float, default=INTENSITY_VARIANCE,
+                        help="Variance of the shared match intensity (0 for independent goals, corners and cards)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the simulation")
+    parser.add_argument("--params", default=PARAMS_FILE, help="JSON of tuned predictor parameters")
+    parser.add_argument("--elo", default=ELO_FILE, help="Elo ratings file (from elo_engine.py)")
+    parser.add_argument("--out", help="Write the priced combos to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            team_df, player_df, corner_data, form_data = load_league_data()
+            pricer = SameGamePricer(team_df, player_df, corner_data, form_data,
+                                    params=load_predictor_params(args.params), elo=load_elo_ratings(args.elo),
+                                    simulations=args.simulations, intensity_variance=args.intensity_variance,
+                                    seed=args.seed)
+    except Exception as e:
+        print("❌ Failed to load data:", e, file=sys.stderr)
+        sys.exit(1)
+
+    combos = [[leg.strip() for leg in combo.split(";") if leg.strip()] for combo in args.combo]
+    try:
+        start = time.perf_counter()
+        samples = pricer.samples(args.home, args.away)
+        simulated = time.perf_counter()
+        table = pricer.price_combos(args.home, args.away, combos)
+        priced = time.perf_counter()
+    except ValueError as e:
+        print("❌", e, file=sys.stderr)
+        sys.exit(1)
+
+    rates = ", ".join(f"{field} {rate:.2f}" for field, rate in samples.rates.items())
+    print(f"\n--- 🎲 SAME-GAME COMBOS: {args.home} vs {args.away} ---")
+    print(f"   {len(samples):,} samples in {simulated - start:.2f}s, {len(combos)} combos in {(priced - simulated) * 1000:.1f} ms")
+    print(f"   Rates: {rates}")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"💾 Combos saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import pandas as pd
+
+# Formats a league sheet can be stored in; xlsx is what the data exports come as
+SHEET_EXTENSIONS = (".xlsx", ".parquet", ".csv")
+
+
+def sheet_format(filepath):
+    """Storage format of a sheet from its extension ('csv' covers compressed .csv.gz too)"""
+    lower = str(filepath).lower()
+    if lower.endswith(".parquet"):
+        return "parquet"
+    if lower.endswith((".csv", ".csv.gz", ".csv.zip", ".csv.bz2")):
+        return "csv"
+    return "xlsx"
+
+
+def read_sheet(filepath, sheet_name="Sheet1"):
+    """A league sheet as a DataFrame; sheet_name only applies to Excel files"""
+    fmt = sheet_format(filepath)
+    if fmt == "parquet":
+        return pd.read_parquet(filepath)
+    if fmt == "csv":
+        return pd.read_csv(filepath)
+    return pd.read_excel(filepath, sheet_name=sheet_name)
+
+
+def write_sheet(df, filepath):
+    """Write a league sheet in the format of its extension, readable by read_sheet"""
+    fmt = sheet_format(filepath)
+    if fmt == "parquet":
+        df.to_parquet(filepath, index=False)
+    elif fmt == "csv":
+        df.to_csv(filepath, index=False)
+    else:
+        df.to_excel(filepath, sheet_name="Sheet1", index=False)
+    return filepath
+
+
+def find_sheet(filepath):
+    """filepath, or the same sheet stored under another of SHEET_EXTENSIONS when it does not exist"""
+    if os.path.exists(filepath):
+        return filepath
+    stem = os.path.splitext(filepath)[0]
+    for extension in SHEET_EXTENSIONS:
+        if os.path.exists(stem + extension):
+            return stem + extension
+    return filepath
@@ -0,0 +1,179 @@
+import os, sys
+import json
+import atexit
+import functools
+import contextlib
+from time import perf_counter
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+# Set to 1 to print the stage table at exit, or to a path to write it there (.json or .csv)
+TIMINGS_ENV = "FBL_STAGE_TIMINGS"
+PERCENTILES = (50, 90, 99)
+
+
+class _TimingState:
+    def __init__(self):
+        self.enabled = False
+        self.output = None
+        self.stack = []
+        self.samples = defaultdict(list)
+        self.listeners = []
+        self.reporting = False
+
+
+_state = _TimingState()
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def _record(path, seconds):
+    _state.samples[path].append(seconds)
+
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _state.stack.append(self.name)
+        for listener in _state.listeners:
+            listener.stage_entered("/".join(_state.stack))
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        path = "/".join(_state.stack)
+        _record(path, perf_counter() - self.start)
+        for listener in reversed(_state.listeners):
+            listener.stage_exited(path)
+        _state.stack.pop()
+        return False
+
+
+class _Laps:
+    """Times consecutive phases of the current stage: each call closes the phase since the last one"""
+
+    def __init__(self):
+        self.prefix = "/".join(_state.stack)
+        self.last = perf_counter()
+
+    def __call__(self, phase):
+        now = perf_counter()
+        _record(f"{self.prefix}/{phase}" if self.prefix else phase, now - self.last)
+        self.last = perf_counter()
+
+
+def _no_lap(phase):
+    pass
+
+
+def stage(name):
+    """Context manager timing one stage, nested under the stages already running.
+
+    Disabled, it returns a shared no-op context, so instrumented code pays one
+    attribute check per stage.
+    """
+    if not _state.enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def laps():
+    """Phase timer for the current stage: call it with a phase name at the end of each phase"""
+    if not _state.enabled:
+        return _no_lap
+    return _Laps()
+
+
+def timed(name):
+    """Decorator timing every call of a function as a stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(output=None):
+    """Start recording; the summary is reported at exit (printed, or written to output)"""
+    _state.enabled = True
+    _state.output = output
+    if not _state.reporting:
+        atexit.register(_report_at_exit)
+        _state.reporting = True
+
+
+def add_listener(listener):
+    """Call listener.stage_entered(path) and listener.stage_exited(path) around every stage
+    (outside the timed interval); used by profiling.py to switch profilers per stage"""
+    _state.listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _state.listeners:
+        _state.listeners.remove(listener)
+
+
+def disable():
+    _state.enabled = False
+
+
+def is_enabled():
+    return _state.enabled
+
+
+def reset():
+    _state.samples.clear()
+
+
+def summary():
+    """One row per stage path: calls, total, mean and percentile latencies in milliseconds"""
+    rows = []
+    for path in sorted(_state.samples):
+        times = np.array(_state.samples[path]) * 1000
+        row = {
+            "stage": path,
+            "calls": len(times),
+            "total_ms": times.sum(),
+            "mean_ms": times.mean(),
+        }
+        row.update({f"p{q}_ms": value for q, value in zip(PERCENTILES, np.percentile(times, PERCENTILES))})
+        row["max_ms"] = times.max()
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["stage", "calls", "total_ms", "mean_ms"] + [f"p{q}_ms" for q in PERCENTILES] + ["max_ms"])
+
+
+def report(output=None, stream=None):
+    """Print the stage table (indented by depth), or write it to a .json or .csv file"""
+    table = summary()
+    if table.empty:
+        return table
+    if output:
+        if output.lower().endswith(".json"):
+            with open(output, "w") as f:
+                json.dump({"pid": os.getpid(), "stages": table.to_dict("records")}, f, indent=1)
+        else:
+            table.to_csv(output, index=False)
+        print(f"⏱️ Stage timings written to {output}", file=stream or sys.stderr)
+        return table
+
+    shown = table.copy()
+    shown["stage"] = [("  " * path.count("/")) + path.rsplit("/", 1)[-1] for path in shown["stage"]]
+    print("\n--- ⏱️ STAGE TIMINGS (ms) ---", file=stream or sys.stderr)
+    print(shown.to_string(index=False, float_format=lambda v: f"{v:.2f}"), file=stream or sys.stderr)
+    return table
+
+
+def _report_at_exit():
+    if _state.enabled:
+        report(_state.output)
+
+
+# Enabled from the environment, so any entry point can be timed without code changes
+if os.environ.get(TIMINGS_ENV):
+    enable(None if os.environ[TIMINGS_ENV] == "1" else os.environ[TIMINGS_ENV])
@@ -0,0 +1,296 @@
+import os, sys
+import csv
+import json
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+from league_rules import DEFAULT_CUTOFF_POINTS, league_rules, zone_bounds, team_pressure, normalize_sentiment
+
+# Counters kept per team; everything else in the table is derived from them
+COUNT_COLUMNS = ["Played", "Won", "Drawn", "Lost", "Goals_For", "Goals_Against", "Goal_Difference", "Points"]
+# Derived per-match rates and their rounding, as load_team_data computes them
+RATE_COLUMNS = {
+    "Win_Rate": ("Won", 3),
+    "Draw_Rate": ("Drawn", 3),
+    "Loss_Rate": ("Lost", 3),
+    "Avg_Goals_For": ("Goals_For", 2),
+    "Avg_Goals_Against": ("Goals_Against", 2),
+    "Goal_Diff_per_Match": ("Goal_Difference", 2),
+}
+RESULT_FIELDS = ["home", "away", "home_goals", "away_goals"]
+# Counter and points of each outcome for the team
+OUTCOMES = {"win": ("Won", 3), "draw": ("Drawn", 1), "loss": ("Lost", 0)}
+
+
+class StandingsEngine:
+    """League table kept current one match result at a time.
+
+    A result updates the two teams' counters in O(1) and moves each of them up or
+    down the ranking only as far as it needs to go. Sentiment and pressure are then
+    recomputed for the teams whose row or position changed; everyone is refreshed
+    only when a cut-off (4th, 7th, first safe place) or the sentiment range moves.
+    Ties keep their current order, so the sheet's own tie-breaks survive.
+    """
+
+    def __init__(self, team_df, league=None, rules_by_league=None):
+        table = team_df.sort_values("Position", kind="stable").reset_index(drop=True)
+        self.league = league
+        self.rules = league_rules(league, rules_by_league)
+        self.teams = table["Team"].tolist()
+        self._index = {team: i for i, team in enumerate(self.teams)}
+        self._base = table
+        self.counts = {column: table[column].to_numpy(dtype=float).copy() if column in table.columns
+                       else np.zeros(len(table)) for column in COUNT_COLUMNS}
+        if "Goal_Difference" not in table.columns:
+            self.counts["Goal_Difference"] = self.counts["Goals_For"] - self.counts["Goals_Against"]
+        if {"Won", "Drawn", "Lost"} <= set(table.columns):
+            # load_team_data turns Played 0 into 1 against division by zero, so count the matches again
+            self.counts["Played"] = self.counts["Won"] + self.counts["Drawn"] + self.counts["Lost"]
+        self.ranking = list(range(len(self.teams)))
+        self.position = np.arange(1, len(self.teams) + 1)
+        self.bounds = zone_bounds(len(self.teams), self.rules)
+        self.rates = {column: np.zeros(len(self.teams)) for column in RATE_COLUMNS}
+        self.pressure = {}
+        self.adjusted_sentiment = np.zeros(len(self.teams))
+        self.sentiment = np.zeros(len(self.teams))
+        self.cutoffs = None
+        self.results_applied = 0
+        self._streams = {}
+        self._refresh(range(len(self.teams)))
+
+    @classmethod
+    def empty(cls, teams, league=None, rules_by_league=None):
+        """Engine for a new season: every team on zero, in the given order"""
+        table = pd.DataFrame({"Team": list(teams), "Position": range(1, len(teams) + 1)})
+        return cls(table, league, rules_by_league)
+
+    def __len__(self):
+        return len(self.teams)
+
+    def _team(self, name):
+        if name in self._index:
+            return self._index[name]
+        # Only spelling differences (case, spaces, punctuation); fuzzier matches could credit the wrong team
+        from main import normalize_team_name
+        matches = [i for i, team in enumerate(self.teams) if normalize_team_name(team) == normalize_team_name(name)]
+        if len(matches) != 1:
+            raise KeyError(f"Unknown team '{name}'")
+        return matches[0]
+
+    def _key(self, i):
+        return (self.counts["Points"][i], self.counts["Goal_Difference"][i], self.counts["Goals_For"][i])
+
+    def _rerank(self, i):
+        """Move team i to its place in the ranking; returns the teams whose position changed"""
+        moved = set()
+        p = self.position[i] - 1
+        while p > 0 and self._key(i) > self._key(self.ranking[p - 1]):
+            other = self.ranking[p - 1]
+            self.ranking[p - 1], self.ranking[p] = i, other
+            self.position[other] = p + 1
+            moved.add(other)
+            p -= 1
+        while p < len(self.ranking) - 1 and self._key(self.ranking[p + 1]) > self._key(i):
+            other = self.ranking[p + 1]
+            self.ranking[p + 1], self.ranking[p] = i, other
+            self.position[other] = p + 1
+            moved.add(other)
+            p += 1
+        self.position[i] = p + 1
+        return moved
+
+    def _cutoff(self, position, default):
+        position = int(position)
+        if 1 <= position <= len(self.ranking):
+            return self.counts["Points"][self.ranking[position - 1]]
+        return default
+
+    def _refresh(self, teams):
+        """Recompute rates, pressure and sentiment for teams (and for all teams if a cut-off moved)"""
+        cutoffs = {
+            "champions_league": self._cutoff(self.bounds["cl_end"], DEFAULT_CUTOFF_POINTS["champions_league"]),
+            "europa_league": self._cutoff(self.bounds["europe_end"], DEFAULT_CUTOFF_POINTS["europa_league"]),
+            "safety": self._cutoff(self.bounds["safe_position"], DEFAULT_CUTOFF_POINTS["safety"]),
+        }
+        if cutoffs != self.cutoffs:
+            teams = range(len(self.teams))
+            self.cutoffs = cutoffs
+        rows = np.fromiter(teams, dtype=int)
+        self.updated = rows
+
+        played = np.maximum(self.counts["Played"][rows], 1)
+        for column, (count, decimals) in RATE_COLUMNS.items():
+            self.rates[column][rows] = np.round(self.counts[count][rows] / played, decimals)
+
+        columns, adjusted = team_pressure(
+            self.position[rows], self.counts["Points"][rows], played, self.rates["Win_Rate"][rows],
+            self.rates["Loss_Rate"][rows], self.rates["Goal_Diff_per_Match"][rows], self.bounds, cutoffs,
+        )
+        for column, values in columns.items():
+            if column not in self.pressure:
+                self.pressure[column] = np.empty(len(self.teams), dtype=object if column == "Pressure_Level" else np.asarray(values).dtype)
+            self.pressure[column][rows] = values
+
+        # The 0-100 scale only moves for everyone when the league's best or worst score moves
+        old_range = (self.adjusted_sentiment.min(), self.adjusted_sentiment.max())
+        self.adjusted_sentiment[rows] = adjusted
+        new_range = (self.adjusted_sentiment.min(), self.adjusted_sentiment.max())
+        if new_range != old_range or len(rows) == len(self.teams):
+            self.sentiment = normalize_sentiment(self.adjusted_sentiment, *new_range)
+        else:
+            self.sentiment[rows] = normalize_sentiment(self.adjusted_sentiment[rows], *new_range)
+
+    def add_result(self, home_team, away_team, home_goals, away_goals):
+        """Apply one final score; returns the names of the teams whose rows changed"""
+        h, a = self._team(home_team), self._team(away_team)
+        home_goals, away_goals = int(home_goals), int(away_goals)
+        for team, scored, conceded in ((h, home_goals, away_goals), (a, away_goals, home_goals)):
+            column, points = OUTCOMES["win" if scored > conceded else "draw" if scored == conceded else "loss"]
+            self.counts["Played"][team] += 1
+            self.counts[column][team] += 1
+            self.counts["Goals_For"][team] += scored
+            self.counts["Goals_Against"][team] += conceded
+            self.counts["Goal_Difference"][team] += scored - conceded
+            self.counts["Points"][team] += points
+
+        affected = {h, a} | self._rerank(h) | self._rerank(a)
+        self._refresh(sorted(affected))
+        self.results_applied += 1
+        return [self.teams[i] for i in self.updated]
+
+    def add_results(self, results):
+        """Apply results in order (dicts or a DataFrame with home, away, home_goals, away_goals)"""
+        if isinstance(results, pd.DataFrame):
+            results = results.to_dict("records")
+        updated = set()
+        for result in results:
+            updated.update(self.add_result(result["home"], result["away"], result["home_goals"], result["away_goals"]))
+        return sorted(updated)
+
+    def consume(self, path):
+        """Apply the results appended to a stream file since the last call.
+
+        The file holds JSON lines, or CSV with a header when it ends in .csv, with
+        home, away, home_goals and away_goals fields. A trailing line without a
+        newline is still being written and is picked up on the next call.
+        Returns the names of the teams whose rows changed.
+        """
+        state = self._streams.setdefault(path, {"offset": 0, "header": None})
+        results = []
+        with open(path, "rb") as f:
+            f.seek(state["offset"])
+            while True:
+                start = f.tell()
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    f.seek(start)
+                    break
+                text = line.decode("utf-8").strip()
+                if not text:
+                    continue
+                if path.lower().endswith(".csv"):
+                    row = next(csv.reader([text]))
+                    if state["header"] is None:
+                        state["header"] = [column.strip().lower() for column in row]
+                        continue
+                    record = dict(zip(state["header"], row))
+                else:
+                    try:
+                        record = {str(key).lower(): value for key, value in json.loads(text).items()}
+                    except (ValueError, AttributeError):
+                        print(f"⚠️ Skipping unreadable result line: {text[:80]}")
+                        continue
+                if any(record.get(field) in (None, "") for field in RESULT_FIELDS):
+                    continue
+                results.append(record)
+            state["offset"] = f.tell()
+
+        updated = set()
+        for record in results:
+            try:
+                updated.update(self.add_result(record["home"], record["away"], record["home_goals"], record["away_goals"]))
+            except (KeyError, ValueError) as e:
+                print(f"⚠️ Skipping result {record.get('home')} vs {record.get('away')}: {e}")
+        return sorted(updated)
+
+    def table(self):
+        """The current table in load_team_data's layout, ordered by position"""
+        order = np.array(self.ranking)
+        data = {"Team": np.array(self.teams, dtype=object)[order], "Position": np.arange(1, len(order) + 1)}
+        for column in COUNT_COLUMNS:
+            data[column] = self.counts[column][order]
+        for column in RATE_COLUMNS:
+            data[column] = self.rates[column][order]
+        for column, values in self.pressure.items():
+            data[column] = values[order]
+        data["Sentiment_Score"] = self.sentiment[order]
+        table = pd.DataFrame(data)
+
+        # Same columns and dtypes as the table the engine started from
+        base = self._base.set_index("Team").loc[table["Team"]].reset_index()
+        for column in self._base.columns:
+            if column not in table.columns:
+                table[column] = base[column].to_numpy()
+            elif column != "Team":
+                try:
+                    table[column] = table[column].astype(self._base[column].dtype)
+                except (TypeError, ValueError):
+                    pass
+        return table[list(self._base.columns) + [column for column in table.columns if column not in self._base.columns]]
+
+
+def live_standings(team_df, stream_path, league=None, rules_by_league=None):
+    """team_df brought up to date with the results in a stream file"""
+    engine = StandingsEngine(team_df, league, rules_by_league)
+    engine.consume(stream_path)
+    if engine.results_applied:
+        print(f"📈 Applied {engine.results_applied} live results from {os.path.basename(stream_path)}")
+    return engine.table()
+
+
+def main(argv=None):
+    from main import LEAGUE_NAME, RULES_FILE, TEAM_FILE, load_team_data
+    from league_rules import load_league_rules
+
+    parser = argparse.ArgumentParser(description="Keep the league table current from a stream of match results")
+    parser.add_argument("--results", required=True, help="Results stream: JSON lines, or CSV with a header")
+    parser.add_argument("--team-file", default=TEAM_FILE, help="Starting table (the Sentiment xlsx)")
+    parser.add_argument("--league", default=LEAGUE_NAME)
+    parser.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="Keep reading new results, polling the stream every SECONDS")
+    parser.add_argument("--out", help="Write the updated table to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        rules = load_league_rules(RULES_FILE)
+        with contextlib.redirect_stdout(sys.stderr):
+            team_df = load_team_data(args.team_file, args.league, rules)
+        engine = StandingsEngine(team_df, args.league, rules)
+        updated = engine.consume(args.results)
+    except Exception as e:
+        print("❌ Standings update failed:", e, file=sys.stderr)
+        sys.exit(1)
+
+    columns = ["Position", "Team", "Played", "Won", "Drawn", "Lost", "Goal_Difference", "Points", "Pressure_Level"]
+    print(f"✅ {engine.results_applied} results applied, {len(updated)} teams updated")
+    print(engine.table()[columns].to_string(index=False))
+    if args.out:
+        engine.table().to_csv(args.out, index=False)
+
+    while args.follow:
+        time.sleep(args.follow)
+        updated = engine.consume(args.results)
+        if not updated:
+            continue
+        table = engine.table().set_index("Team")
+        for team in updated:
+            row = table.loc[team]
+            print(f"🔄 {team}: position {row['Position']}, {row['Points']} pts, {row['Pressure_Level']}")
+        if args.out:
+            engine.table().to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import os, sys
+import argparse
+import numpy as np
+import pandas as pd
+from main import TEAM_FILE, PLAYER_FILE, CORNER_FILE, FORM_FILE
+from sheet_io import SHEET_EXTENSIONS, write_sheet
+
+DEFAULT_LEAGUES = 1
+DEFAULT_TEAMS = 20
+DEFAULT_SQUAD_SIZE = 25
+DEFAULT_SEASONS = 1
+# Seasons run from August; each season's snapshot is dated at the end of June
+SEASON_START = "08-10"
+SNAPSHOT_DATE = "06-30"
+SEASON_DAYS = 280
+# Goals per team per match before strengths, and the home side's multiplier
+BASE_GOALS = 1.3
+HOME_ADVANTAGE = 1.15
+BASE_CORNERS = 4.9
+# Share of a team's strength kept into the next season
+STRENGTH_CARRYOVER = 0.7
+FORM_GAMES = 5
+PENALTY_SHARE = 0.1
+
+NATIONS = ("it", "es", "fr", "eng", "de", "br", "ar", "pt", "nl", "be", "hr", "rs")
+OUTFIELD_POSITIONS = ("DF", "MF", "FW", "DF,MF", "MF,FW", "FW,MF")
+OUTFIELD_MIX = (0.36, 0.33, 0.2, 0.03, 0.05, 0.03)
+GOALKEEPERS_PER_SQUAD = 2
+# Per primary position: goal weight, assist weight, then per-90 rates of cards and actions
+POSITION_PROFILES = pd.DataFrame({
+    "goal_weight": [0.0, 0.12, 0.35, 1.0],
+    "assist_weight": [0.02, 0.3, 0.8, 0.7],
+    "yellow": [0.05, 0.22, 0.2, 0.12],
+    "red": [0.003, 0.01, 0.006, 0.004],
+    "prgc": [0.0, 0.9, 1.8, 2.2],
+    "prgp": [0.3, 3.2, 5.0, 1.8],
+    "prgr": [0.0, 1.5, 4.0, 7.5],
+    "tkl": [0.05, 1.9, 1.8, 0.8],
+    "int": [0.05, 1.2, 0.8, 0.3],
+    "clr": [0.9, 3.5, 0.9, 0.5],
+    "blocks": [0.05, 1.3, 0.9, 0.4],
+}, index=["GK", "DF", "MF", "FW"])
+
+# Column names as the source exports have them (the loaders map these)
+PLAYER_COLUMNS = ["Player", "Nation", "Pos", "Squad", "Age", "Min", "Gls", "Ast", "G-PK", "CrdY", "CrdR", "xG", "npxG",
+                  "xAG", "npxG+xAG", "PrgC", "PrgP", "PrgR", "Tkl", "Int", "Clr", "Blocks"]
+TEAM_COLUMNS = ["Pos", "Team", "MP", "W", "D", "L", "GF", "GA", "GD", "Pts"]
+CORNER_COLUMNS = ["Team", "MP", "For", "Against", "x", "Total", "O85", "O95", "O105"]
+FORM_COLUMNS = ["#", "Team", "GP", "W", "D", "L", "GF", "GA", "GD", "Pts", "OppPPG"]
+SHEET_COLUMNS = {"team": TEAM_COLUMNS, "player": PLAYER_COLUMNS, "corner": CORNER_COLUMNS, "form": FORM_COLUMNS}
+# File names (without extension) of each sheet, as load_league_data expects them
+SHEET_STEMS = {kind: os.path.splitext(os.path.basename(path))[0]
+               for kind, path in (("team", TEAM_FILE), ("player", PLAYER_FILE), ("corner", CORNER_FILE), ("form", FORM_FILE))}
+
+
+def round_robin(n_teams):
+    """Double round-robin schedule by the circle method: (round, home, away) arrays.
+
+    Every team plays once per round (one team rests when n_teams is odd) and the
+    second half repeats the first with venues swapped.
+    """
+    n = n_teams + n_teams % 2
+    order = np.arange(n)
+    rounds, home, away = [], [], []
+    for r in range(n - 1):
+        first, second = order[:n // 2], order[n // 2:][::-1]
+        rounds.append(np.full(n // 2, r))
+        home.append(second if r % 2 else first)
+        away.append(first if r % 2 else second)
+        order = np.r_[order[0], order[-1], order[1:-1]]
+    rounds, home, away = np.concatenate(rounds), np.concatenate(home), np.concatenate(away)
+    rounds, home, away = np.r_[rounds, rounds + n - 1], np.r_[home, away], np.r_[away, home]
+    keep = (home < n_teams) & (away < n_teams)
+    return rounds[keep], home[keep], away[keep]
+
+
+def poisson_over(rate, line):
+    """P(X > line) for Poisson(rate), rate an array"""
+    rate = np.asarray(rate, dtype=float)[..., None]
+    k = np.arange(int(np.floor(line)) + 1)
+    log_pmf = k * np.log(rate) - rate - np.cumsum(np.r_[0.0, np.log(k[1:])])
+    return 1 - np.exp(log_pmf).sum(axis=-1)
+
+
+def simulate_season(attack, defence, corner_bias, n_leagues, n_teams, season_start, rng):
+    """Results of one double round-robin season of every league (teams numbered league-major)"""
+    rounds, home, away = round_robin(n_teams)
+    offsets = np.arange(n_leagues)[:, None] * n_teams
+    home = (home[None, :] + offsets).ravel()
+    away = (away[None, :] + offsets).ravel()
+    rounds = np.tile(rounds, n_leagues)
+
+    lambda_home = BASE_GOALS * HOME_ADVANTAGE * attack[home] / defence[away]
+    lambda_away = BASE_GOALS * attack[away] / defence[home]
+    corners_home = BASE_CORNERS * corner_bias[home] * np.sqrt(attack[home] / attack[away])
+    corners_away = BASE_CORNERS * corner_bias[away] * np.sqrt(attack[away] / attack[home]) / HOME_ADVANTAGE ** 0.5
+
+    spacing = max(1, min(7, SEASON_DAYS // (rounds.max() + 1)))
+    results = pd.DataFrame({
+        "league_code": home // n_teams,
+        "round": rounds,
+        "date": pd.Timestamp(season_start) + pd.to_timedelta(rounds * spacing, unit="D"),
+        "home_code": home,
+        "away_code": away,
+        "home_goals": rng.poisson(lambda_home),
+        "away_goals": rng.poisson(lambda_away),
+        "home_corners": rng.poisson(corners_home),
+        "away_corners": rng.poisson(corners_away),
+    })
+    return results.sort_values(["date", "league_code"], kind="stable").reset_index(drop=True)
+
+
+def _team_rows(results):
+    """One row per team per match: team, opponent, round, goals for and against, corners"""
+    home = pd.DataFrame({"team": results["home_code"], "opponent": results["away_code"], "round": results["round"],
+                         "gf": results["home_goals"], "ga": results["away_goals"],
+                         "cf": results["home_corners"], "ca": results["away_corners"]})
+    away = pd.DataFrame({"team": results["away_code"], "opponent": results["home_code"], "round": results["round"],
+                         "gf": results["away_goals"], "ga": results["home_goals"],
+                         "cf": results["away_corners"], "ca": results["home_corners"]})
+    rows = pd.concat([home, away], ignore_index=True)
+    rows["w"] = (rows["gf"] > rows["ga"]).astype(int)
+    rows["d"] = (rows["gf"] == rows["ga"]).astype(int)
+    rows["l"] = (rows["gf"] < rows["ga"]).astype(int)
+    rows["pts"] = 3 * rows["w"] + rows["d"]
+    return rows
+
+
+def _league_table(rows, n_teams_total, n_teams):
+    totals = rows.groupby("team")[["gf", "ga", "w", "d", "l", "pts", "cf", "ca"]].sum().reindex(range(n_teams_total), fill_value=0)
+    totals["mp"] = rows.groupby("team").size().reindex(range(n_teams_total), fill_value=0)
+    totals["gd"] = totals["gf"] - totals["ga"]
+    totals["league_code"] = totals.index // n_teams
+    ranked = totals.sort_values(["league_code", "pts", "gd", "gf"], ascending=[True, False, False, False], kind="stable")
+    totals.loc[ranked.index, "position"] = ranked.groupby("league_code").cumcount().to_numpy() + 1
+    totals["position"] = totals["position"].astype(int)
+    return totals
+
+
+def season_sheets(results, team_names, n_teams, squad_size, rng):
+    """Team, player, corner and form sheets of every league for one season's results.
+
+    Returns {sheet kind: DataFrame} with a league_code column to split the leagues on.
+    """
+    n_total = len(team_names)
+    rows = _team_rows(results)
+    table = _league_table(rows, n_total, n_teams)
+    names = np.asarray(team_names, dtype=object)
+
+    team_sheet = pd.DataFrame({
+        "Pos": table["position"], "Team": names, "MP": table["mp"], "W": table["w"], "D": table["d"], "L": table["l"],
+        "GF": table["gf"], "GA": table["ga"], "GD": table["gd"], "Pts": table["pts"],
+    })
+    team_sheet["league_code"] = table["league_code"]
+    team_sheet = team_sheet.sort_values(["league_code", "Pos"], kind="stable")
+
+    # Corners: season averages, with over-line probabilities of the team's matches
+    played = table["mp"].clip(lower=1)
+    corners_for, corners_against = table["cf"] / played, table["ca"] / played
+    total = corners_for + corners_against
+    corner_sheet = pd.DataFrame({
+        "Team": names, "MP": table["mp"], "For": corners_for.round(2), "Against": corners_against.round(2), "x": 0,
+        "Total": total.round(2), "O85": poisson_over(total, 8.5).round(3), "O95": poisson_over(total, 9.5).round(3),
+        "O105": poisson_over(total, 10.5).round(3), "league_code": table["league_code"],
+    })
+
+    # Form: each team's last FORM_GAMES matches, with the opponents' season points per game
+    last = rows.sort_values(["team", "round"], kind="stable").groupby("team").tail(FORM_GAMES).copy()
+    last["opp_ppg"] = (table["pts"] / played).to_numpy()[last["opponent"]]
+    form = last.groupby("team").agg(gp=("gf", "size"), w=("w", "sum"), d=("d", "sum"), l=("l", "sum"), gf=("gf", "sum"),
+                                    ga=("ga", "sum"), pts=("pts", "sum"), opp_ppg=("opp_ppg", "mean")).reindex(range(n_total), fill_value=0)
+    form["league_code"] = form.index // n_teams
+    form = form.sort_values(["league_code", "pts", "gf"], ascending=[True, False, False], kind="stable")
+    form_sheet = pd.DataFrame({
+        "#": form.groupby("league_code").cumcount().to_numpy() + 1, "Team": names[form.index], "GP": form["gp"].to_numpy(),
+        "W": form["w"].to_numpy(), "D": form["d"].to_numpy(), "L": form["l"].to_numpy(), "GF": form["gf"].to_numpy(),
+        "GA": form["ga"].to_numpy(), "GD": (form["gf"] - form["ga"]).to_numpy(), "Pts": form["pts"].to_numpy(),
+        "OppPPG": form["opp_ppg"].round(2).to_numpy(), "league_code": form["league_code"].to_numpy(),
+    })
+
+    player_sheet = squad_sheet(names, table, n_teams, squad_size, rng)
+    return {"team": team_sheet, "player": player_sheet, "corner": corner_sheet, "form": form_sheet}
+
+
+def squad_sheet(team_names, table, n_teams, squad_size, rng):
+    """Season stats of squad_size players per team; goals and assists add up to each team's totals"""
+    n_total = len(team_names)
+    team = np.repeat(np.arange(n_total), squad_size)
+    slot = np.tile(np.arange(squad_size), n_total)
+    positions = np.where(slot < GOALKEEPERS_PER_SQUAD, "GK",
+                         rng.choice(np.array(OUTFIELD_POSITIONS), size=len(team), p=np.array(OUTFIELD_MIX) / sum(OUTFIELD_MIX)))
+    profile = POSITION_PROFILES.loc[[position.split(",")[0] for position in positions]].reset_index(drop=True)
+
+    max_minutes = 90 * table["mp"].to_numpy()[team]
+    # One first-choice keeper per squad; outfield minutes spread by a skewed share
+    share = np.where(slot == 0, rng.uniform(0.85, 1.0, len(team)),
+                     np.where(slot < GOALKEEPERS_PER_SQUAD, rng.uniform(0.0, 0.15, len(team)), rng.beta(2.0, 1.4, len(team))))
+    minutes = np.round(share * max_minutes).astype(int)
+    nineties = minutes / 90
+
+    def shares(weight):
+        weight = weight.reshape(n_total, squad_size)
+        totals = weight.sum(axis=1, keepdims=True)
+        return np.where(totals > 0, weight / np.where(totals > 0, totals, 1), 1 / squad_size)
+
+    goal_share = shares(profile["goal_weight"].to_numpy() * nineties * rng.lognormal(0, 0.5, len(team)))
+    assist_share = shares(profile["assist_weight"].to_numpy() * nineties * rng.lognormal(0, 0.5, len(team)))
+    team_goals = table["gf"].to_numpy()
+    goals = rng.multinomial(team_goals, goal_share).ravel()
+    assists = rng.multinomial(np.round(team_goals * 0.7).astype(int), assist_share).ravel()
+    penalties = rng.binomial(goals, PENALTY_SHARE)
+    xg = (goal_share * team_goals[:, None]).ravel() * rng.lognormal(0, 0.2, len(team))
+    npxg = np.maximum(xg - 0.76 * penalties, 0)
+    xag = (assist_share * team_goals[:, None] * 0.7).ravel() * rng.lognormal(0, 0.2, len(team))
+
+    def per90(rate):
+        return rng.poisson(profile[rate].to_numpy() * nineties)
+
+    names = np.asarray(team_names, dtype=object)
+    return pd.DataFrame({
+        "Player": [f"{name} P{number}" for name, number in zip(names[team], slot)],
+        "Nation": rng.choice(np.array(NATIONS), size=len(team)),
+        "Pos": positions,
+        "Squad": names[team],
+        "Age": rng.integers(17, 37, len(team)),
+        "Min": minutes,
+        "Gls": goals,
+        "Ast": assists,
+        "G-PK": goals - penalties,
+        "CrdY": per90("yellow"),
+        "CrdR": per90("red"),
+        "xG": xg.round(1),
+        "npxG": npxg.round(1),
+        "xAG": xag.round(1),
+        "npxG+xAG": (npxg + xag).round(1),
+        "PrgC": per90("prgc"),
+        "PrgP": per90("prgp"),
+        "PrgR": per90("prgr"),
+        "Tkl": per90("tkl"),
+        "Int": per90("int"),
+        "Clr": per90("clr"),
+        "Blocks": per90("blocks"),
+        "league_code": team // n_teams,
+    })
+
+
+def league_names(n_leagues):
+    return [f"League {i + 1}" for i in range(n_leagues)]
+
+
+def generate_league_data(n_leagues=DEFAULT_LEAGUES, n_teams=DEFAULT_TEAMS, squad_size=DEFAULT_SQUAD_SIZE,
+                         n_seasons=DEFAULT_SEASONS, start_year=2022, seed=0):
+    """Simulate n_seasons of n_leagues leagues.
+
+    Yields (season label, snapshot date, results, sheets) per season, where sheets
+    holds every league's team, player, corner and form sheets (split on league_code).
+    Team strengths carry over between seasons, so consecutive seasons are related.
+    """
+    if n_teams < 2 or squad_size <= GOALKEEPERS_PER_SQUAD:
+        raise ValueError(f"Need at least 2 teams and more than {GOALKEEPERS_PER_SQUAD} players per squad")
+    rng = np.random.default_rng(seed)
+    n_total = n_leagues * n_teams
+    leagues = league_names(n_leagues)
+    team_names = [f"L{league + 1} Club {team + 1:02d}" for league in range(n_leagues) for team in range(n_teams)]
+    log_attack = rng.normal(0, 0.25, n_total)
+    log_defence = rng.normal(0, 0.25, n_total)
+    corner_bias = rng.lognormal(0, 0.1, n_total)
+
+    for season in range(n_seasons):
+        year = start_year + season
+        if season:
+            log_attack = STRENGTH_CARRYOVER * log_attack + rng.normal(0, 0.25 * np.sqrt(1 - STRENGTH_CARRYOVER ** 2), n_total)
+            log_defence = STRENGTH_CARRYOVER * log_defence + rng.normal(0, 0.25 * np.sqrt(1 - STRENGTH_CARRYOVER ** 2), n_total)
+        attack, defence = np.exp(log_attack), np.exp(log_defence)
+        results = simulate_season(attack, defence, corner_bias, n_leagues, n_teams, f"{year}-{SEASON_START}", rng)
+        sheets = season_sheets(results, team_names, n_teams, squad_size, rng)
+
+        names = np.asarray(team_names, dtype=object)
+        results = pd.DataFrame({
+            "league": np.asarray(leagues, dtype=object)[results["league_code"]],
+            "date": results["date"].dt.strftime("%Y-%m-%d"),
+            "season": f"{year}-{year + 1}",
+            "home": names[results["home_code"]],
+            "away": names[results["away_code"]],
+            "home_goals": results["home_goals"],
+            "away_goals": results["away_goals"],
+            "home_corners": results["home_corners"],
+            "away_corners": results["away_corners"],
+        })
+        yield f"{year}-{year + 1}", f"{year + 1}-{SNAPSHOT_DATE}", results, sheets
+
+
+def write_synthetic_data(out_dir, n_leagues=DEFAULT_LEAGUES, n_teams=DEFAULT_TEAMS, squad_size=DEFAULT_SQUAD_SIZE,
+                         n_seasons=DEFAULT_SEASONS, formats=("xlsx",), start_year=2022, seed=0):
+    """Write generated leagues as <out_dir>/<league>/<YYYY-MM-DD>/ snapshots plus <out_dir>/results.csv.
+
+    Each snapshot folder holds the team, player, corner and form sheets under the
+    names load_league_data expects, once per format, so it can be loaded with
+    load_league_data(folder) and replayed with backtester.py.
+    Returns the paths written.
+    """
+    formats = [fmt if fmt.startswith(".") else f".{fmt}" for fmt in formats]
+    unknown = [fmt for fmt in formats if fmt not in SHEET_EXTENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown formats {unknown}; use {list(SHEET_EXTENSIONS)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    leagues = league_names(n_leagues)
+    written = []
+    all_results = []
+    for season, snapshot_date, results, sheets in generate_league_data(n_leagues, n_teams, squad_size, n_seasons,
+                                                                       start_year, seed):
+        all_results.append(results)
+        grouped = {kind: dict(tuple(sheet.groupby("league_code", sort=False))) for kind, sheet in sheets.items()}
+        for code, league in enumerate(leagues):
+            snapshot_dir = os.path.join(out_dir, league, snapshot_date)
+            os.makedirs(snapshot_dir, exist_ok=True)
+            for kind, stem in SHEET_STEMS.items():
+                sheet = grouped[kind][code][SHEET_COLUMNS[kind]]
+                for fmt in formats:
+                    written.append(write_sheet(sheet, os.path.join(snapshot_dir, stem + fmt)))
+        print(f"✅ Season {season}: {len(sheets['team'])} teams, "
+              f"{len(sheets['player'])} players, {len(results)} matches")
+
+    results_path = os.path.join(out_dir, "results.csv")
+    pd.concat(all_results, ignore_index=True).to_csv(results_path, index=False)
+    written.append(results_path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic league data shaped like the team, player, corner and form exports")
+    parser.add_argument("--out", required=True, help="Output folder (league snapshots and results.csv)")
+    parser.add_argument("--leagues", type=int, default=DEFAULT_LEAGUES)
+    parser.add_argument("--teams", type=int, default=DEFAULT_TEAMS, help="Teams per league")
+    parser.add_argument("--squad-size", type=int, default=DEFAULT_SQUAD_SIZE, help="Players per team")
+    parser.add_argument("--seasons", type=int, default=DEFAULT_SEASONS)
+    parser.add_argument("--start-year", type=int, default=2022, help="Year the first season starts")
+    parser.add_argument("--formats", nargs="+", default=["xlsx"], choices=[ext.lstrip(".") for ext in SHEET_EXTENSIONS],
+                        help="Sheet formats to write (parquet needs pyarrow or fastparquet)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        written = write_synthetic_data(args.out, args.leagues, args.teams, args.squad_size, args.seasons,
+                                       args.formats, args.start_year, args.seed)
+    except Exception as e:
+        print("❌ Synthetic data generation failed:", e, file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Wrote {len(written)} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,32 @@ import pandas as pd
 import os
 import re
 import numpy as np
+from league_rules import compute_pressure
+from stage_timer import timed, laps
+from sheet_io import read_sheet
 
-def load_team_data(filepath=None):
+@timed("load_team_data")
+def load_team_data(filepath=None, league=None, rules_by_league=None):
     if filepath is None:
         filepath = "Mexicoliga Sentiment table.xlsx"
 
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"The team data file was not found at: {filepath}")
 
+    lap = laps()
+
     try:
         print("📋 Trying to read 'Sheet1'...")
-        df = pd.read_excel(filepath, sheet_name='Sheet1')
+        df = read_sheet(filepath, 'Sheet1')
         print("✅ Successfully read 'Sheet1'")
     except Exception as e1:
         print(f"⚠️ Could not read 'Sheet1': {e1}")
         try:
-            df = pd.read_excel(filepath, sheet_name=0, header=0)
+            df = read_sheet(filepath, 0)
             print("✅ Successfully read with default header")
         except Exception as e3:
             raise ValueError(f"Could not read Excel file: {e3}")
+    lap("read_sheet")
 
     print(f"📊 Loaded data shape: {df.shape}")
     print(f"🔍 Original columns: {list(df.columns)}")
@@ -62,15 +69,18 @@ def load_team_data(filepath=None):
     }
 
     for new_col, keywords in column_mappings.items():
-        for old_col in df.columns:
-            if any(keyword in old_col.lower() for keyword in keywords):
-                try:
-                    result[new_col] = pd.to_numeric(df[old_col], errors='coerce').fillna(0)
-                    print(f"✅ Found {new_col}: {old_col}")
-                    break
-                except:
-                    result[new_col] = 0
-                    print(f"⚠️ Could not convert {old_col} to {new_col}")
+        # Exact names first, then longer keywords, so 'a' cannot claim "Team" before "GA"
+        columns = [col for col in df.columns if col != team_col]
+        exact = [col for col in columns if col.lower() in keywords]
+        partial = [col for keyword in sorted(keywords, key=len, reverse=True) for col in columns if keyword in col.lower()]
+        for old_col in dict.fromkeys(exact + partial):
+            try:
+                result[new_col] = pd.to_numeric(df[old_col], errors='coerce').fillna(0)
+                print(f"✅ Found {new_col}: {old_col}")
+                break
+            except:
+                result[new_col] = 0
+                print(f"⚠️ Could not convert {old_col} to {new_col}")
 
     # Set defaults for essential columns
     essential_cols = ['Played', 'Won', 'Drawn', 'Lost', 'Goals_For', 'Goals_Against', 'Points']
@@ -84,6 +94,8 @@ def load_team_data(filepath=None):
         result['Position'] = range(1, len(result) + 1)
         print("⚠️ Added default Position column")
 
+    lap("column_mapping")
+
     # Calculate derived metrics
     try:
         print("🔄 Calculating rates and averages...")
@@ -107,141 +119,16 @@ def load_team_data(filepath=None):
     except Exception as e:
         print(f"❌ Error in rate calculations: {e}")
 
+    lap("rates")
+
     # ENHANCED: Calculate sentiment score with relegation AND European qualification pressure
     try:
         print("🔄 Calculating ENHANCED sentiment scores with EUROPEAN QUALIFICATION analysis...")
         
-        total_teams = len(result)
-        games_in_season = 38  # EPL has 38 games
-        
-        # Calculate current performance metrics
-        performance_score = (result['Win_Rate'] * 50) + (result['Goal_Diff_per_Match'] * 10) + (result['Points'] / result['Played'])
-        
-        # ENHANCED: European qualification and relegation pressure analysis
-        result['Champions_League_Zone'] = result['Position'] <= 4  # Top 4 - Champions League
-        result['Europa_League_Zone'] = (result['Position'] >= 5) & (result['Position'] <= 7)  # 5th-7th - Europa League
-        result['European_Qualification'] = result['Position'] <= 7  # Any European qualification
-        result['Mid_Table_Safety'] = (result['Position'] >= 8) & (result['Position'] <= (total_teams - 6))  # Safe mid-table
-        result['Relegation_Threat'] = result['Position'] >= (total_teams - 5)  # Last 5 positions (danger zone)
-        result['Relegation_Zone'] = result['Position'] >= (total_teams - 2)  # Last 3 positions (automatic relegation)
-        
-        # Calculate European qualification pressure factor
-        # Teams chasing Champions League have highest positive pressure
-        # Teams chasing Europa League have moderate positive pressure
-        european_pressure = np.where(
-            result['Champions_League_Zone'], 
-            25,  # High positive pressure for Champions League
-            np.where(
-                result['Europa_League_Zone'],
-                15,  # Moderate positive pressure for Europa League
-                np.where(
-                    (result['Position'] >= 8) & (result['Position'] <= 10),
-                    5,   # Slight pressure for teams close to European spots
-                    0    # No European pressure
-                )
-            )
-        )
-        
-        # Calculate relegation pressure factor
-        relegation_pressure = np.where(
-            result['Relegation_Zone'], 
-            -30,  # High negative pressure for relegation zone
-            np.where(
-                result['Relegation_Threat'],
-                -15,  # Moderate negative pressure for relegation threat
-                0     # No relegation pressure
-            )
-        )
-        
-        # Form factor (recent performance)
-        games_played = result['Played'].clip(upper=games_in_season)
-        season_progress = games_played / games_in_season
-        
-        # Teams with strong form late in season get European push boost
-        form_pressure = np.where(
-            (result['Win_Rate'] > 0.6) & (season_progress > 0.6) & result['European_Qualification'],
-            20,  # Strong form late in season for European spots
-            np.where(
-                (result['Loss_Rate'] > 0.6) & (season_progress > 0.6) & result['Relegation_Threat'],
-                -20,  # Poor form late in season for relegation teams
-                0     # Neutral otherwise
-            )
-        )
-        
-        # Points from European spots calculation
-        if 'Points' in result.columns:
-            # Points needed for Champions League (4th place)
-            cl_points = result[result['Position'] == 4]['Points'].iloc[0] if len(result[result['Position'] == 4]) > 0 else 60
-            # Points needed for Europa League (7th place)
-            el_points = result[result['Position'] == 7]['Points'].iloc[0] if len(result[result['Position'] == 7]) > 0 else 50
-            
-            result['Points_From_UCL'] = cl_points - result['Points']
-            result['Points_From_UEFA'] = el_points - result['Points']
-            
-            european_points_pressure = np.where(
-                (result['Position'] >= 5) & (result['Position'] <= 8) & (result['Points_From_UCL'] <= 6),
-                15,  # Close to Champions League
-                np.where(
-                    (result['Position'] >= 8) & (result['Position'] <= 10) & (result['Points_From_UEFA'] <= 4),
-                    10,  # Close to Europa League
-                    0    # No points pressure
-                )
-            )
-        else:
-            european_points_pressure = 0
-        
-        # Points from safety calculation (for relegation-threatened teams)
-        if 'Points' in result.columns:
-            safe_points = result[result['Position'] == (total_teams - 3)]['Points'].iloc[0] if len(result[result['Position'] == (total_teams - 3)]) > 0 else 30
-            result['Points_From_Safety'] = safe_points - result['Points']
-            points_pressure = np.where(
-                result['Relegation_Threat'] & (result['Points_From_Safety'] > 6),
-                -25,  # Far from safety
-                np.where(
-                    result['Relegation_Threat'] & (result['Points_From_Safety'] <= 3),
-                    -5,   # Close to safety
-                    0     # No points pressure
-                )
-            )
-        else:
-            points_pressure = 0
-        
-        # Combine all pressure factors
-        total_pressure = european_pressure + relegation_pressure + form_pressure + european_points_pressure + points_pressure
-        
-        # Calculate final sentiment score with pressure adjustments
-        base_sentiment = performance_score
-        adjusted_sentiment = base_sentiment + total_pressure
-        
-        # Normalize to 0-100 scale
-        min_score = adjusted_sentiment.min()
-        max_score = adjusted_sentiment.max()
-        
-        if max_score > min_score:
-            result['Sentiment_Score'] = 100 * (adjusted_sentiment - min_score) / (max_score - min_score)
-        else:
-            result['Sentiment_Score'] = 50.0
-        
-        # Add pressure indicators for analysis
-        result['European_Pressure'] = european_pressure
-        result['Relegation_Pressure'] = relegation_pressure
-        result['Total_Pressure'] = total_pressure
-        result['Pressure_Level'] = np.where(
-            total_pressure < -20, 'CRITICAL_RELEGATION',
-            np.where(
-                total_pressure < -10, 'HIGH_RELEGATION',
-                np.where(
-                    total_pressure > 20, 'HIGH_EUROPEAN',
-                    np.where(
-                        total_pressure > 10, 'MODERATE_EUROPEAN',
-                        np.where(
-                            total_pressure < 0, 'LOW_RELEGATION',
-                            'NEUTRAL'
-                        )
-                    )
-                )
-            )
-        )
+        # Zones, cut-off points and pressure follow the league's rules (see league_rules.py)
+        pressure = compute_pressure(result.assign(League=league), rules_by_league)
+        for column in pressure.columns:
+            result[column] = pressure[column]
         
         print("✅ ENHANCED sentiment scores with EUROPEAN qualification analysis calculated")
         print(f"🏆 Champions League Teams: {list(result[result['Champions_League_Zone']]['Team'])}")
@@ -261,6 +148,8 @@ def load_team_data(filepath=None):
         else:
             result['Sentiment_Score'] = 50.0
 
+    lap("pressure")
+
     # Final cleaning
     result['Team'] = result['Team'].astype(str).str.strip()
     
@@ -284,5 +173,6 @@ def load_team_data(filepath=None):
             print(f"  🥇 {team['Team']} (Position {team['Position']}) - CHAMPIONS LEAGUE")
         elif team['Europa_League_Zone']:
             print(f"  🥈 {team['Team']} (Position {team['Position']}) - EUROPA LEAGUE")
+    lap("summary_printing")
     
     return result
\ No newline at end of file
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from devig import MARGIN_METHODS, devig_probabilities
+
+BOOKS = [
+    [2.10, 3.40, 3.60],
+    [1.90, 1.95],
+    [1.01, 15.0, 40.0],
+    [2.60, 2.40, 4.30],
+]
+
+
+def _flatten(books):
+    odds = np.concatenate([np.asarray(book, dtype=float) for book in books])
+    group = np.repeat(np.arange(len(books)), [len(book) for book in books])
+    return odds, group
+
+
+def _shin_reference(odds):
+    """Shin probabilities of one book by bisection on the insider share z"""
+    q = 1 / np.asarray(odds, dtype=float)
+
+    def fair(z):
+        return (np.sqrt(z ** 2 + 4 * (1 - z) * q ** 2 / q.sum()) - z) / (2 * (1 - z))
+
+    lo, hi = 0.0, 0.99
+    for _ in range(200):
+        z = 0.5 * (lo + hi)
+        lo, hi = (z, hi) if fair(z).sum() > 1 else (lo, z)
+    return fair(0.5 * (lo + hi))
+
+
+@pytest.mark.parametrize("method", MARGIN_METHODS)
+def test_every_book_sums_to_one(method):
+    odds, group = _flatten(BOOKS)
+    fair = devig_probabilities(odds, group, method=method)
+    assert np.allclose(np.bincount(group, weights=fair), 1.0, atol=1e-9)
+    assert ((fair > 0) & (fair < 1)).all()
+
+
+@pytest.mark.parametrize("method", MARGIN_METHODS)
+def test_a_book_without_margin_is_left_unchanged(method):
+    odds = [2.0, 4.0, 4.0]
+    assert np.allclose(devig_probabilities(odds, method=method), [0.5, 0.25, 0.25])
+
+
+def test_shin_matches_the_reference_solution():
+    fair = devig_probabilities([2.60, 2.40, 4.30], method="shin")
+    assert fair[0] == pytest.approx(0.37299406, abs=1e-8)
+    assert np.allclose(fair, _shin_reference([2.60, 2.40, 4.30]), atol=1e-9)
+
+
+@pytest.mark.parametrize("method", ["power", "shin", "odds_ratio"])
+def test_a_heavy_favourite_book_converges(method):
+    odds, group = _flatten(BOOKS)
+    fair = devig_probabilities(odds, group, method=method)[group == 2]
+    assert fair.sum() == pytest.approx(1.0, abs=1e-9)
+    # Margin-aware methods shift probability from the longshots to the favourite
+    assert fair[0] > 1 / 1.01 / (1 / 1.01 + 1 / 15 + 1 / 40)
+    if method == "shin":
+        assert np.allclose(fair, _shin_reference([1.01, 15.0, 40.0]), atol=1e-9)
+
+
+@pytest.mark.parametrize("method", MARGIN_METHODS)
+def test_multi_winner_books_sum_to_their_units(method):
+    # Double Chance (two winners) next to a single-winner 1X2 book
+    odds, group = _flatten([[1.25, 1.30, 1.70], [2.10, 3.40, 3.60]])
+    fair = devig_probabilities(odds, group, method=method, units=[2, 1])
+    assert np.allclose(np.bincount(group, weights=fair), [2.0, 1.0], atol=1e-9)
+    assert (fair[:3] < 1).all()
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+import main
+from elo_engine import EloRatings
+
+
+def _results(rows, season=None):
+    results = pd.DataFrame(rows, columns=["home", "away", "home_goals", "away_goals"])
+    if season is not None:
+        results["season"] = season
+    return results
+
+
+def test_backfill_matches_a_hand_computed_two_match_update():
+    elo = EloRatings()
+    before = elo.backfill(_results([("Inter", "Milan", 2, 0), ("Milan", "Inter", 1, 1)]))
+
+    # Inter win by two at home: 20 * 1.5 * (1 - 1 / (1 + 10 ** (-65 / 400)))
+    first = 20 * 1.5 * (1 - 1 / (1 + 10 ** (-65 / 400)))
+    # Draw with Milan at home, now rated 2 * first lower: 20 * (0.5 - expected)
+    second = 20 * (0.5 - 1 / (1 + 10 ** (-(65 - 2 * first) / 400)))
+    assert first == pytest.approx(12.2260, abs=1e-4)
+    assert before["elo_diff"].tolist() == pytest.approx([0.0, -2 * first])
+    assert elo.rating("Inter") == pytest.approx(1500 + first - second)
+    assert elo.rating("Milan") == pytest.approx(1500 - first + second)
+    assert elo.games == {"Inter": 2, "Milan": 2}
+
+    step = EloRatings()
+    step.update("Inter", "Milan", 2, 0)
+    step.update("Milan", "Inter", 1, 1)
+    assert step.ratings == pytest.approx(elo.ratings)
+
+
+def test_home_advantage_makes_a_home_draw_cost_rating():
+    neutral = EloRatings(home_advantage=0.0)
+    assert neutral.update("Inter", "Milan", 1, 1) == 0.0
+    elo = EloRatings()
+    assert elo.update("Inter", "Milan", 1, 1) < 0
+    assert elo.rating("Inter") < elo.rating("Milan")
+
+
+def test_ratings_regress_towards_the_mean_in_a_new_season():
+    elo = EloRatings(ratings={"Inter": 1600.0, "Milan": 1450.0}, seasons={"Inter": "2023-2024", "Milan": "2023-2024"})
+    before = elo.backfill(_results([("Inter", "Milan", 0, 0)], season="2024-2025"))
+    assert before["home_elo"].iloc[0] == pytest.approx(1580.0)
+    assert before["away_elo"].iloc[0] == pytest.approx(1460.0)
+    assert elo.seasons == {"Inter": "2024-2025", "Milan": "2024-2025"}
+
+    same = EloRatings(ratings={"Inter": 1600.0}, seasons={"Inter": "2024-2025"})
+    same.update("Inter", "Milan", 0, 0, season="2024-2025")
+    assert same.rating("Inter") > 1590
+
+
+def test_elo_difference_matches_squad_names_to_rated_teams(capsys, monkeypatch):
+    monkeypatch.setattr(main, "_ELO_MISSES", set())
+    elo = EloRatings(ratings={"Internazionale": 1600.0, "AC Milan": 1480.0})
+    assert main.elo_difference(elo, "Inter", "Milan") == pytest.approx(120.0)
+    assert main.elo_difference(elo, "AC  milan", "internazionale") == pytest.approx(-120.0)
+    assert main.elo_difference(None, "Inter", "Milan") is None
+
+    assert main.elo_difference(elo, "Inter", "Juventus") is None
+    assert main.elo_difference(elo, "Juventus", "Milan") is None
+    assert capsys.readouterr().out.count("No Elo rating for Juventus") == 1
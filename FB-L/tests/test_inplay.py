@@ -0,0 +1,15 @@
+import numpy as np
+from inplay import InPlayGrid, remaining_fractions, timeline_minutes
+
+
+def test_stoppage_time_keeps_goals_to_come():
+    grid = InPlayGrid(1.5, 1.2)
+    prices = grid.price([0, 0, 0], [90, "90+3", "90+20"], 1, 1)
+    assert (prices["draw"] < 1).all() and (prices["over_2.5"] > 0).all()
+    assert prices["draw"].is_monotonic_increasing
+
+
+def test_first_half_stoppage_comes_before_the_second_half():
+    assert timeline_minutes(["45", "45+2", "46", "90+3"]).tolist() == [45, 47, 49, 96]
+    fractions = remaining_fractions(minutes=timeline_minutes([0, 45, "45+2", 46]))[0]
+    assert fractions[0] == 1.0 and np.all(np.diff(fractions) < 0)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from odds_ingestion import load_odds_snapshots
+
+
+def test_rows_with_blank_labels_or_timestamps_are_dropped(tmp_path):
+    snapshot = tmp_path / "odds.csv"
+    snapshot.write_text(
+        "fixture,bookmaker,market,outcome,timestamp,price\n"
+        "Inter vs Milan,Bet1,1X2,Home Win,2025-01-01T10:00:00Z,2.10\n"
+        "Inter vs Milan,,1X2,Home Win,2025-01-01T11:00:00Z,2.50\n"
+        "Inter vs Milan,Bet1,1X2,Draw,,3.40\n"
+    )
+    book = load_odds_snapshots(str(snapshot))
+
+    assert len(book) == 1
+    assert book.bookmakers() == ["Bet1"]
+    assert book.odds_dict("Inter", "Milan") == {"1X2": {"Home Win": 2.10}}
+    frame = book.to_frame()
+    assert frame["timestamp"].iloc[0].hour == 10
+
+
+def test_home_away_columns_with_a_blank_team_are_dropped(tmp_path):
+    snapshot = tmp_path / "odds.csv"
+    snapshot.write_text(
+        "home,away,bookmaker,market,outcome,timestamp,price\n"
+        "Inter,Milan,Bet1,1X2,Home Win,1735725600,2.10\n"
+        "Inter,,Bet1,1X2,Home Win,1735725600,2.50\n"
+        "Roma,Lazio,Bet1,1X2,Home Win,,1.90\n"
+    )
+    book = load_odds_snapshots(str(snapshot))
+
+    assert book.fixtures() == ["inter vs milan"]
+    assert np.array_equal(book.price, [2.10])
+
+
+def test_as_of_accepts_aware_and_naive_timestamps(tmp_path):
+    snapshot = tmp_path / "odds.csv"
+    snapshot.write_text(
+        "fixture,bookmaker,market,outcome,timestamp,price\n"
+        "Inter vs Milan,Bet1,1X2,Home Win,2025-01-01T10:00:00Z,2.10\n"
+        "Inter vs Milan,Bet1,1X2,Home Win,2025-01-01T12:00:00Z,2.30\n"
+    )
+    for as_of in (pd.Timestamp("2025-01-01 12:00", tz="Europe/Rome"), "2025-01-01 11:00"):
+        book = load_odds_snapshots(str(snapshot), as_of=as_of)
+        assert np.array_equal(book.price, [2.10])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from player_props import (PLAYER_MARKETS, player_market_probabilities, player_probability_table, player_shares,
+                          price_player_props)
+
+# "Silva" plays for both sides, and twice for Inter
+SQUADS = pd.DataFrame({
+    "Team": ["Inter"] * 4 + ["Milan"] * 3,
+    "Player": ["Lautaro", "Silva", "Silva", "Barella", "Leao", "Silva", "Pulisic"],
+    "Minutes": [2400, 1800, 600, 2600, 2500, 900, 2200],
+    "xG": [14.0, 3.0, 1.5, 4.0, 9.0, 2.0, 8.0],
+    "npxG": [11.0, 3.0, 1.5, 4.0, 9.0, 2.0, 5.0],
+    "xA": [3.0, 1.0, 0.5, 6.0, 7.0, 1.0, 5.0],
+})
+FIXTURES = pd.DataFrame({"home": ["Inter", "Milan"], "away": ["Milan", "Inter"],
+                         "lambda_home": [1.7, 1.4], "lambda_away": [1.1, 1.2]})
+
+
+def test_team_shares_sum_to_one():
+    shares = player_shares(SQUADS)
+    assert np.allclose(shares.groupby("team")["goal_share"].sum(), 1.0)
+    assert np.allclose(shares.groupby("team")["assist_share"].sum(), 1.0)
+
+
+def test_scorer_probabilities_are_consistent_per_fixture():
+    props = price_player_props(player_shares(SQUADS), FIXTURES)
+    assert len(props) == 2 * len(SQUADS)
+    assert (props["anytime"] >= props["two_plus"]).all()
+    for (home, away), fixture in props.groupby(["home", "away"], sort=False):
+        row = FIXTURES[(FIXTURES["home"] == home) & (FIXTURES["away"] == away)].iloc[0]
+        no_goal = np.exp(-(row["lambda_home"] + row["lambda_away"]))
+        assert fixture["first_scorer"].sum() == pytest.approx(1 - no_goal)
+        assert fixture.loc[fixture["side"] == "home", "expected_goals"].sum() == pytest.approx(row["lambda_home"])
+
+
+def test_repeated_names_keep_one_outcome_per_player():
+    props = price_player_props(player_shares(SQUADS), FIXTURES.iloc[:1])
+    markets = player_market_probabilities(props)
+    for market in PLAYER_MARKETS.values():
+        assert len(markets[market]) == len(SQUADS)
+    assert {"Silva (Inter)", "Silva (Inter) 2", "Silva (Milan)", "Lautaro"} <= set(markets["Anytime Goalscorer"])
+
+    table = player_probability_table(price_player_props(player_shares(SQUADS), FIXTURES))
+    assert not table.duplicated(["fixture", "market", "outcome"]).any()
+    assert len(table) == len(FIXTURES) * len(SQUADS) * len(PLAYER_MARKETS)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from match_predictor import calculate_kelly_criterion, score_prob_matrix
+from portfolio_kelly import fixture_portfolio_kelly, fixture_scenarios
+
+PM = score_prob_matrix(1.4, 1.2)
+
+
+def _bet(market, outcome, probability, odds):
+    return {"market": market, "outcome": outcome, "probability": probability, "odds": odds}
+
+
+@pytest.mark.parametrize("bet", [
+    _bet("Over/Under 2.5", "Over", 0.65, 2.0),
+    _bet("1X2", "Home Win", 0.45, 2.6),
+    _bet("Both Teams to Score", "Yes", 0.62, 1.9),
+    _bet("Total Corners", "Over 9.5", 0.55, 2.1),
+])
+def test_single_bet_matches_calculate_kelly_criterion(bet):
+    stake = fixture_portfolio_kelly([bet], PM)[0]
+    assert stake == pytest.approx(calculate_kelly_criterion(bet["probability"], bet["odds"]), abs=1e-6)
+
+
+def test_scenarios_keep_each_bets_probability():
+    bets = [_bet("1X2", "Home Win", 0.45, 2.6), _bet("Over/Under 2.5", "Over", 0.65, 2.0),
+            _bet("Both Teams to Score", "Yes", 0.62, 1.9)]
+    R, weights = fixture_scenarios(bets, PM)
+    weights = weights / weights.sum()
+    for i, bet in enumerate(bets):
+        assert weights[R[:, i] > 0].sum() == pytest.approx(bet["probability"], abs=1e-8)
+    # The score axis still links the legs: home wins are over-represented among overs
+    over = R[:, 1] > 0
+    assert weights[over & (R[:, 0] > 0)].sum() / weights[over].sum() > 0.45
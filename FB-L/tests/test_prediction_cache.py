@@ -0,0 +1,47 @@
+import json
+import pickle
+import sqlite3
+import hashlib
+import time
+import prediction_cache
+from prediction_cache import PredictionCache, make_cache_key
+
+
+def _write_sheet(tmp_path):
+    sheet = tmp_path / "league.xlsx"
+    sheet.write_bytes(b"data")
+    return str(sheet)
+
+
+def test_entries_of_an_older_schema_are_not_served(tmp_path, monkeypatch):
+    sheet, path = _write_sheet(tmp_path), str(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(prediction_cache, "CACHE_SCHEMA_VERSION", prediction_cache.CACHE_SCHEMA_VERSION - 1)
+    old = PredictionCache("Serie A", source_files=[sheet], path=path)
+    old.put("Inter", "Milan", ({}, {}, 0.5, []), params={"margin_method": "shin"})
+    old.close()
+    monkeypatch.undo()
+
+    cache = PredictionCache("Serie A", source_files=[sheet], path=path)
+    assert cache.get("Inter", "Milan", params={"margin_method": "shin"}) is None
+    cache.close()
+
+
+def test_entries_keyed_before_schema_versions_are_not_served(tmp_path):
+    sheet, path = _write_sheet(tmp_path), str(tmp_path / "cache.sqlite")
+    cache = PredictionCache("Serie A", source_files=[sheet], path=path)
+    params = {"margin_method": "shin"}
+    # Key layout and 4-tuple value written before the schema version was part of the key
+    payload = json.dumps(["Serie A", "Inter", "Milan", params, cache.fingerprint], sort_keys=True, default=str)
+    legacy_key = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO predictions (key, league, fingerprint, created, value) VALUES (?, ?, ?, ?, ?)",
+                 (legacy_key, "Serie A", cache.fingerprint, time.time(), pickle.dumps(({}, {}, 0.5, []))))
+    conn.commit()
+    conn.close()
+
+    assert make_cache_key("Serie A", "Inter", "Milan", params, cache.fingerprint) != legacy_key
+    assert cache.get("Inter", "Milan", params=params) is None
+    value = ({}, {}, 0.5, [], {"features": {}})
+    cache.put("Inter", "Milan", value, params=params)
+    assert cache.get("Inter", "Milan", params=params) == value
+    cache.close()
@@ -0,0 +1,59 @@
+import itertools
+import numpy as np
+import pandas as pd
+from standings_engine import StandingsEngine
+
+TEAMS = ["Atalanta", "Bologna", "Cagliari", "Empoli", "Fiorentina", "Genoa", "Lazio", "Monza"]
+
+
+def _fresh_table():
+    """A start-of-season table as load_team_data loads it (Played 0 becomes 1)"""
+    zeros = [0] * len(TEAMS)
+    return pd.DataFrame({"Team": TEAMS, "Position": range(1, len(TEAMS) + 1), "Played": [1] * len(TEAMS),
+                         "Won": zeros, "Drawn": zeros, "Lost": zeros, "Goals_For": zeros, "Goals_Against": zeros,
+                         "Goal_Difference": zeros, "Points": zeros})
+
+
+def test_results_update_counts_and_points():
+    engine = StandingsEngine(_fresh_table())
+    engine.add_results([{"home": "Atalanta", "away": "Bologna", "home_goals": 2, "away_goals": 0},
+                        {"home": "Bologna", "away": "Cagliari", "home_goals": 1, "away_goals": 1}])
+    table = engine.table().set_index("Team")
+
+    assert table.loc["Atalanta", ["Played", "Won", "Goals_For", "Goals_Against", "Points"]].tolist() == [1, 1, 2, 0, 3]
+    assert table.loc["Atalanta", "Win_Rate"] == 1.0
+    assert table.loc["Bologna", ["Played", "Won", "Drawn", "Lost", "Goal_Difference", "Points"]].tolist() == [2, 0, 1, 1, -2, 1]
+    assert table.loc["Empoli", "Played"] == 0
+
+
+def test_ranking_breaks_ties_on_goal_difference_then_goals_for():
+    engine = StandingsEngine(_fresh_table())
+    engine.add_results([
+        {"home": "Monza", "away": "Atalanta", "home_goals": 2, "away_goals": 0},
+        {"home": "Lazio", "away": "Bologna", "home_goals": 3, "away_goals": 1},
+        {"home": "Genoa", "away": "Cagliari", "home_goals": 1, "away_goals": 0},
+        {"home": "Fiorentina", "away": "Empoli", "home_goals": 1, "away_goals": 3},
+    ])
+    # Lazio, Empoli and Monza are level on points and goal difference, so goals scored decide;
+    # Fiorentina and Bologna are level on all three and keep their current order
+    assert engine.table()["Team"].tolist() == ["Lazio", "Empoli", "Monza", "Genoa", "Cagliari", "Fiorentina",
+                                               "Bologna", "Atalanta"]
+    assert engine.table()["Position"].tolist() == list(range(1, len(TEAMS) + 1))
+
+
+def test_incremental_refresh_matches_a_full_rebuild():
+    engine = StandingsEngine(_fresh_table())
+    rng = np.random.default_rng(7)
+    refreshed = []
+    for home, away in itertools.permutations(TEAMS, 2):
+        cutoffs = dict(engine.cutoffs)
+        updated = engine.add_result(home, away, *rng.poisson(1.4, 2))
+        if engine.cutoffs != cutoffs:
+            assert sorted(updated) == sorted(TEAMS)
+        refreshed.append(len(updated))
+
+        rebuilt = StandingsEngine(engine.table())
+        assert np.allclose(rebuilt.sentiment, engine.sentiment[engine.ranking])
+        for column, values in rebuilt.pressure.items():
+            assert list(values) == list(engine.pressure[column][engine.ranking]), column
+    assert min(refreshed) < len(TEAMS) and max(refreshed) == len(TEAMS)
@@ -0,0 +1,16 @@
+import os
+import pandas as pd
+from synthetic_data import SHEET_STEMS, write_synthetic_data
+from team_data_collector import load_team_data
+
+
+def test_generated_team_sheet_loads_with_its_own_numbers(tmp_path):
+    written = write_synthetic_data(str(tmp_path), n_teams=6, squad_size=14, formats=("csv",), seed=3)
+    team_file = next(path for path in written if os.path.basename(path) == SHEET_STEMS["team"] + ".csv")
+    sheet = pd.read_csv(team_file)
+
+    loaded = load_team_data(team_file).set_index("Team").loc[sheet["Team"]]
+    for column, source in (("Position", "Pos"), ("Played", "MP"), ("Won", "W"), ("Drawn", "D"), ("Lost", "L"),
+                           ("Goals_For", "GF"), ("Goals_Against", "GA"), ("Goal_Difference", "GD"), ("Points", "Pts")):
+        assert loaded[column].tolist() == sheet[source].tolist(), column
+    assert (loaded["Goals_Against"] > 0).any()
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from odds_ingestion import encode_chunk, latest_book, new_vocabularies
+from match_predictor import calculate_value_bets
+from value_scanner import (best_odds_dict, calculate_overround, fair_odds_dict, find_arbitrage,
+                           model_probability_table, scan_value_bets)
+
+QUOTES = {
+    ("Inter", "Milan"): {
+        "Bet1": {"1X2": {"Home Win": 2.10, "Draw": 3.30, "Away Win": 3.60}, "Over/Under 2.5": {"Over": 1.90, "Under": 1.95}},
+        "Bet2": {"1X2": {"Home Win": 2.20, "Draw": 3.20, "Away Win": 3.40}, "Over/Under 2.5": {"Over": 2.05, "Under": 1.80}},
+        "Bet3": {"1X2": {"Home Win": 2.00, "Draw": 3.40, "Away Win": 3.80}},
+    },
+    ("Roma", "Lazio"): {
+        "Bet1": {"1X2": {"Home Win": 2.50, "Draw": 3.10, "Away Win": 3.00}},
+        "Bet2": {"1X2": {"Home Win": 2.40, "Draw": 3.20, "Away Win": 3.10}},
+    },
+}
+MODEL = [
+    ("Inter", "Milan", {"1X2": {"Home Win": 0.52, "Draw": 0.25, "Away Win": 0.23},
+                        "Over/Under 2.5": {"Over": 0.55, "Under": 0.45}}),
+    ("Roma", "Lazio", {"1X2": {"Home Win": 0.36, "Draw": 0.36, "Away Win": 0.28}}),
+]
+
+
+def _book(quotes=QUOTES):
+    rows = [{"home": home, "away": away, "bookmaker": bookmaker, "market": market, "outcome": outcome,
+             "timestamp": "2025-01-01T10:00:00Z", "price": price}
+            for (home, away), books in quotes.items() for bookmaker, markets in books.items()
+            for market, outcomes in markets.items() for outcome, price in outcomes.items()]
+    vocabularies = new_vocabularies()
+    return latest_book(encode_chunk(pd.DataFrame(rows), vocabularies), vocabularies)
+
+
+@pytest.mark.parametrize("margin_method", ["shin", None])
+def test_value_bets_match_a_loop_over_fixtures_and_books(margin_method):
+    book = _book()
+    flagged = scan_value_bets(model_probability_table(MODEL), book, threshold=0.02, margin_method=margin_method)
+
+    expected = set()
+    for home, away, probabilities in MODEL:
+        books = QUOTES[(home, away)]
+        fair = {name: fair_odds_dict(odds) for name, odds in books.items()}
+        for market, outcomes in probabilities.items():
+            for outcome, p in outcomes.items():
+                best = max((name for name in books if outcome in books[name].get(market, {})),
+                           key=lambda name: books[name][market][outcome])
+                price = books[best][market][outcome]
+                implied = 1 / price if margin_method is None else fair[best][market][outcome]
+                if p - implied > 0.02:
+                    expected.add((f"{home} vs {away}".lower(), market, outcome, best, price, round(p - implied, 9)))
+
+    found = {(row.fixture, row.market, row.outcome, row.bookmaker, row.odds, round(row.edge, 9))
+             for row in flagged.itertuples()}
+    assert found == expected and expected
+    assert flagged["expected_value"].is_monotonic_decreasing
+
+
+def test_overround_is_the_margin_of_each_complete_book():
+    table = calculate_overround(_book())
+    assert len(table) == 7
+    for row in table.itertuples():
+        home, away = row.fixture.split(" vs ")
+        odds = QUOTES[(home.title(), away.title())][row.bookmaker][row.market]
+        assert row.overround == pytest.approx(sum(1 / price for price in odds.values()) - 1)
+        assert row.outcomes == len(odds)
+
+
+def test_arbitrage_across_bookmakers_is_found_with_equalising_stakes():
+    table = find_arbitrage(_book({("Inter", "Milan"): {
+        "Bet1": {"1X2": {"Home Win": 2.20, "Draw": 3.30, "Away Win": 3.60}},
+        "Bet2": {"1X2": {"Home Win": 2.00, "Draw": 3.60, "Away Win": 3.40}},
+        "Bet3": {"1X2": {"Home Win": 2.10, "Draw": 3.20, "Away Win": 4.50}},
+    }}))
+
+    legs = table.set_index("outcome")
+    assert legs["bookmaker"].to_dict() == {"Home Win": "Bet1", "Draw": "Bet2", "Away Win": "Bet3"}
+    total = 1 / 2.20 + 1 / 3.60 + 1 / 4.50
+    assert legs["total_implied"].iloc[0] == pytest.approx(total)
+    assert legs["stake_share"].sum() == pytest.approx(1.0)
+    payouts = legs["stake_share"] * legs["odds"]
+    assert np.allclose(payouts, 1 / total)
+    assert legs["profit"].iloc[0] == pytest.approx(1 / total - 1)
+    assert find_arbitrage(_book()).empty
+
+
+def test_best_prices_are_judged_against_their_own_books_margin():
+    book = _book({("Inter", "Milan"): {
+        "Bet1": {"1X2": {"Home Win": 2.20, "Draw": 3.30, "Away Win": 3.20}},
+        "Bet2": {"1X2": {"Home Win": 2.00, "Draw": 3.60, "Away Win": 3.40}},
+        "Bet3": {"1X2": {"Home Win": 2.05, "Draw": 3.20, "Away Win": 4.50}},
+    }})
+    odds, fair = best_odds_dict(book, "Inter", "Milan")
+
+    assert odds == {"1X2": {"Home Win": 2.20, "Draw": 3.60, "Away Win": 4.50}}
+    assert fair["1X2"]["Home Win"] == fair_odds_dict(book.odds_dict("Inter", "Milan", bookmaker="Bet1"))["1X2"]["Home Win"]
+    assert fair["1X2"]["Home Win"] < 1 / 2.20
+    assert fair["1X2"]["Away Win"] == fair_odds_dict(book.odds_dict("Inter", "Milan", bookmaker="Bet3"))["1X2"]["Away Win"]
+
+    bets = calculate_value_bets({"1X2": {"Home Win": 0.47, "Draw": 0.26, "Away Win": 0.27}}, odds, threshold=0.0, fair_dict=fair)
+    home = next(bet for bet in bets if bet["outcome"] == "Home Win")
+    assert home["fair_probability"] == fair["1X2"]["Home Win"]
+    scanned = scan_value_bets(model_probability_table([("Inter", "Milan", {"1X2": {"Home Win": 0.47}})]), book, threshold=0.0)
+    assert scanned["implied_probability"].iloc[0] == pytest.approx(home["fair_probability"], abs=1e-6)
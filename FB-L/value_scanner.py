@@ -0,0 +1,364 @@
+import re
+import numpy as np
+import pandas as pd
+from odds_ingestion import fixture_key
+from devig import devig_probabilities
+from player_props import PLAYER_MARKETS
+
+# Bookmaker outcome labels that differ from the predictor's own labels
+OUTCOME_ALIASES = {
+    ("1X2", "Home"): "Home Win",
+    ("1X2", "Away"): "Away Win",
+    ("1X2", "1"): "Home Win",
+    ("1X2", "X"): "Draw",
+    ("1X2", "2"): "Away Win",
+}
+
+
+def model_probability_table(predictions):
+    """Flatten model probabilities into a long table.
+
+    predictions is an iterable of (home_team, away_team, probabilities) where
+    probabilities is the nested {market: {outcome: p}} dict from the predictor.
+    """
+    fixtures, markets, outcomes, probs = [], [], [], []
+    for home_team, away_team, probabilities in predictions:
+        key = fixture_key(home_team, away_team)
+        for market, market_probs in probabilities.items():
+            for outcome, p in market_probs.items():
+                fixtures.append(key)
+                markets.append(market)
+                outcomes.append(outcome)
+                probs.append(float(p))
+    return pd.DataFrame({"fixture": fixtures, "market": markets, "outcome": outcomes, "probability": probs})
+
+
+def _align(model_table, odds_book):
+    """Shared axes plus the (fixture, selection, bookmaker) position of every book row"""
+    fixture_index = pd.Index(pd.unique(model_table["fixture"]))
+    selection_index = pd.MultiIndex.from_frame(model_table[["market", "outcome"]].drop_duplicates())
+    bookmakers = odds_book.bookmakers()
+
+    P = np.full((len(fixture_index), len(selection_index)), np.nan)
+    P[fixture_index.get_indexer(model_table["fixture"]),
+      selection_index.get_indexer(pd.MultiIndex.from_frame(model_table[["market", "outcome"]]))] = model_table["probability"].to_numpy()
+
+    # Translate the book's label vocabularies onto the model axes once, then scatter
+    market_labels = odds_book.vocabularies["market"].labels
+    outcome_labels = odds_book.vocabularies["outcome"].labels
+    fixture_map = fixture_index.get_indexer(odds_book.vocabularies["fixture"].labels)
+
+    pair_codes = odds_book.market.astype(np.int64) * len(outcome_labels) + odds_book.outcome
+    unique_pairs, pair_inverse = np.unique(pair_codes, return_inverse=True)
+    pair_labels = [
+        (market_labels[code // len(outcome_labels)], outcome_labels[code % len(outcome_labels)])
+        for code in unique_pairs.tolist()
+    ]
+    pair_labels = [(m, OUTCOME_ALIASES.get((m, o), o)) for m, o in pair_labels]
+    selection_map = selection_index.get_indexer(pd.MultiIndex.from_tuples(pair_labels, names=["market", "outcome"])) if pair_labels else np.empty(0, dtype=np.int64)
+
+    f = fixture_map[odds_book.fixture] if len(fixture_map) else np.empty(0, dtype=np.int64)
+    s = selection_map[pair_inverse]
+    ok = (f >= 0) & (s >= 0)
+    return fixture_index, selection_index, bookmakers, P, (f[ok], s[ok], odds_book.bookmaker[ok], ok)
+
+
+def _scatter(values, positions, shape):
+    f, s, b, ok = positions
+    grid = np.full(shape, np.nan)
+    grid[f, s, b] = values[ok]
+    return grid
+
+
+def align_probabilities_and_odds(model_table, odds_book):
+    """Align model probabilities and bookmaker prices on shared axes.
+
+    Returns (fixtures, selections, bookmakers, P, O) where P has shape
+    (fixture, selection) and O has shape (fixture, selection, bookmaker); a selection
+    is one (market, outcome) pair. Missing entries are NaN.
+    """
+    fixture_index, selection_index, bookmakers, P, positions = _align(model_table, odds_book)
+    O = _scatter(odds_book.price, positions, P.shape + (len(bookmakers),))
+    return fixture_index, selection_index, bookmakers, P, O
+
+
+def scan_value_bets(model_table, odds_book, threshold=0.05, margin_method="shin"):
+    """Find value bets for every fixture, market, outcome and bookmaker in one pass.
+
+    Edge and expected value are computed against the best available price for each
+    selection. The edge is measured against that bookmaker's margin-free probability
+    (see fair_probabilities); pass margin_method=None to use the raw 1 / price.
+    Returns a DataFrame sorted by expected value (highest first).
+    """
+    fixtures, selections, bookmakers, P, positions = _align(model_table, odds_book)
+    shape = P.shape + (len(bookmakers),)
+    O = _scatter(odds_book.price, positions, shape)
+
+    quoted = ~np.isnan(O)
+    best_book = np.argmax(np.where(quoted, O, -np.inf), axis=2)
+    best_odds = np.take_along_axis(O, best_book[..., None], axis=2)[..., 0]
+    books_quoting = quoted.sum(axis=2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if margin_method is None:
+            implied = 1.0 / best_odds
+        else:
+            fair = _scatter(fair_probabilities(odds_book, margin_method), positions, shape)
+            implied = np.take_along_axis(fair, best_book[..., None], axis=2)[..., 0]
+        edge = P - implied
+        expected_value = P * best_odds - 1.0
+
+    hit = np.isfinite(edge) & (edge > threshold)
+    fi, si = np.nonzero(hit)
+    if len(fi) == 0:
+        return pd.DataFrame(columns=["fixture", "market", "outcome", "bookmaker", "odds", "probability",
+                                     "implied_probability", "edge", "expected_value", "books_quoting"])
+
+    table = pd.DataFrame({
+        "fixture": fixtures[fi],
+        "market": selections.get_level_values(0)[si],
+        "outcome": selections.get_level_values(1)[si],
+        "bookmaker": np.asarray(bookmakers, dtype=object)[best_book[fi, si]],
+        "odds": best_odds[fi, si],
+        "probability": P[fi, si],
+        "implied_probability": implied[fi, si],
+        "edge": edge[fi, si],
+        "expected_value": expected_value[fi, si],
+        "books_quoting": books_quoting[fi, si],
+    })
+    return table.sort_values("expected_value", ascending=False, kind="stable").reset_index(drop=True)
+
+
+# Markets whose quoted outcomes are not an exhaustive, mutually exclusive set
+NON_EXHAUSTIVE_MARKETS = {"Correct Score", *PLAYER_MARKETS.values()}
+# Markets where more than one outcome wins (a fair book sums to this, not 1)
+MULTI_WINNER_MARKETS = {"Double Chance": 2}
+
+_LINE_PATTERN = re.compile(r"^(?P<side>.*?)\s*(?P<dir>Over|Under)\s+(?P<line>\d+(?:\.\d+)?)$", re.IGNORECASE)
+_HANDICAP_PATTERN = re.compile(r"^(?P<side>.*?)\s*(?P<line>[+-]\d+(?:\.\d+)?)$")
+
+
+def market_group_label(market, outcome):
+    """Name of the complementary outcome set an outcome belongs to.
+
+    Outcomes carrying their own line ("Over 8.5", "Home Under 4.5", "Home +1.5") are
+    grouped per line so each group is one book to be settled.
+    """
+    match = _LINE_PATTERN.match(str(outcome))
+    if match:
+        side = match.group("side").strip()
+        return f"{market} {side + ' ' if side else ''}{match.group('line')}"
+    if "handicap" in str(market).lower():
+        match = _HANDICAP_PATTERN.match(str(outcome))
+        if match:
+            return f"{market} {abs(float(match.group('line')))}"
+    return str(market)
+
+
+def _group_rows(odds_book):
+    """Per-row market group ids plus group labels, payout units and exhaustiveness"""
+    market_labels = odds_book.vocabularies["market"].labels
+    outcome_labels = odds_book.vocabularies["outcome"].labels
+    n_outcomes = max(len(outcome_labels), 1)
+
+    pair_codes = odds_book.market.astype(np.int64) * n_outcomes + odds_book.outcome
+    unique_pairs, pair_inverse = np.unique(pair_codes, return_inverse=True)
+
+    group_ids = {}
+    group_markets = []
+    pair_group = np.empty(len(unique_pairs), dtype=np.int64)
+    for i, code in enumerate(unique_pairs.tolist()):
+        market = market_labels[code // n_outcomes]
+        label = market_group_label(market, outcome_labels[code % n_outcomes])
+        if label not in group_ids:
+            group_ids[label] = len(group_ids)
+            group_markets.append(market)
+        pair_group[i] = group_ids[label]
+
+    units = np.array([MULTI_WINNER_MARKETS.get(m, 1) for m in group_markets], dtype=float)
+    exhaustive = np.array([m not in NON_EXHAUSTIVE_MARKETS for m in group_markets], dtype=bool)
+    return pair_group[pair_inverse], list(group_ids), units, exhaustive
+
+
+def _books(odds_book):
+    """Group book rows into one book per (fixture, market group, bookmaker).
+
+    A book is complete when it quotes every outcome seen for that fixture and market
+    across all bookmakers (and more than one).
+    """
+    group, labels, units, exhaustive = _group_rows(odds_book)
+    n_groups = max(len(labels), 1)
+    n_books = max(len(odds_book.vocabularies["bookmaker"].labels), 1)
+    n_outcomes = max(len(odds_book.vocabularies["outcome"].labels), 1)
+
+    fixture_group = odds_book.fixture.astype(np.int64) * n_groups + group
+    book_keys, book_inverse = np.unique(fixture_group * n_books + odds_book.bookmaker, return_inverse=True)
+    book_count = np.bincount(book_inverse)
+
+    # Distinct outcomes quoted per (fixture, market) by anyone
+    unique_selections = np.unique(fixture_group * n_outcomes + odds_book.outcome)
+    outcomes_per_group = np.bincount(unique_selections // n_outcomes,
+                                     minlength=len(odds_book.vocabularies["fixture"].labels) * n_groups)
+
+    key_fixture_group = book_keys // n_books
+    complete = (book_count == outcomes_per_group[key_fixture_group]) & (book_count > 1)
+    return {
+        "book": book_inverse,
+        "fixture": key_fixture_group // n_groups,
+        "group": key_fixture_group % n_groups,
+        "bookmaker": book_keys % n_books,
+        "count": book_count,
+        "complete": complete,
+        "labels": labels,
+        "units": units,
+        "exhaustive": exhaustive,
+    }
+
+
+def calculate_overround(odds_book):
+    """Bookmaker margin for every (fixture, market, bookmaker) with a complete book.
+
+    overround = sum(1 / price) / winners - 1, where a complete book quotes every
+    outcome seen for that fixture and market across all bookmakers.
+    """
+    books = _books(odds_book)
+    book_sum = np.bincount(books["book"], weights=1.0 / odds_book.price)
+    complete = books["complete"]
+    g = books["group"][complete]
+
+    fixture_labels = np.asarray(odds_book.vocabularies["fixture"].labels, dtype=object)
+    book_labels = np.asarray(odds_book.vocabularies["bookmaker"].labels, dtype=object)
+    table = pd.DataFrame({
+        "fixture": fixture_labels[books["fixture"][complete]],
+        "market": np.asarray(books["labels"], dtype=object)[g],
+        "bookmaker": book_labels[books["bookmaker"][complete]],
+        "outcomes": books["count"][complete],
+        "book_sum": book_sum[complete],
+        "overround": book_sum[complete] / books["units"][g] - 1.0,
+        "exhaustive": books["exhaustive"][g],
+    })
+    return table.sort_values(["fixture", "market", "overround"], kind="stable").reset_index(drop=True)
+
+
+def fair_probabilities(odds_book, method="shin"):
+    """Margin-free probability of every price in the book, aligned with its rows.
+
+    Each complete, exhaustive (fixture, market, bookmaker) book is de-vigged on its
+    own; prices whose book cannot be settled as a whole (a bookmaker quoting only
+    part of the market, Correct Score) keep the raw 1 / price.
+    """
+    fair = 1.0 / odds_book.price
+    if len(odds_book) == 0:
+        return fair
+    books = _books(odds_book)
+    usable = books["complete"] & books["exhaustive"][books["group"]]
+    rows = usable[books["book"]]
+    if rows.any():
+        compact = np.cumsum(usable) - 1
+        fair[rows] = devig_probabilities(
+            odds_book.price[rows], compact[books["book"][rows]], method=method,
+            units=books["units"][books["group"][usable]]
+        )
+    return fair
+
+
+def fair_odds_dict(odds_dict, method="shin"):
+    """Margin-free probabilities for a {market: {outcome: price}} dict such as BETTING_ODDS.
+
+    Outcomes quoted without their complement, and non-exhaustive markets, keep 1 / price.
+    """
+    keys, groups, prices, units = [], [], [], []
+    group_ids = {}
+    for market, market_odds in odds_dict.items():
+        if market in NON_EXHAUSTIVE_MARKETS:
+            continue
+        labels = {outcome: market_group_label(market, outcome) for outcome in market_odds}
+        sizes = pd.Series(list(labels.values())).value_counts()
+        for outcome, label in labels.items():
+            if sizes[label] < 2 or float(market_odds[outcome]) <= 1.0:
+                continue
+            if label not in group_ids:
+                group_ids[label] = len(group_ids)
+                units.append(MULTI_WINNER_MARKETS.get(market, 1))
+            keys.append((market, outcome))
+            groups.append(group_ids[label])
+            prices.append(float(market_odds[outcome]))
+
+    fair = dict(zip(keys, devig_probabilities(prices, groups, method=method, units=units).tolist())) if prices else {}
+    return {
+        market: {
+            outcome: fair.get((market, outcome), 1.0 / price if price > 0 else float("nan"))
+            for outcome, price in market_odds.items()
+        }
+        for market, market_odds in odds_dict.items()
+    }
+
+
+def best_odds_dict(odds_book, home_team, away_team=None, method="shin"):
+    """Best price per outcome of one fixture plus the margin-free probability of the
+    bookmaker offering it, as ({market: {outcome: price}}, {market: {outcome: p}}).
+
+    Each bookmaker's prices are de-vigged on their own (fair_odds_dict), never the
+    composite of best prices; method=None keeps the raw 1 / price.
+    """
+    best, fair = {}, {}
+    for bookmaker in odds_book.bookmakers():
+        odds = odds_book.odds_dict(home_team, away_team, bookmaker=bookmaker)
+        if not odds:
+            continue
+        book_fair = fair_odds_dict(odds, method) if method else None
+        for market, market_odds in odds.items():
+            for outcome, price in market_odds.items():
+                if price > best.get(market, {}).get(outcome, 0):
+                    best.setdefault(market, {})[outcome] = price
+                    fair.setdefault(market, {})[outcome] = book_fair[market][outcome] if book_fair else 1.0 / price
+    return best, fair
+
+
+def find_arbitrage(odds_book, only_arbitrage=True):
+    """Best-price combination across bookmakers for every (fixture, market).
+
+    Returns one row per leg with the bookmaker offering the best price, the stake
+    share that equalises the payout, and the combined implied probability of the
+    market. A market is an arbitrage (surebet) when that total is below 1.
+    """
+    group, labels, units, exhaustive = _group_rows(odds_book)
+    n_groups = max(len(labels), 1)
+    n_outcomes = max(len(odds_book.vocabularies["outcome"].labels), 1)
+
+    fixture_group = odds_book.fixture.astype(np.int64) * n_groups + group
+    selection_key = fixture_group * n_outcomes + odds_book.outcome
+
+    # Best price per selection: sort by (selection, price) and take the last of each run
+    order = np.lexsort((odds_book.price, selection_key))
+    sorted_keys = selection_key[order]
+    last = np.r_[sorted_keys[1:] != sorted_keys[:-1], True] if len(order) else np.empty(0, dtype=bool)
+    best_rows = order[last]
+    best_key = selection_key[best_rows]
+    best_price = odds_book.price[best_rows]
+
+    leg_group = best_key // n_outcomes
+    market_keys, market_inverse = np.unique(leg_group, return_inverse=True)
+    total_implied = np.bincount(market_inverse, weights=1.0 / best_price)
+    legs = np.bincount(market_inverse)
+
+    g = market_keys % n_groups
+    valid = exhaustive[g] & (legs > 1) & (units[g] == 1)
+    normalized_total = np.where(valid, total_implied / units[g], np.nan)
+    is_arbitrage = valid & (normalized_total < 1.0)
+
+    leg_total = total_implied[market_inverse]
+    table = pd.DataFrame({
+        "fixture": np.asarray(odds_book.vocabularies["fixture"].labels, dtype=object)[market_keys // n_groups][market_inverse],
+        "market": np.asarray(labels, dtype=object)[g][market_inverse],
+        "outcome": np.asarray(odds_book.vocabularies["outcome"].labels, dtype=object)[best_key % n_outcomes],
+        "bookmaker": np.asarray(odds_book.vocabularies["bookmaker"].labels, dtype=object)[odds_book.bookmaker[best_rows]],
+        "odds": best_price,
+        "stake_share": (1.0 / best_price) / leg_total,
+        "total_implied": normalized_total[market_inverse],
+        "profit": 1.0 / normalized_total[market_inverse] - 1.0,
+        "is_arbitrage": is_arbitrage[market_inverse],
+    })
+    if only_arbitrage:
+        table = table[table["is_arbitrage"]]
+    return table.sort_values(["profit", "fixture", "market"], ascending=[False, True, True], kind="stable").reset_index(drop=True)